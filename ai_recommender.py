@@ -1,196 +1,264 @@
-"""
-AI Recommendations module for TV Series Assistant
-Provides intelligent series recommendations based on watched series
-"""
-
-class AIRecommender:
-    """AI-powered series recommender"""
-    
-    # Database of popular series by genre
-    SERIES_DATABASE = {
-        'Crime Drama': [
-            ('Breaking Bad', 62, 'A chemistry teacher turned methamphetamine cook'),
-            ('Better Call Saul', 61, 'The origin story of criminal lawyer Saul Goodman'),
-            ('The Wire', 60, 'Baltimore\'s drug trade and criminal justice system'),
-            ('Mindhunter', 19, 'FBI agents study criminal psychology'),
-            ('Hannibal', 39, 'Psychological thriller about a cannibalistic psychiatrist'),
-        ],
-        'Drama': [
-            ('Game of Thrones', 73, 'Fantasy epic with political intrigue'),
-            ('The Crown', 50, 'British monarchy through decades'),
-            ('Succession', 39, 'Family power struggle over a media empire'),
-            ('The Last of Us', 9, 'Post-apocalyptic survival thriller'),
-            ('Chernobyl', 5, 'The Chernobyl nuclear disaster'),
-        ],
-        'Sci-Fi': [
-            ('Stranger Things', 42, 'Supernatural events in 1980s Indiana'),
-            ('The Expanse', 62, 'Humanity\'s future in space'),
-            ('Dark', 26, 'Time travel mystery in a German town'),
-            ('Westworld', 34, 'AI consciousness in a robot theme park'),
-            ('Altered Carbon', 10, 'Cyberpunk future with transferred consciousness'),
-        ],
-        'Comedy': [
-            ('The Office', 201, 'Mockumentary about office workers'),
-            ('Parks and Recreation', 125, 'Government workers in small-town Indiana'),
-            ('Brooklyn Nine-Nine', 153, 'Police precinct comedy'),
-            ('The Good Place', 50, 'Afterlife mystery comedy'),
-            ('Schitt\'s Creek', 80, 'Wealthy family loses everything'),
-        ],
-        'Thriller': [
-            ('True Detective', 24, 'Anthology crime thriller series'),
-            ('Dexter', 96, 'Serial killer who works for police'),
-            ('Peaky Blinders', 36, 'Post-WWI Birmingham gangsters'),
-            ('The Sopranos', 86, 'New Jersey mob boss in therapy'),
-            ('Killing Eve', 24, 'Cat-and-mouse between killer and investigator'),
-        ],
-        'Fantasy': [
-            ('The Witcher', 8, 'Monster hunter in a fantasy world'),
-            ('House of the Dragon', 10, 'Game of Thrones prequel'),
-            ('Rings of Power', 8, 'Lord of the Rings prequel'),
-            ('His Dark Materials', 16, 'Fantasy adventure with parallel worlds'),
-            ('Arcane', 9, 'League of Legends adaptation'),
-        ],
-        'Adventure': [
-            ('The Mandalorian', 16, 'Star Wars bounty hunter adventure'),
-            ('Lupin', 10, 'French heist and adventure series'),
-            ('Avatar: The Last Airbender', 61, 'Animated adventure in fantasy world'),
-            ('Castlevania', 32, 'Gothic vampire adventure'),
-            ('Vikings', 89, 'Norse mythology and exploration'),
-        ],
-    }
-    
-    def __init__(self, manager):
-        """
-        Initialize the recommender
-        
-        Args:
-            manager (SeriesManager): The series manager instance
-        """
-        self.manager = manager
-    
-    def get_recommendations(self, count=3):
-        """
-        Get AI-powered series recommendations
-        
-        Args:
-            count (int): Number of recommendations to return
-            
-        Returns:
-            list: List of recommended (series_name, episodes, description) tuples
-        """
-        if not self.manager.series_list:
-            return self._get_random_recommendations(count)
-        
-        # Analyze watched genres
-        genres_watched = self._analyze_genres()
-        
-        # Get recommendations based on genres
-        recommendations = self._recommend_by_genres(genres_watched, count)
-        
-        return recommendations
-    
-    def _analyze_genres(self):
-        """
-        Analyze genres of watched series
-        
-        Returns:
-            dict: Genre frequency mapping
-        """
-        genre_count = {}
-        
-        for series in self.manager.series_list:
-            genre = series.genre if series.genre != 'Unknown' else 'Drama'
-            genre_count[genre] = genre_count.get(genre, 0) + 1
-        
-        # Sort by frequency
-        return dict(sorted(genre_count.items(), key=lambda x: x[1], reverse=True))
-    
-    def _recommend_by_genres(self, genres_watched, count=3):
-        """
-        Recommend series based on watched genres
-        
-        Args:
-            genres_watched (dict): Genres the user is watching
-            count (int): Number of recommendations
-            
-        Returns:
-            list: Recommended series
-        """
-        recommendations = []
-        watched_names = {s.name.lower() for s in self.manager.series_list}
-        
-        # First, try primary genres
-        for genre in genres_watched.keys():
-            if genre in self.SERIES_DATABASE:
-                for series in self.SERIES_DATABASE[genre]:
-                    if series[0].lower() not in watched_names:
-                        recommendations.append(series)
-                        if len(recommendations) >= count:
-                            return recommendations[:count]
-        
-        # If we need more, add from other genres
-        for genre, series_list in self.SERIES_DATABASE.items():
-            if genre not in genres_watched:
-                for series in series_list:
-                    if series[0].lower() not in watched_names:
-                        recommendations.append(series)
-                        if len(recommendations) >= count:
-                            return recommendations[:count]
-        
-        return recommendations[:count]
-    
-    def _get_random_recommendations(self, count=3):
-        """
-        Get random recommendations for new users
-        
-        Args:
-            count (int): Number of recommendations
-            
-        Returns:
-            list: Random recommended series
-        """
-        import random
-        
-        all_series = []
-        for series_list in self.SERIES_DATABASE.values():
-            all_series.extend(series_list)
-        
-        return random.sample(all_series, min(count, len(all_series)))
-    
-    def display_recommendations(self, count=3):
-        """Display recommendations in a formatted way"""
-        recommendations = self.get_recommendations(count)
-        
-        if not recommendations:
-            print(" No recommendations available at this time.")
-            return
-        
-        print("\n" + "="*60)
-        print(" AI RECOMMENDATIONS FOR YOU")
-        print("="*60)
-        
-        for i, (name, episodes, description) in enumerate(recommendations, 1):
-            print(f"\n{i}. {name}")
-            print(f" Episodes: {episodes}")
-            print(f" {description}")
-        
-        print("\n" + "="*60)
-    
-    def get_series_info(self, series_name):
-        """
-        Get information about a series from the database
-        
-        Args:
-            series_name (str): Name of the series
-            
-        Returns:
-            tuple or None: (name, episodes, description) or None
-        """
-        series_lower = series_name.lower()
-        
-        for series_list in self.SERIES_DATABASE.values():
-            for name, episodes, description in series_list:
-                if name.lower() == series_lower:
-                    return (name, episodes, description)
-        
-        return None
+"""
+AI Recommendations module for TV Series Assistant
+Provides intelligent series recommendations based on watched series
+"""
+
+import threading
+from collections import OrderedDict
+from catalogue import Catalogue
+
+class AIRecommender:
+    """AI-powered series recommender"""
+    
+    # Database of popular series by genre
+    SERIES_DATABASE = {
+        'Crime Drama': [
+            ('Breaking Bad', 62, 'A chemistry teacher turned methamphetamine cook'),
+            ('Better Call Saul', 61, 'The origin story of criminal lawyer Saul Goodman'),
+            ('The Wire', 60, 'Baltimore\'s drug trade and criminal justice system'),
+            ('Mindhunter', 19, 'FBI agents study criminal psychology'),
+            ('Hannibal', 39, 'Psychological thriller about a cannibalistic psychiatrist'),
+        ],
+        'Drama': [
+            ('Game of Thrones', 73, 'Fantasy epic with political intrigue'),
+            ('The Crown', 50, 'British monarchy through decades'),
+            ('Succession', 39, 'Family power struggle over a media empire'),
+            ('The Last of Us', 9, 'Post-apocalyptic survival thriller'),
+            ('Chernobyl', 5, 'The Chernobyl nuclear disaster'),
+        ],
+        'Sci-Fi': [
+            ('Stranger Things', 42, 'Supernatural events in 1980s Indiana'),
+            ('The Expanse', 62, 'Humanity\'s future in space'),
+            ('Dark', 26, 'Time travel mystery in a German town'),
+            ('Westworld', 34, 'AI consciousness in a robot theme park'),
+            ('Altered Carbon', 10, 'Cyberpunk future with transferred consciousness'),
+        ],
+        'Comedy': [
+            ('The Office', 201, 'Mockumentary about office workers'),
+            ('Parks and Recreation', 125, 'Government workers in small-town Indiana'),
+            ('Brooklyn Nine-Nine', 153, 'Police precinct comedy'),
+            ('The Good Place', 50, 'Afterlife mystery comedy'),
+            ('Schitt\'s Creek', 80, 'Wealthy family loses everything'),
+        ],
+        'Thriller': [
+            ('True Detective', 24, 'Anthology crime thriller series'),
+            ('Dexter', 96, 'Serial killer who works for police'),
+            ('Peaky Blinders', 36, 'Post-WWI Birmingham gangsters'),
+            ('The Sopranos', 86, 'New Jersey mob boss in therapy'),
+            ('Killing Eve', 24, 'Cat-and-mouse between killer and investigator'),
+        ],
+        'Fantasy': [
+            ('The Witcher', 8, 'Monster hunter in a fantasy world'),
+            ('House of the Dragon', 10, 'Game of Thrones prequel'),
+            ('Rings of Power', 8, 'Lord of the Rings prequel'),
+            ('His Dark Materials', 16, 'Fantasy adventure with parallel worlds'),
+            ('Arcane', 9, 'League of Legends adaptation'),
+        ],
+        'Adventure': [
+            ('The Mandalorian', 16, 'Star Wars bounty hunter adventure'),
+            ('Lupin', 10, 'French heist and adventure series'),
+            ('Avatar: The Last Airbender', 61, 'Animated adventure in fantasy world'),
+            ('Castlevania', 32, 'Gothic vampire adventure'),
+            ('Vikings', 89, 'Norse mythology and exploration'),
+        ],
+    }
+    
+    def __init__(self, manager, catalogue=None, cache_size=32):
+        """
+        Initialize the recommender
+        
+        Args:
+            manager (SeriesManager): The series manager instance
+            catalogue (Catalogue or FileCatalogue): Where to draw
+                recommendations from; defaults to SERIES_DATABASE
+            cache_size (int): Number of recommendation results to memoize
+        """
+        self.manager = manager
+        # The catalogue indexes its titles and genres once, up front
+        self.catalogue = catalogue if catalogue is not None else Catalogue(self.SERIES_DATABASE)
+        
+        # LRU cache of (collection version, count) -> recommendations
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._cache_version = None
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._lock = threading.Lock()
+    
+    def get_recommendations(self, count=3):
+        """
+        Get AI-powered series recommendations
+        
+        Args:
+            count (int): Number of recommendations to return
+            
+        Returns:
+            list: List of recommended (series_name, episodes, description) tuples
+        """
+        # Several threads may share a recommender, as in server.py
+        with self._lock:
+            # Any change to the collection makes every cached result stale
+            version = self.manager.version
+            if version != self._cache_version:
+                self._cache.clear()
+                self._cache_version = version
+            
+            key = (version, count)
+            if key in self._cache:
+                self.cache_hits += 1
+                self._cache.move_to_end(key)
+                return list(self._cache[key])
+            self.cache_misses += 1
+            
+            stats = self.manager.get_statistics()
+            if not stats:
+                # Random picks are meant to vary, so they are not cached
+                return self._get_random_recommendations(count)
+            
+            # Analyze watched genres
+            genres_watched = self._analyze_genres(stats)
+            
+            # Get recommendations based on genres
+            recommendations = self._recommend_by_genres(genres_watched, count)
+            
+            if self.cache_size > 0:
+                self._cache[key] = recommendations
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+            
+            return list(recommendations)
+    
+    def cache_info(self):
+        """
+        Get recommendation cache statistics
+        
+        Returns:
+            dict: Cache hits, misses, current size and maximum size
+        """
+        return {
+            'hits': self.cache_hits,
+            'misses': self.cache_misses,
+            'size': len(self._cache),
+            'maxsize': self.cache_size
+        }
+    
+    def _analyze_genres(self, stats=None):
+        """
+        Analyze genres of watched series
+        
+        Each genre scores its number of series, weighted up by how far
+        through them the user is, so genres actually being watched rank
+        above ones that were only added. The counts come from the
+        manager's per-genre statistics rather than a pass over the list.
+        
+        Args:
+            stats (dict): Statistics from SeriesManager.get_statistics
+            
+        Returns:
+            dict: Genre affinity mapping, strongest genre first
+        """
+        if stats is None:
+            stats = self.manager.get_statistics() or {}
+        
+        genre_count = {}
+        genre_episodes = {}
+        for genre, genre_stats in stats.get('genres', {}).items():
+            genre = genre if genre != 'Unknown' else 'Drama'
+            genre_count[genre] = genre_count.get(genre, 0) + genre_stats['total_series']
+            total, watched = genre_episodes.get(genre, (0, 0))
+            genre_episodes[genre] = (total + genre_stats['total_episodes'],
+                                     watched + genre_stats['watched_episodes'])
+        
+        genre_scores = {}
+        for genre, frequency in genre_count.items():
+            total, watched = genre_episodes[genre]
+            progress = min(watched / total, 1) if total > 0 else 0
+            genre_scores[genre] = frequency * (1 + progress)
+        
+        # Sort by affinity
+        return dict(sorted(genre_scores.items(), key=lambda x: x[1], reverse=True))
+    
+    def _recommend_by_genres(self, genres_watched, count=3):
+        """
+        Recommend series based on watched genres
+        
+        Every catalogue entry belongs to one genre and scores that genre's
+        affinity, so walking genres from the highest score down yields the
+        top candidates in order. Only as many candidates as needed are
+        looked at, and each is checked against the manager's name index
+        rather than a set rebuilt from the whole collection.
+        
+        Args:
+            genres_watched (dict): Genre affinities, strongest first
+            count (int): Number of recommendations
+            
+        Returns:
+            list: Recommended series
+        """
+        recommendations = []
+        
+        # Primary genres first, then the rest of the catalogue
+        catalogue_genres = self.catalogue.genres()
+        known_genres = set(catalogue_genres)
+        genres = [genre for genre in genres_watched if genre in known_genres]
+        genres += [genre for genre in catalogue_genres if genre not in genres_watched]
+        
+        for genre in genres:
+            for series in self.catalogue.series_in_genre(genre):
+                if self.manager.find_series(series[0]) is None:
+                    recommendations.append(series)
+                    if len(recommendations) >= count:
+                        return recommendations
+        
+        return recommendations
+    
+    def _get_random_recommendations(self, count=3):
+        """
+        Get random recommendations for new users
+        
+        Args:
+            count (int): Number of recommendations
+            
+        Returns:
+            list: Random recommended series
+        """
+        return self.catalogue.sample(count)
+    
+    def display_recommendations(self, count=3, recommendations=None):
+        """
+        Display recommendations in a formatted way
+        
+        Args:
+            count (int): Number of recommendations to show
+            recommendations (list): Recommendations already fetched with
+                get_recommendations; None fetches them here
+        """
+        if recommendations is None:
+            recommendations = self.get_recommendations(count)
+        
+        if not recommendations:
+            print(" No recommendations available at this time.")
+            return
+        
+        print("\n" + "="*60)
+        print(" AI RECOMMENDATIONS FOR YOU")
+        print("="*60)
+        
+        for i, (name, episodes, description) in enumerate(recommendations, 1):
+            print(f"\n{i}. {name}")
+            print(f" Episodes: {episodes}")
+            print(f" {description}")
+        
+        print("\n" + "="*60)
+    
+    def get_series_info(self, series_name):
+        """
+        Get information about a series from the database
+        
+        Args:
+            series_name (str): Name of the series
+            
+        Returns:
+            tuple or None: (name, episodes, description) or None
+        """
+        return self.catalogue.lookup(series_name)
@@ -0,0 +1,133 @@
+"""
+Collaborative recommender benchmark - build, incremental update and query costs
+
+Usage:
+    python benchmarks/bench_collaborative.py [--users N] [--titles N] [--per-user N]
+"""
+
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from series import Series
+from collaborative import CoWatchModel
+
+def make_collections(users, titles, per_user, seed=0):
+    """Random collections where a few titles are far more popular than the rest"""
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(titles)]
+    collections = {}
+    for user in range(users):
+        picked = set()
+        while len(picked) < per_user:
+            picked.update(rng.choices(range(titles), weights, k=per_user - len(picked)))
+        collection = []
+        for title in picked:
+            series = Series(f"Title {title}", 20)
+            series.episodes_watched = rng.randint(0, 20)
+            collection.append(series)
+        collections[f"user{user}"] = collection
+    return collections
+
+def check_neighbours(model, collections):
+    """
+    Compare every cached neighbour list with similarities recomputed from scratch
+    
+    Returns:
+        int: Number of titles whose cached neighbours are wrong
+    """
+    columns = {}
+    for user, collection in collections.items():
+        for series in collection:
+            columns.setdefault(series.name.casefold(), {})[user] = model.weight(series)
+    
+    def similarity(a, b):
+        column_a, column_b = columns.get(a, {}), columns.get(b, {})
+        dot = sum(weight * column_b[user] for user, weight in column_a.items() if user in column_b)
+        if not dot:
+            return 0.0
+        norm_a = sum(weight * weight for weight in column_a.values())
+        norm_b = sum(weight * weight for weight in column_b.values())
+        return dot / math.sqrt(norm_a * norm_b)
+    
+    wrong = 0
+    for key, cached in list(model._neighbours.items()):
+        exact = sorted((similarity(key, other) for other in columns if other != key), reverse=True)
+        exact = [s for s in exact if s > 0][:model.neighbours_per_title]
+        if (len(cached) != len(exact)
+                or any(abs(s - similarity(key, other)) > 1e-9 or s <= 0 for other, s in cached)
+                or any(abs(s - e) > 1e-9 for (_, s), e in zip(cached, exact))):
+            wrong += 1
+    return wrong
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=5000)
+    parser.add_argument('--titles', type=int, default=2000)
+    parser.add_argument('--per-user', type=int, default=15, help="series per user")
+    parser.add_argument('--queries', type=int, default=1000)
+    args = parser.parse_args()
+    
+    collections = make_collections(args.users, args.titles, args.per_user)
+    rng = random.Random(1)
+    
+    start = time.perf_counter()
+    model = CoWatchModel.from_collections(collections.items())
+    built = time.perf_counter() - start
+    
+    # One user's progress on one series changes, or the series is dropped,
+    # then the row is re-synced
+    users = list(collections)
+    start = time.perf_counter()
+    for _ in range(args.queries):
+        user = rng.choice(users)
+        collection = collections[user]
+        series = rng.choice(collection)
+        if rng.random() < 0.2 and len(collection) > 1:
+            collection.remove(series)
+        else:
+            series.episodes_watched = rng.randint(0, 20)
+        model.update_user(user, collection)
+        model.neighbours(series.name.casefold())
+    updated = (time.perf_counter() - start) / args.queries
+    
+    start = time.perf_counter()
+    for _ in range(args.queries):
+        weights = {s.name.casefold(): model.weight(s) for s in collections[rng.choice(users)]}
+        model.recommend(weights, 10)
+    queried = (time.perf_counter() - start) / args.queries
+    
+    print(f"{args.users} users x {args.titles} titles, {args.per_user} series per user:")
+    print(f"   build from scratch   {built:10.3f} s")
+    print(f"   update one series    {updated * 1e6:10.1f} us  ({built / updated:,.0f}x cheaper than a rebuild)")
+    print(f"   top-10 query         {queried * 1e6:10.1f} us")
+    
+    # Fill every neighbour cache, change the collections under them, and
+    # check that what is still cached agrees with a recompute. The model is
+    # a sparse one, where most changes leave most caches alone.
+    collections = make_collections(300, 1000, 5, seed=2)
+    model = CoWatchModel.from_collections(collections.items())
+    users = list(collections)
+    titles = {series.name.casefold() for collection in collections.values() for series in collection}
+    for key in titles:
+        model.neighbours(key)
+    for _ in range(200):
+        user = rng.choice(users)
+        collection = collections[user]
+        series = rng.choice(collection)
+        if rng.random() < 0.5 and len(collection) > 1:
+            collection.remove(series)
+        else:
+            series.episodes_watched = rng.randint(0, 20)
+        model.update_user(user, collection)
+    wrong = check_neighbours(model, collections)
+    print(f"   cached neighbours    {'all match a recompute' if not wrong else f'{wrong} WRONG'}")
+    return 1 if wrong else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
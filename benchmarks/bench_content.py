@@ -0,0 +1,86 @@
+"""
+Content-based recommender benchmark - index build, cache load and top-k costs
+
+Usage:
+    python benchmarks/bench_content.py [--titles N] [--vocabulary N] [--owned N]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalogue import FileCatalogue
+from collaborative import CoWatchModel
+from content_based import TfidfIndex
+from series import Series
+
+GENRES = ['Drama', 'Comedy', 'Sci-Fi', 'Thriller', 'Fantasy', 'Adventure', 'Crime Drama', 'Horror']
+
+def make_catalogue(titles, vocabulary, seed=0):
+    """Random descriptions whose words follow a Zipf-like distribution"""
+    rng = random.Random(seed)
+    words = [f"word{rank}" for rank in range(vocabulary)]
+    weights = [1 / (rank + 1) for rank in range(vocabulary)]
+    series_by_genre = {genre: [] for genre in GENRES}
+    for title in range(titles):
+        description = " ".join(rng.choices(words, weights, k=12))
+        series_by_genre[rng.choice(GENRES)].append((f"Title {title}", rng.randint(5, 100), description))
+    return series_by_genre
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--titles', type=int, default=100000)
+    parser.add_argument('--vocabulary', type=int, default=20000, help="distinct description words")
+    parser.add_argument('--owned', type=int, default=50, help="catalogue titles in the collection")
+    parser.add_argument('--queries', type=int, default=200)
+    args = parser.parse_args()
+    
+    rng = random.Random(1)
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, 'catalogue')
+        FileCatalogue.build(filename, make_catalogue(args.titles, args.vocabulary))
+        catalogue = FileCatalogue(filename)
+        cache_file = filename + '.tfidf'
+        
+        start = time.perf_counter()
+        index = TfidfIndex.open(catalogue, cache_file)
+        built = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        index = TfidfIndex.open(catalogue, cache_file)
+        loaded = time.perf_counter() - start
+        catalogue.close()
+    
+    collections = []
+    for _ in range(10):
+        collection = []
+        for title in rng.sample(range(args.titles), args.owned):
+            series = Series(f"Title {title}", 20)
+            series.episodes_watched = rng.randint(0, 20)
+            collection.append(series)
+        collections.append(collection)
+    
+    start = time.perf_counter()
+    for query in range(args.queries):
+        index.profile((s, CoWatchModel.weight(s)) for s in collections[query % len(collections)])
+    profiled = (time.perf_counter() - start) / args.queries
+    
+    profiles = [index.profile((s, CoWatchModel.weight(s)) for s in collection) for collection in collections]
+    start = time.perf_counter()
+    for query in range(args.queries):
+        index.recommend(profiles[query % len(profiles)], 10)
+    queried = (time.perf_counter() - start) / args.queries
+    
+    print(f"{args.titles} titles, {len(index.postings)} terms, {args.owned} series per collection:")
+    print(f"   build and cache      {built:10.3f} s")
+    print(f"   load from cache      {loaded:10.3f} s")
+    print(f"   build a profile      {profiled * 1e3:10.2f} ms")
+    print(f"   top-10 query         {queried * 1e3:10.2f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Memory benchmark - compares the ways SeriesManager can hold a collection
+
+Usage:
+    python benchmarks/bench_memory.py [--count N]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from series import Series
+from columnar_store import ColumnarSeriesStore
+
+GENRES = ['Drama', 'Comedy', 'Sci-Fi', 'Thriller', 'Fantasy', 'Crime Drama', 'Unknown']
+
+class DictSeries:
+    """The original Series layout: a plain object with a __dict__"""
+    
+    def __init__(self, name, total_episodes, genre="Unknown"):
+        self.name = name
+        self.total_episodes = total_episodes
+        self.genre = genre
+        self.episodes_watched = 0
+
+def make_records(count):
+    """Build records the way JSONStorage would read them back from disk"""
+    records = [
+        {
+            'name': f"Series {i}",
+            'total_episodes': 10 + i % 90,
+            'genre': GENRES[i % len(GENRES)],
+            'episodes_watched': i % 10
+        }
+        for i in range(count)
+    ]
+    # Round-trip through JSON so genres are separate strings, as after a load
+    return json.loads(json.dumps(records))
+
+def build_dict(records, series_class):
+    index = {}
+    for item in records:
+        series = series_class(item['name'], item['total_episodes'], item['genre'])
+        series.episodes_watched = item['episodes_watched']
+        index[item['name'].casefold()] = series
+    return index
+
+def build_columnar(records):
+    store = ColumnarSeriesStore()
+    for item in records:
+        series = Series(item['name'], item['total_episodes'], item['genre'])
+        series.episodes_watched = item['episodes_watched']
+        store[item['name'].casefold()] = series
+    return store
+
+def measure(build, records):
+    """Return the memory held by the built collection, in bytes"""
+    tracemalloc.start()
+    collection = build(records)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del collection
+    return current
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--count', type=int, default=100000, help="number of series")
+    args = parser.parse_args()
+    
+    records = make_records(args.count)
+    layouts = [
+        ("dict-based Series", lambda r: build_dict(r, DictSeries)),
+        ("slotted Series", lambda r: build_dict(r, Series)),
+        ("columnar store", build_columnar),
+    ]
+    
+    print(f"Memory for {args.count} series (names, index and objects):")
+    baseline = None
+    for label, build in layouts:
+        size = measure(build, records)
+        baseline = baseline or size
+        print(f"   {label:<20} {size / 2**20:8.1f} MiB  "
+              f"{size / args.count:6.0f} B/series  {size / baseline:5.2f}x")
+
+if __name__ == "__main__":
+    main()
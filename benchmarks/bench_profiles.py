@@ -0,0 +1,81 @@
+"""
+Profile store benchmark - on-demand loading and parallel recommendations
+
+Creates a sharded store of many users, then measures random profile
+access through the LRU and recommend_all with one worker and with
+several.
+
+Usage:
+    python benchmarks/bench_profiles.py [--users N] [--series N] [--max-loaded N] [--workers N]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_recommender import AIRecommender
+from profile_store import ProfileStore, recommend_all
+
+def populate(store, users, series_per_user, seed=0):
+    """Write a random collection for every user straight to storage"""
+    rng = random.Random(seed)
+    titles = [(name, episodes, genre)
+              for genre, entries in AIRecommender.SERIES_DATABASE.items()
+              for name, episodes, _ in entries]
+    for i in range(users):
+        store.manager(f"user{i:05d}").bulk_add(
+            {'name': name, 'total_episodes': episodes, 'genre': genre,
+             'episodes_watched': rng.randint(0, episodes)}
+            for name, episodes, genre in rng.sample(titles, min(series_per_user, len(titles)))
+        )
+    store.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--series', type=int, default=8, help="series per user")
+    parser.add_argument('--max-loaded', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as root, contextlib.redirect_stdout(io.StringIO()):
+        store = ProfileStore(root, max_loaded=args.max_loaded, write_behind=False)
+        start = time.perf_counter()
+        populate(store, args.users, args.series)
+        created = time.perf_counter() - start
+        
+        # Skewed access: most requests go to the most active tenth of users
+        rng = random.Random(1)
+        store = ProfileStore(root, max_loaded=args.max_loaded)
+        requests = 20000
+        start = time.perf_counter()
+        for _ in range(requests):
+            hot = rng.random() < 0.8
+            user = rng.randrange(args.users // 10 if hot else args.users)
+            store.manager(f"user{user:05d}").get_statistics()
+        accessed = time.perf_counter() - start
+        store.close()
+        
+        timings = {}
+        for workers in sorted({1, args.workers}):
+            start = time.perf_counter()
+            results = sum(1 for _ in recommend_all(store, workers=workers))
+            timings[workers] = time.perf_counter() - start
+    
+    print(f"{args.users} users, {args.series} series each, LRU of {args.max_loaded}:")
+    print(f"   create               {created:8.2f} s")
+    print(f"   {requests} accesses      {accessed:8.2f} s  "
+          f"({store.loads} loads, {store.evictions} evictions)")
+    for workers, elapsed in timings.items():
+        print(f"   recommend_all x{workers:<3}   {elapsed:8.2f} s  "
+              f"({results / elapsed:.0f} users/s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Server load generator - measures throughput and latency of server.py
+
+Starts server.py on a free port with a temporary data directory (or uses
+--url), then runs concurrent keep-alive clients that add, update, read,
+search and ask for recommendations across several users.
+
+Usage:
+    python benchmarks/bench_server.py [--clients N] [--requests N] [--users N] [--url URL]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import quote, urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVER = os.path.join(ROOT, 'server.py')
+
+GENRES = ['Drama', 'Comedy', 'Sci-Fi', 'Thriller', 'Fantasy', 'Crime Drama']
+
+class Client:
+    """One keep-alive HTTP connection"""
+    
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = self.writer = None
+    
+    async def request(self, method, path, body=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        data = json.dumps(body).encode('utf-8') if body is not None else b''
+        self.writer.write(
+            f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n\r\n".encode('latin-1') + data
+        )
+        await self.writer.drain()
+        
+        status = int((await self.reader.readline()).split()[1])
+        length = 0
+        close = False
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            if name.lower() == 'content-length':
+                length = int(value)
+            elif name.lower() == 'connection':
+                close = value.strip().lower() == 'close'
+        await self.reader.readexactly(length)
+        if close:
+            self.close()
+        return status
+    
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+def next_request(rng, user, added):
+    """Pick a request from a read-heavy mix"""
+    base = f"/users/{user}"
+    roll = rng.random()
+    if roll < 0.15 or not added:
+        name = f"Series {len(added)}-{rng.randrange(1 << 30)}"
+        added.append(name)
+        return 'POST', base + "/series", {
+            'name': name, 'total_episodes': rng.randint(5, 100), 'genre': rng.choice(GENRES)}
+    name = quote(rng.choice(added), safe='')
+    if roll < 0.35:
+        return 'PATCH', f"{base}/series/{name}", {'episodes_watched': rng.randint(0, 50)}
+    if roll < 0.65:
+        return 'GET', f"{base}/series/{name}", None
+    if roll < 0.80:
+        return 'GET', f"{base}/search?q=series+{rng.randint(0, 9)}", None
+    if roll < 0.92:
+        return 'GET', f"{base}/stats", None
+    return 'GET', f"{base}/recommendations?count=3", None
+
+async def run_client(host, port, requests, users, seed, latencies, errors):
+    rng = random.Random(seed)
+    client = Client(host, port)
+    added = {user: [] for user in users}
+    try:
+        for _ in range(requests):
+            user = rng.choice(users)
+            method, path, body = next_request(rng, user, added[user])
+            start = time.perf_counter()
+            status = await client.request(method, path, body)
+            latencies.append(time.perf_counter() - start)
+            if status >= 400:
+                errors.append(status)
+    finally:
+        client.close()
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+async def run_load(host, port, args):
+    users = [f"user{i}" for i in range(args.users)]
+    latencies, errors = [], []
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        run_client(host, port, args.requests, users, seed, latencies, errors)
+        for seed in range(args.clients)
+    ))
+    elapsed = time.perf_counter() - start
+    
+    latencies.sort()
+    print(f"{len(latencies)} requests from {args.clients} clients over {args.users} users "
+          f"in {elapsed:.2f} s")
+    print(f"   throughput   {len(latencies) / elapsed:10.0f} req/s")
+    for label, fraction in (("p50", 0.50), ("p90", 0.90), ("p99", 0.99), ("max", 1.0)):
+        print(f"   latency {label}  {percentile(latencies, fraction) * 1000:10.2f} ms")
+    print(f"   errors       {len(errors):10d}")
+
+def start_server(data_dir, storage):
+    """Start server.py on a free port and return (process, port)"""
+    process = subprocess.Popen(
+        [sys.executable, SERVER, '--port', '0', '--data-dir', data_dir, '--storage', storage],
+        stderr=subprocess.PIPE, text=True, cwd=ROOT)
+    line = process.stderr.readline()
+    if not line.startswith("Serving on"):
+        process.kill()
+        raise RuntimeError(f"server did not start: {line.strip()}")
+    return process, int(line.rsplit(':', 1)[1].strip('/\n'))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--clients', type=int, default=32, help="concurrent connections")
+    parser.add_argument('--requests', type=int, default=500, help="requests per client")
+    parser.add_argument('--users', type=int, default=8, help="distinct user trackers")
+    parser.add_argument('--storage', choices=['json', 'journal', 'db'], default='json')
+    parser.add_argument('--url', help="benchmark a running server instead of starting one")
+    args = parser.parse_args()
+    
+    if args.url:
+        url = urlsplit(args.url)
+        asyncio.run(run_load(url.hostname, url.port or 80, args))
+        return
+    
+    with tempfile.TemporaryDirectory() as data_dir:
+        process, port = start_server(data_dir, args.storage)
+        try:
+            asyncio.run(run_load('127.0.0.1', port, args))
+        finally:
+            process.terminate()
+            process.wait()
+
+if __name__ == "__main__":
+    main()
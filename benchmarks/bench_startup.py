@@ -0,0 +1,76 @@
+"""
+Startup benchmark - times main.py from launch to exit on a large data file
+
+Usage:
+    python benchmarks/bench_startup.py [--count N] [--runs N]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN = os.path.join(ROOT, 'main.py')
+
+GENRES = ['Drama', 'Comedy', 'Sci-Fi', 'Thriller', 'Fantasy', 'Crime Drama', 'Unknown']
+
+def write_data(filename, count):
+    """Write a JSONStorage data file with count series"""
+    records = [
+        {
+            'name': f"Series {i}",
+            'total_episodes': 10 + i % 90,
+            'genre': GENRES[i % len(GENRES)],
+            'episodes_watched': i % 10
+        }
+        for i in range(count)
+    ]
+    with open(filename, 'w', encoding='utf-8') as f:
+        json.dump(records, f, indent=4)
+
+def run(args, stdin=None):
+    """Run main.py once and return the wall time in seconds"""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, MAIN] + args, input=stdin, text=True, cwd=ROOT,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+    return time.perf_counter() - start
+
+def best_of(runs, args, stdin=None):
+    return min(run(args, stdin) for _ in range(runs))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--count', type=int, default=200000, help="number of series")
+    parser.add_argument('--runs', type=int, default=3, help="runs per case, best is reported")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        data = os.path.join(tmp, 'series_data.json')
+        write_data(data, args.count)
+        print(f"Startup for {args.count} series (best of {args.runs}):")
+        
+        # Warm the snapshot cache once so the snapshot case measures a reuse
+        run(['--data', data, '--snapshot', 'stats'])
+        
+        cases = [
+            ("interpreter only", None, None),
+            ("menu, then exit", ['--data', data], "8\n"),
+            ("stats, JSON parse", ['--data', data, 'stats'], None),
+            ("stats, snapshot", ['--data', data, '--snapshot', 'stats'], None),
+        ]
+        for label, main_args, stdin in cases:
+            if main_args is None:
+                start = time.perf_counter()
+                for _ in range(args.runs):
+                    subprocess.run([sys.executable, '-c', 'pass'], check=True)
+                elapsed = (time.perf_counter() - start) / args.runs
+            else:
+                elapsed = best_of(args.runs, main_args, stdin)
+            print(f"   {label:<20} {elapsed * 1000:8.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+Benchmark suite - times the storage, lookup, search, statistics and
+recommendation hot paths on synthetic collections
+
+Every case reports throughput, latency percentiles and peak memory. The
+results are written as JSON and can be compared against a saved baseline;
+cases that got slower than the threshold are flagged and the exit status
+is 1.
+
+Usage:
+    python benchmarks/bench_suite.py [--sizes 1k,100k,1m] [--output results.json]
+                                     [--baseline baseline.json] [--threshold 0.15]
+"""
+
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from series import Series
+from series_manager import SeriesManager
+from json_storage import JSONStorage
+from ai_recommender import AIRecommender
+
+GENRES = ['Drama', 'Comedy', 'Sci-Fi', 'Thriller', 'Fantasy', 'Crime Drama', 'Unknown']
+WORDS = ['Dark', 'House', 'Crown', 'Lost', 'Night', 'City', 'Blue', 'Last', 'Road', 'Fire',
+         'Stone', 'River', 'Ghost', 'Empire', 'Silent', 'Wild', 'Iron', 'Glass', 'Shadow', 'Kings']
+
+# Latency samples kept per case; enough for a stable p99
+SAMPLES = 2000
+
+def parse_size(text):
+    """Turn '1k', '100k' or '1m' into a count"""
+    text = text.strip().lower()
+    scale = {'k': 1000, 'm': 1000000}.get(text[-1:], 1)
+    return int(float(text.rstrip('km')) * scale)
+
+def make_series(count, seed=0):
+    """Build a reproducible synthetic collection with varied names"""
+    rng = random.Random(seed)
+    collection = []
+    for i in range(count):
+        name = f"{rng.choice(WORDS)} {rng.choice(WORDS)} {i}"
+        series = Series(name, rng.randint(5, 120), rng.choice(GENRES))
+        series.episodes_watched = rng.randint(0, series.total_episodes)
+        collection.append(series)
+    return collection
+
+def summarize(latencies_ns, ops, elapsed):
+    """Turn raw timings into the reported numbers"""
+    latencies = sorted(latencies_ns)
+    pick = lambda fraction: latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] / 1000
+    return {
+        'ops': ops,
+        'seconds': round(elapsed, 6),
+        'ops_per_sec': round(ops / elapsed, 1) if elapsed else None,
+        'p50_us': round(pick(0.50), 2),
+        'p90_us': round(pick(0.90), 2),
+        'p99_us': round(pick(0.99), 2),
+    }
+
+def time_calls(call, args_list):
+    """Call once per argument tuple, timing each call"""
+    latencies = []
+    clock = time.perf_counter_ns
+    start = clock()
+    for args in args_list:
+        before = clock()
+        call(*args)
+        latencies.append(clock() - before)
+    return summarize(latencies, len(args_list), (clock() - start) / 1e9)
+
+def peak_memory(run):
+    """Peak bytes allocated while run() executes"""
+    tracemalloc.start()
+    try:
+        run()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def bench_size(count, tmp, seed=0):
+    """Run every case against a collection of count series"""
+    rng = random.Random(seed)
+    collection = make_series(count, seed)
+    names = [s.name for s in collection]
+    results = {}
+    # Whole-collection passes: more of them for small collections to steady the numbers
+    repeats = max(1, min(20, 200000 // count))
+    
+    # Storage: whole-collection saves and loads
+    storage = JSONStorage(os.path.join(tmp, f"bench_{count}.json"))
+    case = time_calls(storage.save_series, [(collection,)] * repeats)
+    case['series_per_sec'] = round(count * repeats / case['seconds'], 1)
+    case['peak_bytes'] = peak_memory(lambda: storage.save_series(collection))
+    results['storage.save_series'] = case
+    
+    case = time_calls(storage.load_series, [()] * repeats)
+    case['series_per_sec'] = round(count * repeats / case['seconds'], 1)
+    case['peak_bytes'] = peak_memory(storage.load_series)
+    results['storage.load_series'] = case
+    
+    # Manager: build by single adds, then look up, search and summarize
+    def fill(manager):
+        for series in collection:
+            manager.add_series(series.name, series.total_episodes, series.genre)
+    manager = SeriesManager()
+    case = time_calls(manager.add_series,
+                      [(s.name, s.total_episodes, s.genre) for s in collection])
+    case['peak_bytes'] = peak_memory(lambda: fill(SeriesManager()))
+    results['manager.add_series'] = case
+    for series in collection:
+        manager.update_episodes(series.name, series.episodes_watched)
+    
+    lookups = [(rng.choice(names) if rng.random() < 0.9 else f"Missing {i}",) for i in range(SAMPLES)]
+    case = time_calls(manager.find_series, lookups)
+    case['peak_bytes'] = peak_memory(lambda: [manager.find_series(*args) for args in lookups[:100]])
+    results['manager.find_series'] = case
+    
+    # Specific terms (a word plus part of a number) keep result lists short
+    terms = [(f"{rng.choice(WORDS).lower()} {rng.randrange(count)}",) for _ in range(SAMPLES // 10)]
+    case = time_calls(manager.search_series, terms)
+    case['peak_bytes'] = peak_memory(lambda: [manager.search_series(*args) for args in terms[:20]])
+    results['manager.search_series'] = case
+    
+    case = time_calls(manager.get_statistics, [()] * SAMPLES)
+    case['peak_bytes'] = peak_memory(manager.get_statistics)
+    results['manager.get_statistics'] = case
+    
+    # Recommender: uncached, so each call does the full genre walk
+    recommender = AIRecommender(manager, cache_size=0)
+    case = time_calls(recommender.get_recommendations, [(5,)] * (SAMPLES // 4))
+    case['peak_bytes'] = peak_memory(lambda: recommender.get_recommendations(5))
+    results['recommender.get_recommendations'] = case
+    
+    return results
+
+def compare(results, baseline, threshold):
+    """
+    Compare results against a baseline
+    
+    Returns:
+        list: (size, case, metric, baseline value, new value, change) for
+        each regression beyond the threshold
+    """
+    regressions = []
+    for size, cases in results.items():
+        for name, case in cases.items():
+            old = baseline.get('results', {}).get(size, {}).get(name)
+            if not old:
+                continue
+            checks = [
+                ('ops_per_sec', old.get('ops_per_sec'), case['ops_per_sec'], -1),
+                ('p50_us', old.get('p50_us'), case['p50_us'], 1),
+                ('peak_bytes', old.get('peak_bytes'), case['peak_bytes'], 1),
+            ]
+            for metric, before, after, worse in checks:
+                if not before or after is None:
+                    continue
+                change = (after - before) / before
+                if change * worse > threshold:
+                    regressions.append((size, name, metric, before, after, change))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default="1k,100k", help="collection sizes, e.g. 1k,100k,1m")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="write the results JSON here (default: stdout)")
+    parser.add_argument('--baseline', help="results JSON from an earlier run to compare against")
+    parser.add_argument('--threshold', type=float, default=0.15,
+                        help="relative slowdown that counts as a regression (default: %(default)s)")
+    args = parser.parse_args()
+    
+    sizes = [parse_size(size) for size in args.sizes.split(',')]
+    report = {
+        'meta': {
+            'date': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': args.seed,
+            'samples': SAMPLES,
+        },
+        'results': {},
+    }
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in sizes:
+            print(f"Running {count} series...", file=sys.stderr)
+            # The code under test prints as it works; keep that out of the way
+            with contextlib.redirect_stdout(io.StringIO()):
+                report['results'][str(count)] = bench_size(count, tmp, args.seed)
+    
+    for size, cases in report['results'].items():
+        print(f"\n{int(size):,} series", file=sys.stderr)
+        for name, case in cases.items():
+            print(f"   {name:<34} {case['ops_per_sec']:>12,.0f} ops/s  "
+                  f"p50 {case['p50_us']:>10,.1f} us  p99 {case['p99_us']:>10,.1f} us  "
+                  f"peak {case['peak_bytes'] / 2**20:8.1f} MiB", file=sys.stderr)
+    
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare(report['results'], baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regressions against {args.baseline}:", file=sys.stderr)
+            for size, name, metric, before, after, change in regressions:
+                print(f"   {int(size):,} {name} {metric}: {before:,} -> {after:,} ({change:+.0%})",
+                      file=sys.stderr)
+            return 1
+        print(f"\nNo regressions against {args.baseline}", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
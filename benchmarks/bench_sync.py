@@ -0,0 +1,89 @@
+"""
+Sync benchmark - cost of a delta sync against the number of changes
+
+Two in-memory collections start out identical; each round changes some
+series on both sides and syncs them over a socket pair.
+
+Usage:
+    python benchmarks/bench_sync.py [--series N] [--changes 1,10,100,1000]
+"""
+
+import argparse
+import contextlib
+import os
+import random
+import socket
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from series import Series
+from series_manager import SeriesManager
+from sync import RemoteReplica, Replica, serve, sync
+
+def make_manager(count):
+    """A collection of count series with no storage behind it"""
+    manager = SeriesManager()
+    series_list = []
+    for number in range(count):
+        series = Series(f"Series {number}", 50, "Drama")
+        series.episodes_watched = number % 50
+        series_list.append(series)
+    manager.series_list = series_list
+    return manager
+
+def remote_sync(local, replica):
+    """Sync with a replica served on the other end of a socket pair"""
+    ours, theirs = socket.socketpair()
+    server = threading.Thread(target=serve, args=(replica, theirs))
+    server.start()
+    remote = RemoteReplica(ours)
+    try:
+        report = sync(local, remote)
+    finally:
+        remote.close()
+        server.join()
+        theirs.close()
+    report['bytes'] = remote.bytes_sent + remote.bytes_received
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--series', type=int, default=100000)
+    parser.add_argument('--changes', default="1,10,100,1000",
+                        help="comma-separated changes per side per round")
+    args = parser.parse_args()
+    
+    rng = random.Random(0)
+    with contextlib.redirect_stdout(open(os.devnull, 'w')):
+        local, remote = Replica(make_manager(args.series)), Replica(make_manager(args.series))
+        
+        start = time.perf_counter()
+        local.refresh()
+        remote.refresh()
+        hashed = (time.perf_counter() - start) / 2
+        
+        start = time.perf_counter()
+        idle = remote_sync(local, remote)
+        idle_time = time.perf_counter() - start
+        
+        rounds = []
+        for changes in map(int, args.changes.split(',')):
+            for replica in (local, remote):
+                for number in rng.sample(range(args.series), changes):
+                    replica.manager.update_episodes(f"Series {number}", rng.randint(0, 50))
+            start = time.perf_counter()
+            report = remote_sync(local, remote)
+            rounds.append((changes, time.perf_counter() - start, report))
+    
+    print(f"{args.series} series per side:")
+    print(f"   hash a collection    {hashed:10.3f} s  (first sync only)")
+    print(f"   sync, no changes     {idle_time * 1e3:10.2f} ms  {idle['bytes']:>9,} bytes")
+    for changes, elapsed, report in rounds:
+        print(f"   sync, {changes:>5} per side {elapsed * 1e3:10.2f} ms  {report['bytes']:>9,} bytes"
+              f"  ({report['sent']} sent, {report['received']} received)")
+
+if __name__ == "__main__":
+    main()
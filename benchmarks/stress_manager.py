@@ -0,0 +1,169 @@
+"""
+Concurrency stress test - hammers one SeriesManager from many threads
+
+Writer threads add, update and delete series while reader threads list,
+search and read statistics. Readers check that every snapshot they see is
+consistent; at the end the collection is checked against its running
+totals and against a fresh load from storage, watch history included.
+
+Usage:
+    python benchmarks/stress_manager.py [--readers N] [--writers N] [--seconds S]
+                                        [--storage json|journal] [--write-behind]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from series_manager import SeriesManager
+from json_storage import JSONStorage
+from journal_storage import JournalStorage
+
+GENRES = ['Drama', 'Comedy', 'Sci-Fi', 'Thriller', 'Fantasy', 'Crime Drama']
+
+def check_statistics(stats):
+    """The overall totals must equal the sum of the per-genre totals"""
+    if stats is None:
+        return
+    for field in ('total_series', 'completed_series', 'total_episodes', 'watched_episodes'):
+        by_genre = sum(genre[field] for genre in stats['genres'].values())
+        if by_genre != stats[field]:
+            raise AssertionError(f"{field}: {stats[field]} overall but {by_genre} across genres")
+
+def check_collection(manager):
+    """Recompute the statistics from the series list and compare"""
+    series_list = manager.series_list
+    names = [s.name.casefold() for s in series_list]
+    if len(names) != len(set(names)):
+        raise AssertionError("duplicate names in the collection")
+    
+    stats = manager.get_statistics()
+    if not series_list:
+        assert stats is None, stats
+        return
+    check_statistics(stats)
+    expected = {
+        'total_series': len(series_list),
+        'completed_series': sum(s.is_completed() for s in series_list),
+        'total_episodes': sum(s.total_episodes for s in series_list),
+        'watched_episodes': sum(s.episodes_watched for s in series_list),
+    }
+    for field, value in expected.items():
+        if stats[field] != value:
+            raise AssertionError(f"{field}: running total {stats[field]}, recomputed {value}")
+
+def row(series):
+    """Everything storage keeps about a series, watch events included"""
+    events = tuple(map(tuple, series.history.events())) if series.history else ()
+    return (series.name, series.total_episodes, series.genre, series.episodes_watched, events)
+
+def writer(manager, seed, deadline, counts):
+    rng = random.Random(seed)
+    mine = []
+    while time.monotonic() < deadline:
+        roll = rng.random()
+        if roll < 0.4 or not mine:
+            name = f"Series {seed}-{len(mine)}-{rng.randrange(1000)}"
+            if manager.add_series(name, rng.randint(1, 50), rng.choice(GENRES)):
+                mine.append(name)
+        elif roll < 0.85:
+            manager.update_episodes(rng.choice(mine), rng.randint(0, 60))
+        else:
+            manager.delete_series(mine.pop(rng.randrange(len(mine))))
+        counts['writes'] += 1
+
+def reader(manager, seed, deadline, counts):
+    rng = random.Random(seed)
+    while time.monotonic() < deadline:
+        roll = rng.random()
+        if roll < 0.4:
+            check_statistics(manager.get_statistics())
+        elif roll < 0.7:
+            term = f"series {rng.randrange(10)}"
+            for series in manager.match_series(term):
+                if term not in series.name.casefold():
+                    raise AssertionError(f"'{series.name}' does not match '{term}'")
+        elif roll < 0.9:
+            series_list = manager.series_list
+            if len({s.name.casefold() for s in series_list}) != len(series_list):
+                raise AssertionError("duplicate names in a snapshot")
+        else:
+            manager.view_all_series()
+        counts['reads'] += 1
+
+def run(target, errors, *args):
+    try:
+        target(*args)
+    except BaseException as e:
+        errors.append(f"{threading.current_thread().name}: {type(e).__name__}: {e}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--storage', choices=['json', 'journal'], default='journal')
+    parser.add_argument('--write-behind', action='store_true')
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.storage == 'json':
+            make_storage = lambda: JSONStorage(os.path.join(tmp, 'series_data.json'))
+        else:
+            make_storage = lambda: JournalStorage(os.path.join(tmp, 'series_data.journal'))
+        
+        # The manager reports every change; keep the output readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            manager = SeriesManager(storage=make_storage(), write_behind=args.write_behind,
+                                    flush_delay=0.05)
+            deadline = time.monotonic() + args.seconds
+            counts = {'reads': 0, 'writes': 0}
+            errors = []
+            threads = [
+                threading.Thread(target=run, name=f"writer-{i}",
+                                 args=(writer, errors, manager, i, deadline, counts))
+                for i in range(args.writers)
+            ] + [
+                threading.Thread(target=run, name=f"reader-{i}",
+                                 args=(reader, errors, manager, 1000 + i, deadline, counts))
+                for i in range(args.readers)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            
+            manager.close()
+            try:
+                check_collection(manager)
+                # What was saved must match what is in memory
+                reloaded = SeriesManager(storage=make_storage())
+                reloaded.load_from_storage()
+                saved = {row(s) for s in reloaded.series_list}
+                held = {row(s) for s in manager.series_list}
+                if saved != held:
+                    raise AssertionError(f"storage differs from memory: {len(saved ^ held)} rows")
+            except AssertionError as e:
+                errors.append(f"final check: {e}")
+    
+    print(f"{args.writers} writers, {args.readers} readers, {args.seconds:.0f} s, "
+          f"{args.storage} storage{' (write-behind)' if args.write_behind else ''}")
+    print(f"   {counts['writes']} writes, {counts['reads']} reads, "
+          f"{len(manager.series_list)} series at the end")
+    if errors:
+        print(f"   FAILED: {len(errors)} errors")
+        for error in errors[:10]:
+            print(f"      {error}")
+        sys.exit(1)
+    print("   all invariants held")
+
+if __name__ == "__main__":
+    main()
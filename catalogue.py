@@ -0,0 +1,177 @@
+"""
+Series catalogues the AI recommender draws recommendations from
+"""
+
+import json
+import mmap
+import os
+import random
+
+class Catalogue:
+    """An in-memory catalogue of series grouped by genre"""
+    
+    def __init__(self, series_by_genre):
+        """
+        Initialize the catalogue
+        
+        Args:
+            series_by_genre (dict): Genre -> list of (name, episodes, description)
+        """
+        self._genres = {genre: list(series_list) for genre, series_list in series_by_genre.items()}
+        self._titles = {}
+        for series_list in self._genres.values():
+            for series in series_list:
+                self._titles.setdefault(series[0].casefold(), series)
+        self._all_series = [s for series_list in self._genres.values() for s in series_list]
+    
+    def __len__(self):
+        return len(self._all_series)
+    
+    def genres(self):
+        """Get all genres in catalogue order"""
+        return list(self._genres)
+    
+    def series_in_genre(self, genre):
+        """Get the (name, episodes, description) entries of a genre"""
+        return self._genres.get(genre, [])
+    
+    def lookup(self, name):
+        """Get the entry for a title, or None if it is not in the catalogue"""
+        return self._titles.get(name.casefold())
+    
+    def sample(self, count):
+        """Get random entries from the catalogue"""
+        return random.sample(self._all_series, min(count, len(self._all_series)))
+
+class FileCatalogue:
+    """
+    A catalogue read lazily from a file built with FileCatalogue.build
+    
+    The data file holds one compact JSON array per series, grouped by
+    genre, and is memory-mapped. A small side index ('<file>.idx') maps
+    each genre to its byte range, and a sorted title index
+    ('<file>.titles') is binary searched for lookups. Only the pages a
+    query touches are read, so opening a catalogue of millions of titles
+    costs about as much as opening a small one.
+    """
+    
+    def __init__(self, filename):
+        """
+        Open a catalogue file
+        
+        Args:
+            filename (str): Path of the catalogue data file
+        """
+        self.filename = filename
+        with open(filename + '.idx', 'r') as f:
+            index = json.load(f)
+        self._count = index['count']
+        self._ranges = {genre: (start, end) for genre, start, end in index['genres']}
+        self._data = self._map(filename)
+        self._titles = self._map(filename + '.titles')
+    
+    def __len__(self):
+        return self._count
+    
+    def genres(self):
+        """Get all genres in catalogue order"""
+        return list(self._ranges)
+    
+    def series_in_genre(self, genre):
+        """Yield the (name, episodes, description) entries of a genre"""
+        if genre not in self._ranges:
+            return
+        start, end = self._ranges[genre]
+        while start < end:
+            line_end = self._data.find(b'\n', start, end)
+            yield tuple(json.loads(self._data[start:line_end]))
+            start = line_end + 1
+    
+    def lookup(self, name):
+        """Get the entry for a title, or None if it is not in the catalogue"""
+        if self._titles is None:
+            return None
+        key = json.dumps(name.casefold()).encode('ascii') + b'\t'
+        
+        # Binary search over the byte range of the sorted title index
+        titles = self._titles
+        low, high = 0, len(titles)
+        while low < high:
+            mid = (low + high) // 2
+            line_start = titles.rfind(b'\n', 0, mid) + 1
+            if titles[line_start:line_start + len(key)] < key:
+                low = titles.find(b'\n', mid) + 1 or len(titles)
+            else:
+                high = line_start
+        
+        if titles[low:low + len(key)] != key:
+            return None
+        offset = int(titles[low + len(key):titles.find(b'\n', low)])
+        return tuple(json.loads(self._data[offset:self._data.find(b'\n', offset)]))
+    
+    def sample(self, count):
+        """
+        Get random entries from the catalogue
+        
+        Picks random byte offsets rather than random rows, so longer lines
+        are slightly more likely to be chosen; no row index is needed.
+        """
+        if not self._count:
+            return []
+        count = min(count, self._count)
+        picked = {}
+        while len(picked) < count:
+            line_start = self._data.rfind(b'\n', 0, random.randrange(len(self._data))) + 1
+            if line_start not in picked:
+                line_end = self._data.find(b'\n', line_start)
+                picked[line_start] = tuple(json.loads(self._data[line_start:line_end]))
+        return list(picked.values())
+    
+    def close(self):
+        """Unmap the catalogue files"""
+        for mapped in (self._data, self._titles):
+            if mapped is not None:
+                mapped.close()
+        self._data = self._titles = None
+    
+    @staticmethod
+    def _map(filename):
+        """Memory-map a file read-only, or return None if it is empty"""
+        if not os.path.getsize(filename):
+            return None
+        with open(filename, 'rb') as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    
+    @staticmethod
+    def build(filename, series_by_genre):
+        """
+        Write a catalogue file and its indexes
+        
+        Args:
+            filename (str): Path of the catalogue data file to write
+            series_by_genre (dict): Genre -> iterable of (name, episodes, description)
+        """
+        genres = []
+        titles = []
+        offset = 0
+        with open(filename, 'wb') as f:
+            for genre, series_list in series_by_genre.items():
+                start = offset
+                for series in series_list:
+                    line = json.dumps(list(series), separators=(',', ':')).encode('utf-8') + b'\n'
+                    f.write(line)
+                    titles.append((json.dumps(series[0].casefold()).encode('ascii'), offset))
+                    offset += len(line)
+                genres.append([genre, start, offset])
+        
+        # First entry wins for duplicate titles, as in Catalogue
+        titles.sort()
+        with open(filename + '.titles', 'wb') as f:
+            previous = None
+            for key, title_offset in titles:
+                if key != previous:
+                    f.write(key + b'\t' + str(title_offset).encode('ascii') + b'\n')
+                    previous = key
+        
+        with open(filename + '.idx', 'w') as f:
+            json.dump({'count': len(titles), 'genres': genres}, f)
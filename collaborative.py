@@ -0,0 +1,281 @@
+"""
+Collaborative-filtering recommendations built from many users' collections
+"""
+
+import heapq
+import math
+import threading
+from ai_recommender import AIRecommender
+
+class CoWatchModel:
+    """
+    A sparse user x title co-watch matrix and its item-item similarities
+    
+    Each user's row weights the titles in their collection by how far
+    through them they are, so finished series count most. Titles are
+    compared by the cosine similarity of their columns, which only needs
+    the pairwise dot products and each column's norm. Those are kept up
+    to date as rows change: changing one user's weight for one title
+    costs a pass over that user's row (plus dropping the cached
+    neighbours of the titles it touched), not over the whole matrix.
+    
+    Rows, dot products and norms are plain dicts keyed by the casefolded
+    title, which suits a matrix that is mostly empty and changes one
+    entry at a time.
+    """
+    
+    # Weight of a series that is only added; progress adds the rest up to 1
+    MIN_WEIGHT = 0.1
+    
+    def __init__(self, neighbours=20):
+        """
+        Initialize an empty model
+        
+        Args:
+            neighbours (int): Most similar titles kept per title
+        """
+        self.neighbours_per_title = neighbours
+        self._rows = {}        # User -> {title: weight}
+        self._dots = {}        # Title -> {other title: dot product of their columns}
+        self._norms = {}       # Title -> squared norm of its column
+        self._titles = {}      # Title -> (name, total episodes) as last seen
+        self._neighbours = {}  # Title -> cached [(other title, similarity)], best first
+        self._lock = threading.RLock()
+        # Bumped on every change, like SeriesManager.version
+        self.version = 0
+    
+    @classmethod
+    def from_collections(cls, collections, neighbours=20):
+        """
+        Build a model from many users' collections
+        
+        Args:
+            collections (iterable): (user, iterable of Series) pairs
+            neighbours (int): Most similar titles kept per title
+        """
+        model = cls(neighbours)
+        for user, series_list in collections:
+            model.update_user(user, series_list)
+        return model
+    
+    @classmethod
+    def from_store(cls, store, neighbours=20):
+        """Build a model from every user in a ProfileStore"""
+        return cls.from_collections(
+            ((user, store.manager(user).series_list) for user in store.users()), neighbours)
+    
+    @classmethod
+    def weight(cls, series):
+        """Get the weight of a series in its user's row"""
+        progress = min(series.get_progress(), 100) / 100
+        return cls.MIN_WEIGHT + (1 - cls.MIN_WEIGHT) * progress
+    
+    def __len__(self):
+        """Number of users in the model"""
+        return len(self._rows)
+    
+    def update_user(self, user, series_list):
+        """
+        Replace a user's row with their current collection
+        
+        Only titles whose weight changed are updated, so re-syncing a
+        collection after one change costs about as much as that change.
+        
+        Args:
+            user (str): The user
+            series_list (iterable): The user's Series objects
+        """
+        new_row = {}
+        titles = {}
+        for series in series_list:
+            key = series.name.casefold()
+            new_row[key] = self.weight(series)
+            titles[key] = (series.name, series.total_episodes)
+        
+        with self._lock:
+            self._titles.update(titles)
+            old_row = self._rows.get(user, {})
+            for key in [key for key in old_row if key not in new_row]:
+                self.set_weight(user, key, 0.0)
+            for key, weight in new_row.items():
+                if old_row.get(key) != weight:
+                    self.set_weight(user, key, weight)
+    
+    def remove_user(self, user):
+        """Remove a user's row"""
+        with self._lock:
+            for key in list(self._rows.get(user, ())):
+                self.set_weight(user, key, 0.0)
+    
+    def set_weight(self, user, key, weight):
+        """
+        Set one entry of the matrix
+        
+        Args:
+            user (str): The user
+            key (str): The casefolded title
+            weight (float): The new weight; 0 removes the title from the row
+        """
+        with self._lock:
+            row = self._rows.setdefault(user, {})
+            old = row.get(key, 0.0)
+            if weight == old:
+                if not row:
+                    del self._rows[user]
+                return
+            
+            # The dot product with every other title in the row moves by
+            # the change in weight times that title's weight
+            delta = weight - old
+            dots = self._dots.setdefault(key, {})
+            for other, other_weight in row.items():
+                if other == key:
+                    continue
+                # The pair's similarity moves, even if its dot product
+                # drops to zero and the pair goes below
+                self._neighbours.pop(other, None)
+                dot = dots.get(other, 0.0) + delta * other_weight
+                if abs(dot) < 1e-12:
+                    dots.pop(other, None)
+                    other_dots = self._dots.get(other)
+                    if other_dots is not None:
+                        other_dots.pop(key, None)
+                        if not other_dots:
+                            del self._dots[other]
+                else:
+                    dots[other] = dot
+                    self._dots.setdefault(other, {})[key] = dot
+            
+            norm = self._norms.get(key, 0.0) + weight * weight - old * old
+            if norm < 1e-12:
+                self._norms.pop(key, None)
+            else:
+                self._norms[key] = norm
+            
+            if weight:
+                row[key] = weight
+            else:
+                row.pop(key, None)
+                if not row:
+                    del self._rows[user]
+            
+            # The norm changed too, which moves every similarity involving
+            # this title, not just those with titles in the row
+            self._neighbours.pop(key, None)
+            for other in dots:
+                self._neighbours.pop(other, None)
+            if not dots:
+                del self._dots[key]
+            self.version += 1
+    
+    def neighbours(self, key):
+        """
+        Get the titles most similar to a title
+        
+        Args:
+            key (str): The casefolded title
+            
+        Returns:
+            list: (other title, cosine similarity) tuples, best first
+        """
+        with self._lock:
+            neighbours = self._neighbours.get(key)
+            if neighbours is None:
+                norm = self._norms.get(key)
+                dots = self._dots.get(key, {})
+                if not norm or not dots:
+                    neighbours = []
+                else:
+                    norms = self._norms
+                    neighbours = heapq.nlargest(
+                        self.neighbours_per_title,
+                        ((other, dot / math.sqrt(norm * norms[other])) for other, dot in dots.items()),
+                        key=lambda item: (item[1], item[0])
+                    )
+                self._neighbours[key] = neighbours
+            return neighbours
+    
+    def recommend(self, weights, count=3):
+        """
+        Score titles by their similarity to a weighted set of titles
+        
+        Args:
+            weights (dict): Casefolded title -> weight, for the titles a
+                user already has; these are never recommended
+            count (int): Number of titles to return
+            
+        Returns:
+            list: (name, total episodes, score) tuples, best first
+        """
+        scores = {}
+        with self._lock:
+            for key, weight in weights.items():
+                for other, similarity in self.neighbours(key):
+                    if other not in weights:
+                        scores[other] = scores.get(other, 0.0) + weight * similarity
+            best = heapq.nlargest(count, scores.items(), key=lambda item: (item[1], item[0]))
+            return [self._titles[key] + (score,) for key, score in best]
+
+class CollaborativeRecommender(AIRecommender):
+    """
+    Recommends what viewers with similar collections watch
+    
+    Falls back to AIRecommender's genre-based picks for users the model
+    cannot place yet (an empty collection, or only titles nobody else
+    has), and to fill up short lists.
+    """
+    
+    def __init__(self, manager, model, user=None, catalogue=None, cache_size=32):
+        """
+        Initialize the recommender
+        
+        Args:
+            manager (SeriesManager): The user's series manager
+            model (CoWatchModel): The shared co-watch model
+            user (str): The user's name in the model; when given, the
+                user's row is kept in step with the manager
+            catalogue (Catalogue or FileCatalogue): Used for descriptions
+                and for the genre-based fallback
+            cache_size (int): Number of fallback results to memoize
+        """
+        super().__init__(manager, catalogue, cache_size)
+        self.model = model
+        self.user = user
+        self._weights = {}
+        self._weights_version = None
+    
+    def get_recommendations(self, count=3):
+        """
+        Get collaborative recommendations, topped up from genre logic
+        
+        Args:
+            count (int): Number of recommendations to return
+            
+        Returns:
+            list: List of recommended (series_name, episodes, description) tuples
+        """
+        recommendations = []
+        for name, episodes, score in self.model.recommend(self._sync(), count):
+            entry = self.catalogue.lookup(name)
+            recommendations.append(entry or (name, episodes, "Popular with viewers who watch what you watch"))
+        
+        if len(recommendations) < count:
+            # Cold start: genre affinities need nothing but the user's own list
+            seen = {name.casefold() for name, _, _ in recommendations}
+            for entry in super().get_recommendations(count + len(recommendations)):
+                if entry[0].casefold() not in seen:
+                    recommendations.append(entry)
+                    if len(recommendations) == count:
+                        break
+        return recommendations
+    
+    def _sync(self):
+        """Get the user's title weights, updating the model if they changed"""
+        version = self.manager.version
+        if version != self._weights_version:
+            series_list = self.manager.series_list
+            self._weights = {s.name.casefold(): self.model.weight(s) for s in series_list}
+            if self.user is not None:
+                self.model.update_user(self.user, series_list)
+            self._weights_version = version
+        return self._weights
@@ -0,0 +1,201 @@
+"""
+Columnar storage for large series collections
+"""
+
+from array import array
+from series import Series
+
+class SeriesView(Series):
+    """A Series-like view onto one row of a ColumnarSeriesStore"""
+    
+    __slots__ = ('_store', '_key')
+    
+    def __init__(self, store, key):
+        """
+        Initialize a view
+        
+        Args:
+            store (ColumnarSeriesStore): The store holding the series
+            key (str): The casefolded name of the series
+        """
+        self._store = store
+        self._key = key
+    
+    @property
+    def _row(self):
+        return self._store._rows[self._key]
+    
+    def detach(self):
+        """Get a plain Series copy of the row that outlives it, sharing its history"""
+        series = Series(self.name, self.total_episodes, self.genre)
+        series.episodes_watched = self.episodes_watched
+        series.history = self.history
+        return series
+    
+    @property
+    def name(self):
+        return self._store._names[self._row]
+    
+    @property
+    def total_episodes(self):
+        return self._store._total[self._row]
+    
+    @total_episodes.setter
+    def total_episodes(self, value):
+        self._store._total[self._row] = value
+    
+    @property
+    def genre(self):
+        store = self._store
+        return store._genre_table[store._genre_ids[self._row]]
+    
+    @genre.setter
+    def genre(self, value):
+        store = self._store
+        store._genre_ids[self._row] = store._genre_id(value)
+    
+    @property
+    def episodes_watched(self):
+        return self._store._watched[self._row]
+    
+    @episodes_watched.setter
+    def episodes_watched(self, value):
+        self._store._watched[self._row] = value
+    
+    @property
+    def history(self):
+        return self._store._history.get(self._row)
+    
+    @history.setter
+    def history(self, value):
+        if value is None:
+            self._store._history.pop(self._row, None)
+        else:
+            self._store._history[self._row] = value
+
+class _SeriesValues:
+    """Iterable over the series in a store, like dict.values()"""
+    
+    __slots__ = ('_store',)
+    
+    def __init__(self, store):
+        self._store = store
+    
+    def __len__(self):
+        return len(self._store)
+    
+    def __iter__(self):
+        store = self._store
+        return (SeriesView(store, key) for key in store._rows)
+
+class ColumnarSeriesStore:
+    """
+    Keep series in parallel columns instead of one object per series
+    
+    Episode counts live in array('i') columns and genres are stored once
+    in a shared table, so each series costs a name, a few machine ints
+    and an index entry. The store is a drop-in replacement for the
+    name -> Series dict SeriesManager keeps, handing out SeriesView
+    objects in place of Series.
+    """
+    
+    def __init__(self):
+        """Initialize an empty store"""
+        self._rows = {}              # Casefolded name -> row number
+        self._names = []             # Row -> name, None for deleted rows
+        self._total = array('i')
+        self._watched = array('i')
+        self._genre_ids = array('i')
+        self._history = {}           # Row -> WatchHistory, for series that have one
+        self._genre_table = []       # Genre id -> genre
+        self._genre_lookup = {}      # Genre -> genre id
+        self._deleted = 0
+    
+    def __len__(self):
+        return len(self._rows)
+    
+    def __contains__(self, key):
+        return key in self._rows
+    
+    def __iter__(self):
+        return iter(self._rows)
+    
+    def __getitem__(self, key):
+        if key not in self._rows:
+            raise KeyError(key)
+        return SeriesView(self, key)
+    
+    def __setitem__(self, key, series):
+        row = self._rows.get(key)
+        if row is None:
+            self._rows[key] = len(self._names)
+            self._names.append(series.name)
+            self._total.append(series.total_episodes)
+            self._watched.append(series.episodes_watched)
+            self._genre_ids.append(self._genre_id(series.genre))
+            row = len(self._names) - 1
+        else:
+            self._names[row] = series.name
+            self._total[row] = series.total_episodes
+            self._watched[row] = series.episodes_watched
+            self._genre_ids[row] = self._genre_id(series.genre)
+        if series.history is not None:
+            self._history[row] = series.history
+        else:
+            self._history.pop(row, None)
+    
+    def get(self, key, default=None):
+        """Get a view of the series stored under key"""
+        if key not in self._rows:
+            return default
+        return SeriesView(self, key)
+    
+    def pop(self, key, default=None):
+        """
+        Remove a series from the store
+        
+        Returns:
+            Series: A detached copy of the removed series, or default
+        """
+        row = self._rows.pop(key, None)
+        if row is None:
+            return default
+        
+        series = Series(self._names[row], self._total[row],
+                        self._genre_table[self._genre_ids[row]])
+        series.episodes_watched = self._watched[row]
+        series.history = self._history.pop(row, None)
+        
+        self._names[row] = None
+        self._deleted += 1
+        if self._deleted > len(self._rows):
+            self._compact()
+        return series
+    
+    def values(self):
+        """Get a reusable view of all series in insertion order"""
+        return _SeriesValues(self)
+    
+    def clear(self):
+        """Remove all series from the store"""
+        self.__init__()
+    
+    def _genre_id(self, genre):
+        """Get the id of a genre, adding it to the genre table if needed"""
+        genre_id = self._genre_lookup.get(genre)
+        if genre_id is None:
+            genre_id = len(self._genre_table)
+            self._genre_table.append(genre)
+            self._genre_lookup[genre] = genre_id
+        return genre_id
+    
+    def _compact(self):
+        """Drop deleted rows once they outnumber the live ones"""
+        live = list(self._rows.values())
+        self._history = {new: self._history[row] for new, row in enumerate(live) if row in self._history}
+        self._names = [self._names[row] for row in live]
+        self._total = array('i', (self._total[row] for row in live))
+        self._watched = array('i', (self._watched[row] for row in live))
+        self._genre_ids = array('i', (self._genre_ids[row] for row in live))
+        self._rows = {key: row for row, key in enumerate(self._rows)}
+        self._deleted = 0
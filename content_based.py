@@ -0,0 +1,334 @@
+"""
+Content-based recommendations from catalogue descriptions and genres
+"""
+
+import bisect
+import heapq
+import json
+import marshal
+import math
+import os
+import re
+import threading
+import zlib
+from array import array
+from ai_recommender import AIRecommender
+from collaborative import CoWatchModel
+
+_WORD = re.compile(r"[^\W_]+")
+
+# Words too common in descriptions to say anything about a series
+STOP_WORDS = frozenset("""
+    a about after all an and as at be by for from in into is it its of on or
+    over that the their this through to who with
+""".split())
+
+def tokenize(text):
+    """Split text into lowercase words, dropping stop words and single letters"""
+    return [word for word in _WORD.findall(text.casefold())
+            if len(word) > 1 and word not in STOP_WORDS]
+
+class TfidfIndex:
+    """
+    TF-IDF vectors of every catalogue entry, stored as an inverted index
+    
+    Each entry's name and description are turned into a unit-length
+    TF-IDF vector. The vectors are kept column by column: for every term,
+    an array('i') of the entries containing it and an array('f') of its
+    weight in each. Scoring a profile against the whole catalogue is then
+    a sparse matrix-vector product that only visits the postings of the
+    profile's terms.
+    
+    Terms found in more than max_df of the entries are dropped, as they
+    separate nothing and have the longest postings. Genres are scored
+    separately (see recommend), so they need no column of their own.
+    """
+    
+    # Bump when the cache layout changes so old caches are ignored
+    CACHE_VERSION = 1
+    
+    # Weight of genre affinity next to description similarity
+    GENRE_WEIGHT = 0.3
+    
+    def __init__(self, entries, genres, idf, postings):
+        """
+        Initialize an index from its parts (see build and open)
+        
+        Args:
+            entries (list): Entry number -> (name, episodes, description)
+            genres (list): (genre, first entry, end entry) in entry order
+            idf (dict): Term -> inverse document frequency
+            postings (dict): Term -> (array('i') entries, array('f') weights)
+        """
+        self.entries = entries
+        self.genres = genres
+        self.idf = idf
+        self.postings = postings
+        self._starts = [start for _, start, _ in genres]
+        self._titles = {}
+        for number, entry in enumerate(entries):
+            self._titles.setdefault(entry[0].casefold(), number)
+    
+    def __len__(self):
+        return len(self.entries)
+    
+    @classmethod
+    def open(cls, catalogue, cache_file=None, max_df=0.01):
+        """
+        Get the index of a catalogue, from a disk cache when it is current
+        
+        Args:
+            catalogue (Catalogue or FileCatalogue): The catalogue to index
+            cache_file (str): Where to keep the built index; None builds
+                it in memory every time
+            max_df (float): Largest fraction of entries a term may appear in
+        """
+        key = cls._cache_key(catalogue, max_df)
+        if cache_file:
+            try:
+                with open(cache_file, 'rb') as f:
+                    cached_key, parts = marshal.loads(f.read())
+                if cached_key == key:
+                    return cls._from_parts(parts)
+            except (OSError, EOFError, ValueError, TypeError):
+                pass
+        
+        index = cls.build(catalogue, max_df)
+        if cache_file:
+            try:
+                temp_filename = cache_file + '.tmp'
+                with open(temp_filename, 'wb') as f:
+                    f.write(marshal.dumps((key, index._parts())))
+                os.replace(temp_filename, cache_file)
+            except (OSError, ValueError):
+                # The cache is only an optimization
+                pass
+        return index
+    
+    @classmethod
+    def build(cls, catalogue, max_df=0.01):
+        """
+        Build the index of a catalogue
+        
+        Args:
+            catalogue (Catalogue or FileCatalogue): The catalogue to index
+            max_df (float): Largest fraction of entries a term may appear in
+        """
+        entries, genres, counts = [], [], []
+        frequency = {}
+        for genre in catalogue.genres():
+            start = len(entries)
+            for entry in catalogue.series_in_genre(genre):
+                entries.append(tuple(entry))
+                terms = {}
+                for word in tokenize(f"{entry[0]} {entry[2]}"):
+                    terms[word] = terms.get(word, 0) + 1
+                for word in terms:
+                    frequency[word] = frequency.get(word, 0) + 1
+                counts.append(terms)
+            genres.append((genre, start, len(entries)))
+        
+        # Small catalogues keep every term; the cut is for large ones
+        limit = max(max_df * len(entries), 100)
+        total = len(entries)
+        idf = {word: math.log((1 + total) / (1 + df)) + 1
+               for word, df in frequency.items() if df <= limit}
+        
+        postings = {word: (array('i'), array('f')) for word in idf}
+        for number, terms in enumerate(counts):
+            vector = cls._normalize({word: tf * idf[word] for word, tf in terms.items() if word in idf})
+            for word, weight in vector.items():
+                docs, weights = postings[word]
+                docs.append(number)
+                weights.append(weight)
+        return cls(entries, genres, idf, postings)
+    
+    def vector(self, text):
+        """Get the unit-length TF-IDF vector of a text, over known terms only"""
+        idf = self.idf
+        terms = {}
+        for word in tokenize(text):
+            if word in idf:
+                terms[word] = terms.get(word, 0) + idf[word]
+        return self._normalize(terms)
+    
+    def profile(self, weighted_series, max_terms=24):
+        """
+        Build a taste profile from a collection
+        
+        Args:
+            weighted_series (iterable): (Series, weight) pairs
+            max_terms (int): Strongest terms kept, which bounds the cost
+                of scoring
+                
+        Returns:
+            tuple: (term weights, genre weights, owned casefolded titles)
+        """
+        terms, genres, owned = {}, {}, set()
+        for series, weight in weighted_series:
+            key = series.name.casefold()
+            owned.add(key)
+            number = self._titles.get(key)
+            if number is not None:
+                name, _, description = self.entries[number]
+                text = f"{name} {description}"
+                genre = self.genre_of(number)
+            else:
+                # Not in the catalogue: the name is all there is to go on,
+                # and an unknown genre says nothing at all
+                text = series.name
+                genre = series.genre if series.genre != 'Unknown' else None
+            for word, value in self.vector(text).items():
+                terms[word] = terms.get(word, 0.0) + weight * value
+            if genre is not None:
+                genres[genre] = genres.get(genre, 0.0) + weight
+        if len(terms) > max_terms:
+            terms = dict(heapq.nlargest(max_terms, terms.items(), key=lambda item: item[1]))
+        return terms, genres, owned
+    
+    def recommend(self, profile, count=3):
+        """
+        Score the catalogue against a profile and return the best entries
+        
+        The score is the cosine similarity of an entry's vector to the
+        profile's terms, plus GENRE_WEIGHT times the share of the
+        profile's weight in the entry's genre. Entries sharing no term
+        with the profile can still win on genre alone, and those tie
+        within a genre, so only the first few of each genre need scoring
+        besides the entries the postings reach.
+        
+        Args:
+            profile (tuple): As returned by profile
+            count (int): Number of entries to return
+            
+        Returns:
+            list: ((name, episodes, description), score) tuples, best first
+        """
+        terms, genres, owned = profile
+        scores = {}
+        for word, query_weight in terms.items():
+            docs, weights = self.postings[word]
+            for number, weight in zip(docs, weights):
+                scores[number] = scores.get(number, 0.0) + query_weight * weight
+        
+        norm = math.sqrt(sum(weight * weight for weight in terms.values())) or 1.0
+        genre_total = sum(genres.values()) or 1.0
+        genre_scores = {genre: self.GENRE_WEIGHT * weight / genre_total for genre, weight in genres.items()}
+        
+        for genre, start, end in self.genres:
+            if genre in genre_scores:
+                for number in range(start, min(end, start + count + len(owned))):
+                    scores.setdefault(number, 0.0)
+        
+        entries = self.entries
+        candidates = (
+            (score / norm + genre_scores.get(self.genre_of(number), 0.0), -number)
+            for number, score in scores.items()
+            if entries[number][0].casefold() not in owned
+        )
+        return [(entries[-negative], score)
+                for score, negative in heapq.nlargest(count, candidates)]
+    
+    def genre_of(self, number):
+        """Get the genre of an entry"""
+        return self.genres[bisect.bisect_right(self._starts, number) - 1][0]
+    
+    @staticmethod
+    def _normalize(vector):
+        """Scale a sparse vector to unit length"""
+        norm = math.sqrt(sum(value * value for value in vector.values()))
+        return {key: value / norm for key, value in vector.items()} if norm else {}
+    
+    @classmethod
+    def _cache_key(cls, catalogue, max_df):
+        """Identify a catalogue's contents without indexing it"""
+        filename = getattr(catalogue, 'filename', None)
+        if filename:
+            # A FileCatalogue is rebuilt, not edited, so its stat will do
+            stat = os.stat(filename)
+            source = (os.path.abspath(filename), stat.st_mtime_ns, stat.st_size)
+        else:
+            checksum = 0
+            for genre in catalogue.genres():
+                entries = [genre, list(catalogue.series_in_genre(genre))]
+                checksum = zlib.crc32(json.dumps(entries).encode('utf-8'), checksum)
+            source = (checksum,)
+        return (cls.CACHE_VERSION, marshal.version, max_df) + source
+    
+    def _parts(self):
+        """Get the index as plain values marshal can write"""
+        postings = {word: (docs.tobytes(), weights.tobytes())
+                    for word, (docs, weights) in self.postings.items()}
+        return self.entries, self.genres, self.idf, postings
+    
+    @classmethod
+    def _from_parts(cls, parts):
+        """Rebuild an index from _parts"""
+        entries, genres, idf, raw = parts
+        postings = {}
+        for word, (docs, weights) in raw.items():
+            postings[word] = (array('i'), array('f'))
+            postings[word][0].frombytes(docs)
+            postings[word][1].frombytes(weights)
+        return cls(entries, genres, idf, postings)
+
+class ContentRecommender(AIRecommender):
+    """
+    Recommends catalogue entries whose descriptions resemble what you watch
+    
+    The profile weights each series by how far through it the user is
+    (as the co-watch model does), so finished series count most. Falls
+    back to AIRecommender's genre-based picks to fill up short lists.
+    """
+    
+    def __init__(self, manager, index=None, catalogue=None, cache_size=32):
+        """
+        Initialize the recommender
+        
+        Args:
+            manager (SeriesManager): The user's series manager
+            index (TfidfIndex): The index of the catalogue; built here if
+                None, so pass one in to share it between users
+            catalogue (Catalogue or FileCatalogue): The catalogue, also
+                used for the genre-based fallback
+            cache_size (int): Number of fallback results to memoize
+        """
+        super().__init__(manager, catalogue, cache_size)
+        self.index = index if index is not None else TfidfIndex.build(self.catalogue)
+        self._profile = None
+        self._profile_version = None
+        self._profile_lock = threading.Lock()
+    
+    def get_recommendations(self, count=3):
+        """
+        Get content-based recommendations, topped up from genre logic
+        
+        Args:
+            count (int): Number of recommendations to return
+            
+        Returns:
+            list: List of recommended (series_name, episodes, description) tuples
+        """
+        recommendations = []
+        profile = self._sync()
+        if profile[0] or profile[1]:
+            recommendations = [entry for entry, _ in self.index.recommend(profile, count)]
+        
+        if len(recommendations) < count:
+            seen = {name.casefold() for name, _, _ in recommendations}
+            for entry in super().get_recommendations(count + len(recommendations)):
+                if entry[0].casefold() not in seen:
+                    recommendations.append(entry)
+                    if len(recommendations) == count:
+                        break
+        return recommendations
+    
+    def _sync(self):
+        """Get the user's profile, rebuilding it if the collection changed"""
+        with self._profile_lock:
+            version = self.manager.version
+            if version != self._profile_version:
+                series_list = self.manager.series_list
+                self._profile = self.index.profile((s, CoWatchModel.weight(s)) for s in series_list)
+                self._profile_version = version
+            return self._profile
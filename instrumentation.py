@@ -0,0 +1,297 @@
+"""
+Opt-in instrumentation for the storage backends, manager and recommenders
+
+Nothing here runs until enable() is called. It replaces the public
+methods listed in TARGETS with timing wrappers that record every call's
+duration, and for storage the bytes read or written, in in-memory
+histograms. disable() puts the original methods back, so there is no
+per-call flag check when instrumentation is off.
+
+capture() profiles one block of code with cProfile or tracemalloc.
+"""
+
+import contextlib
+import functools
+import importlib
+import os
+import sys
+import threading
+import time
+import types
+
+# What to instrument: (module, class, {method: how bytes are counted}).
+# 'read' counts the data file's size, 'write' its size after the call and
+# 'append' how much it grew; None records timings only.
+TARGETS = [
+    ('json_storage', 'JSONStorage', {
+        'save_series': 'write', 'load_series': 'read', 'iter_series': 'read',
+    }),
+    ('journal_storage', 'JournalStorage', {
+        'save_series': 'write', 'append_change': 'append', 'append_changes': 'append',
+        'load_series': 'read', 'compact': 'write',
+    }),
+    ('sqlite_storage', 'SQLiteStorage', {
+        'save_series': 'append', 'append_change': 'append', 'append_changes': 'append',
+        'load_series': 'read', 'iter_series': 'read', 'find_series': None,
+        'search_series': None, 'top_series': None, 'watch_rollup': None, 'get_statistics': None,
+    }),
+    ('series_manager', 'SeriesManager', dict.fromkeys([
+        'add_series', 'bulk_add', 'find_series', 'list_series', 'view_all_series', 'update_episodes',
+        'delete_series', 'search_series', 'match_series', 'top_series', 'get_pace', 'get_statistics',
+        'import_file', 'export_file', 'replace_series', 'flush', 'load_from_storage',
+    ])),
+    ('ai_recommender', 'AIRecommender', {
+        'get_recommendations': None, 'display_recommendations': None,
+    }),
+    ('collaborative', 'CollaborativeRecommender', {
+        'get_recommendations': None,
+    }),
+    ('content_based', 'ContentRecommender', {
+        'get_recommendations': None,
+    }),
+    ('content_based', 'TfidfIndex', {
+        'profile': None, 'recommend': None,
+    }),
+    ('sync', 'Replica', {
+        'refresh': None, 'entries': None, 'fetch': None, 'apply': None, 'save': None,
+    }),
+]
+
+class Metric:
+    """Call count, total time, bytes and a latency histogram for one method"""
+    
+    # Bucket i holds durations of 2**(i-1) up to 2**i nanoseconds
+    BUCKETS = 48
+    
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.errors = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.bytes = 0
+        self.buckets = [0] * self.BUCKETS
+        self._lock = threading.Lock()
+    
+    def record(self, elapsed_ns, nbytes=0, failed=False):
+        """Record one call"""
+        bucket = min(elapsed_ns.bit_length(), self.BUCKETS - 1)
+        with self._lock:
+            self.calls += 1
+            self.errors += failed
+            self.total_ns += elapsed_ns
+            self.bytes += nbytes
+            if elapsed_ns > self.max_ns:
+                self.max_ns = elapsed_ns
+            self.buckets[bucket] += 1
+    
+    def percentile(self, fraction):
+        """
+        Estimate a latency percentile from the histogram
+        
+        Returns:
+            int: Upper bound in nanoseconds of the bucket holding it
+        """
+        with self._lock:
+            target = fraction * self.calls
+            seen = 0
+            for bucket, count in enumerate(self.buckets):
+                seen += count
+                if count and seen >= target:
+                    return min(1 << bucket, self.max_ns)
+            return 0
+    
+    def as_dict(self):
+        """Get the numbers as a JSON-serializable dict"""
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'total_ms': self.total_ns / 1e6,
+            'mean_us': self.total_ns / self.calls / 1e3 if self.calls else 0.0,
+            'p50_us': self.percentile(0.50) / 1e3,
+            'p90_us': self.percentile(0.90) / 1e3,
+            'p99_us': self.percentile(0.99) / 1e3,
+            'max_us': self.max_ns / 1e3,
+            'bytes': self.bytes,
+            'histogram': {f"<{1 << bucket}ns": count
+                          for bucket, count in enumerate(self.buckets) if count},
+        }
+
+_metrics = {}       # "Class.method" -> Metric
+_patched = []       # (class, method name, original) to restore on disable()
+_lock = threading.RLock()
+
+def metric(name):
+    """Get the Metric with a name, creating it if needed"""
+    with _lock:
+        found = _metrics.get(name)
+        if found is None:
+            found = _metrics[name] = Metric(name)
+        return found
+
+def enabled():
+    """Check whether instrumentation is on"""
+    return bool(_patched)
+
+def enable(targets=TARGETS):
+    """
+    Start recording calls to the target methods
+    
+    Imports the target modules, so call it before the hot path rather
+    than in it. Calling it again while enabled does nothing.
+    """
+    with _lock:
+        if _patched:
+            return
+        for module_name, class_name, methods in targets:
+            cls = getattr(importlib.import_module(module_name), class_name)
+            for name, counting in methods.items():
+                # Only methods the class defines itself, so an override
+                # calling super() is not wrapped twice under one name
+                original = cls.__dict__.get(name)
+                if original is None:
+                    continue
+                _patched.append((cls, name, original))
+                setattr(cls, name, _wrap(f"{class_name}.{name}", original, counting))
+
+def disable():
+    """Stop recording and restore the original methods; recorded numbers are kept"""
+    with _lock:
+        while _patched:
+            cls, name, original = _patched.pop()
+            setattr(cls, name, original)
+
+def reset():
+    """Forget everything recorded so far"""
+    with _lock:
+        _metrics.clear()
+
+def stats():
+    """
+    Get the recorded numbers
+    
+    Returns:
+        dict: "Class.method" -> Metric.as_dict(), for methods that were called
+    """
+    with _lock:
+        metrics = sorted(_metrics.items())
+    return {name: m.as_dict() for name, m in metrics if m.calls}
+
+def report(file=None):
+    """Print the recorded numbers as a table, slowest total first"""
+    file = file or sys.stdout
+    rows = sorted(stats().items(), key=lambda item: -item[1]['total_ms'])
+    if not rows:
+        print("No calls recorded.", file=file)
+        return
+    print(f"{'operation':<38} {'calls':>7} {'total ms':>10} {'p50 us':>9} {'p99 us':>9} "
+          f"{'max us':>10} {'bytes':>11}", file=file)
+    for name, s in rows:
+        print(f"{name:<38} {s['calls']:>7} {s['total_ms']:>10.2f} {s['p50_us']:>9.1f} "
+              f"{s['p99_us']:>9.1f} {s['max_us']:>10.1f} {s['bytes']:>11,}", file=file)
+
+def _file_size(storage):
+    """Size of a storage backend's data file, 0 if it has none"""
+    try:
+        return os.path.getsize(storage.filename)
+    except (AttributeError, OSError):
+        return 0
+
+def _bytes(storage, counting, before):
+    """Bytes a call read or wrote, by its counting rule"""
+    if counting is None:
+        return 0
+    size = _file_size(storage)
+    return max(size - before, 0) if counting == 'append' else size
+
+def _wrap(name, func, counting):
+    """Wrap a method so each call is recorded under name"""
+    recorded = metric(name)
+    clock = time.perf_counter_ns
+    
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        before = _file_size(self) if counting == 'append' else 0
+        start = clock()
+        try:
+            result = func(self, *args, **kwargs)
+        except BaseException:
+            recorded.record(clock() - start, failed=True)
+            raise
+        elapsed = clock() - start
+        if isinstance(result, types.GeneratorType):
+            # Loading is done as the caller iterates; time that instead
+            return _timed(recorded, result, elapsed, self, counting, before)
+        recorded.record(elapsed, _bytes(self, counting, before))
+        return result
+    return wrapper
+
+def _timed(recorded, generator, elapsed, storage, counting, before):
+    """Pass a generator through, recording the time spent inside it"""
+    clock = time.perf_counter_ns
+    failed = False
+    try:
+        while True:
+            start = clock()
+            try:
+                item = next(generator)
+            except StopIteration:
+                return
+            except BaseException:
+                failed = True
+                raise
+            finally:
+                elapsed += clock() - start
+            yield item
+    finally:
+        generator.close()
+        recorded.record(elapsed, _bytes(storage, counting, before), failed)
+
+@contextlib.contextmanager
+def capture(mode, output=None, limit=25, file=None):
+    """
+    Profile the code run inside the with block
+    
+    Args:
+        mode (str): 'cprofile' for a call profile or 'tracemalloc' for
+            the allocation sites and peak memory
+        output (str): Save the raw profile or snapshot to this file
+            (readable with pstats or tracemalloc.Snapshot.load) instead
+            of printing a summary
+        limit (int): Number of lines in the printed summary
+        file: Where to print the summary (default: stderr)
+    """
+    file = file or sys.stderr
+    if mode == 'cprofile':
+        import cProfile
+        import pstats
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            if output:
+                profiler.dump_stats(output)
+                print(f"Profile saved to '{output}'", file=file)
+            else:
+                pstats.Stats(profiler, stream=file).sort_stats('cumulative').print_stats(limit)
+    elif mode == 'tracemalloc':
+        import tracemalloc
+        tracemalloc.start()
+        try:
+            yield
+        finally:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"Memory: {current / 2**20:.1f} MiB allocated at the end, "
+                  f"{peak / 2**20:.1f} MiB peak", file=file)
+            if output:
+                snapshot.dump(output)
+                print(f"Snapshot saved to '{output}'", file=file)
+            else:
+                for line in snapshot.statistics('lineno')[:limit]:
+                    print(f"   {line}", file=file)
+    else:
+        raise ValueError(f"unknown capture mode: {mode!r}")
@@ -0,0 +1,249 @@
+"""
+Journal storage backend - appends one record per change instead of rewriting the file
+"""
+
+import json
+import os
+from series import Series
+from watch_history import WatchHistory
+
+class JournalStorage:
+    """Handle saving and loading series data as an append-only journal"""
+    
+    def __init__(self, filename="series_data.journal", compact_threshold=1000):
+        """
+        Initialize JournalStorage
+        
+        Args:
+            filename (str): Name of the journal file to store data
+            compact_threshold (int): Minimum number of journal records before
+                the journal is compacted back to one record per series
+        """
+        self.filename = filename
+        self.compact_threshold = compact_threshold
+        self._records = None  # Records in the journal file, counted lazily
+        self._live = 0        # Series in the collection after replay
+        self._torn = False    # Last replay found a partially written record
+    
+    def save_series(self, series_list):
+        """
+        Save all series, replacing the journal with one record per series
+        
+        Args:
+            series_list (list): List of Series objects to save
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            written = {}
+            records = [self._series_record('add', series, written) for series in series_list]
+            self._rewrite(records)
+            self._mark_written(written)
+            print(f" Data saved to '{self.filename}'")
+            return True
+        
+        except Exception as e:
+            print(f" Error saving data: {e}")
+            return False
+    
+    def append_change(self, op, series):
+        """
+        Append a single change to the journal
+        
+        Args:
+            op (str): 'add', 'update' or 'delete'
+            series (Series): The series that changed
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        return self.append_changes([(op, series)])
+    
+    def append_changes(self, changes):
+        """
+        Append several changes to the journal in one write
+        
+        Args:
+            changes (list): (op, series) pairs in the order they happened
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            if self._records is None or self._torn:
+                self.compact()
+            
+            written = {}
+            records = [self._series_record(op, series, written) for op, series in changes]
+            with open(self.filename, 'a') as f:
+                f.write(''.join(self._encode(record) for record in records))
+            self._mark_written(written)
+            
+            for op, _ in changes:
+                self._records += 1
+                if op == 'add':
+                    self._live += 1
+                elif op == 'delete':
+                    self._live -= 1
+            
+            # Compact once dead records outnumber live ones, so the journal
+            # stays within a constant factor of the collection size
+            if self._records > max(self.compact_threshold, 2 * self._live):
+                self.compact()
+            return True
+        
+        except Exception as e:
+            print(f" Error saving data: {e}")
+            return False
+    
+    def load_series(self):
+        """
+        Load all series by replaying the journal
+        
+        Returns:
+            list: List of Series objects, empty list if file doesn't exist
+        """
+        if not os.path.exists(self.filename):
+            print(f" No saved data found. Starting fresh!")
+            self._records = self._live = 0
+            return []
+        
+        try:
+            series_list = []
+            for item in self._replay():
+                series = Series(
+                    name=item['name'],
+                    total_episodes=item['total_episodes'],
+                    genre=item.get('genre', 'Unknown')
+                )
+                series.episodes_watched = item.get('episodes_watched', 0)
+                if item.get('history'):
+                    series.history = WatchHistory(item['history'])
+                    series.history.saved = len(series.history)
+                series_list.append(series)
+            
+            print(f" Loaded {len(series_list)} series from '{self.filename}'")
+            return series_list
+        
+        except Exception as e:
+            print(f" Error loading data: {e}")
+            return []
+    
+    def compact(self):
+        """Rewrite the journal with one record per live series"""
+        if not os.path.exists(self.filename):
+            self._records = self._live = 0
+            self._torn = False
+            return
+        
+        records = self._replay()
+        for record in records:
+            record['op'] = 'add'
+        self._rewrite(records)
+    
+    def file_exists(self):
+        """Check if the journal file exists"""
+        return os.path.exists(self.filename)
+    
+    def _replay(self):
+        """
+        Replay the journal into the current collection state
+        
+        Returns:
+            list: Record dicts for the live series, in insertion order
+        """
+        state = {}
+        count = 0
+        self._torn = False
+        
+        with open(self.filename, 'r') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash mid-append leaves a partial last line behind
+                    self._torn = True
+                    continue
+                
+                count += 1
+                key = record['name'].casefold()
+                op = record.get('op', 'add')
+                if op == 'add':
+                    state.setdefault(key, record)
+                elif op == 'update':
+                    if key in state:
+                        state[key]['episodes_watched'] = record['episodes_watched']
+                        if record.get('events'):
+                            state[key].setdefault('history', []).extend(record['events'])
+                elif op == 'delete':
+                    state.pop(key, None)
+        
+        self._records = count
+        self._live = len(state)
+        return list(state.values())
+    
+    def _rewrite(self, records):
+        """Atomically replace the journal with the given records"""
+        temp_filename = self.filename + '.tmp'
+        with open(temp_filename, 'w') as f:
+            for record in records:
+                f.write(self._encode(record))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_filename, self.filename)
+        
+        self._records = self._live = len(records)
+        self._torn = False
+    
+    @staticmethod
+    def _series_record(op, series, written):
+        """
+        Build the journal record for a change to a series
+        
+        An add carries the whole watch history and an update the events
+        recorded since the series was last written, so the history is
+        never journaled twice, even when one write holds several changes
+        to the same series. The history is not marked as written here, as
+        the write may still fail (see _mark_written).
+        
+        Args:
+            op (str): 'add', 'update' or 'delete'
+            series (Series): The series that changed
+            written (dict): id(history) -> (history, events covered by the
+                records built so far for this write); updated here
+        """
+        history = series.history
+        if op == 'add':
+            record = {
+                'op': op,
+                'name': series.name,
+                'total_episodes': series.total_episodes,
+                'genre': series.genre,
+                'episodes_watched': series.episodes_watched
+            }
+            if history:
+                record['history'] = history.events()
+                written[id(history)] = (history, len(record['history']))
+            return record
+        if op == 'update':
+            record = {'op': op, 'name': series.name, 'episodes_watched': series.episodes_watched}
+            if history:
+                start = written.get(id(history), (history, history.saved))[1]
+                events = history.events(start)
+                if events:
+                    record['events'] = events
+                written[id(history)] = (history, start + len(events))
+            return record
+        return {'op': op, 'name': series.name}
+    
+    @staticmethod
+    def _mark_written(written):
+        """Mark the history events covered by a successful write as written"""
+        for history, count in written.values():
+            history.saved = count
+    
+    @staticmethod
+    def _encode(record):
+        """Encode a record as one compact journal line"""
+        return json.dumps(record, separators=(',', ':')) + '\n'
@@ -1,86 +1,260 @@
-"""
-JSON storage utility for saving and loading series data
-"""
-
-import json
-import os
-from series import Series
-
-class JSONStorage:
-    """Handle saving and loading series data from JSON files"""
-    
-    def __init__(self, filename="series_data.json"):
-        """
-        Initialize JSONStorage
-        
-        Args:
-            filename (str): Name of the JSON file to store data
-        """
-        self.filename = filename
-    
-    def save_series(self, series_list):
-        """
-        Save all series to a JSON file
-        
-        Args:
-            series_list (list): List of Series objects to save
-            
-        Returns:
-            bool: True if successful, False otherwise
-        """
-        try:
-            data = []
-            for series in series_list:
-                series_data = {
-                    'name': series.name,
-                    'total_episodes': series.total_episodes,
-                    'genre': series.genre,
-                    'episodes_watched': series.episodes_watched
-                }
-                data.append(series_data)
-            
-            with open(self.filename, 'w') as f:
-                json.dump(data, f, indent=4)
-            
-            print(f" Data saved to '{self.filename}'")
-            return True
-        
-        except Exception as e:
-            print(f" Error saving data: {e}")
-            return False
-    
-    def load_series(self):
-        """
-        Load all series from the JSON file
-        
-        Returns:
-            list: List of Series objects, empty list if file doesn't exist
-        """
-        if not os.path.exists(self.filename):
-            print(f" No saved data found. Starting fresh!")
-            return []
-        
-        try:
-            with open(self.filename, 'r') as f:
-                data = json.load(f)
-            
-            series_list = []
-            for item in data:
-                series = Series(
-                    name=item['name'],
-                    total_episodes=item['total_episodes'],
-                    genre=item.get('genre', 'Unknown')
-                )
-                series.episodes_watched = item.get('episodes_watched', 0)
-                series_list.append(series)
-            
-            print(f" Loaded {len(series_list)} series from '{self.filename}'")
-            return series_list
-        
-        except Exception as e:
-            print(f" Error loading data: {e}")
-            return []
-    
-    def file_exists(self):
-        """Check if the JSON file exists"""
-        return os.path.exists(self.filename)
+"""
+JSON storage utility for saving and loading series data
+"""
+
+import json
+import marshal
+import os
+import re
+from series import Series
+from watch_history import WatchHistory
+
+# Whitespace and commas between the elements of the top-level array
+_SEPARATORS = re.compile(r'[\s,]*')
+
+class JSONStorage:
+    """Handle saving and loading series data from JSON files"""
+    
+    # Bump when the snapshot layout changes so old caches are ignored
+    SNAPSHOT_VERSION = 2
+    
+    def __init__(self, filename="series_data.json", snapshot_cache=False):
+        """
+        Initialize JSONStorage
+        
+        Args:
+            filename (str): Name of the JSON file to store data
+            snapshot_cache (bool): Keep a binary snapshot of the data next to
+                the JSON file and load from it while the JSON file is unchanged
+        """
+        self.filename = filename
+        self.snapshot_cache = snapshot_cache
+        self.snapshot_filename = filename + '.cache'
+    
+    def save_series(self, series_list):
+        """
+        Save all series to a JSON file
+        
+        Args:
+            series_list (list): List of Series objects to save
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            data = []
+            for series in series_list:
+                series_data = {
+                    'name': series.name,
+                    'total_episodes': series.total_episodes,
+                    'genre': series.genre,
+                    'episodes_watched': series.episodes_watched
+                }
+                if series.history:
+                    series_data['history'] = series.history.events()
+                data.append(series_data)
+            
+            # Write to a temporary file and swap it in, so a crash mid-save
+            # never leaves a truncated data file behind
+            temp_filename = self.filename + '.tmp'
+            with open(temp_filename, 'w') as f:
+                json.dump(data, f, indent=4)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_filename, self.filename)
+            
+            if self.snapshot_cache:
+                self._write_snapshot([self._row(item) for item in data])
+            
+            print(f" Data saved to '{self.filename}'")
+            return True
+        
+        except Exception as e:
+            print(f" Error saving data: {e}")
+            return False
+    
+    def load_series(self):
+        """
+        Load all series from the JSON file
+        
+        Returns:
+            list: List of Series objects, empty list if file doesn't exist
+        """
+        if not os.path.exists(self.filename):
+            print(f" No saved data found. Starting fresh!")
+            return []
+        
+        try:
+            series_list = list(self._load())
+            
+            print(f" Loaded {len(series_list)} series from '{self.filename}'")
+            return series_list
+        
+        except Exception as e:
+            print(f" Error loading data: {e}")
+            return []
+    
+    def iter_series(self, chunk_size=65536):
+        """
+        Load series from the JSON file one at a time
+        
+        The top-level array is parsed incrementally, so neither the raw
+        parsed data nor a full list of Series is held in memory. If the
+        file turns out to be malformed, loading stops at the bad element.
+        
+        Args:
+            chunk_size (int): Number of characters to read at a time
+            
+        Yields:
+            Series: The next series in the file
+        """
+        if not os.path.exists(self.filename):
+            print(f" No saved data found. Starting fresh!")
+            return
+        
+        count = 0
+        try:
+            for series in self._load(chunk_size):
+                yield series
+                count += 1
+            
+            print(f" Loaded {count} series from '{self.filename}'")
+        
+        except Exception as e:
+            print(f" Error loading data: {e}")
+    
+    def _load(self, chunk_size=65536):
+        """
+        Yield the saved series, from the snapshot cache when it is current
+        
+        Args:
+            chunk_size (int): Number of characters to read at a time
+        """
+        if not self.snapshot_cache:
+            for item in self._iter_items(chunk_size):
+                yield self._series(item)
+            return
+        
+        rows = self._read_snapshot()
+        if rows is not None:
+            for name, total_episodes, genre, episodes_watched, history in rows:
+                series = Series(name, total_episodes, genre)
+                series.episodes_watched = episodes_watched
+                if history:
+                    series.history = WatchHistory(history)
+                yield series
+            return
+        
+        # Parse the JSON once and remember it for the next start
+        rows = []
+        for item in self._iter_items(chunk_size):
+            series = self._series(item)
+            rows.append(self._row(item))
+            yield series
+        self._write_snapshot(rows)
+    
+    def _read_snapshot(self):
+        """
+        Read the snapshot cache if it matches the current JSON file
+        
+        Returns:
+            list: Row tuples, or None if the cache is missing or stale
+        """
+        try:
+            stat = os.stat(self.filename)
+            # marshal.load on a file object reads in small pieces; one
+            # read and marshal.loads is several times faster
+            with open(self.snapshot_filename, 'rb') as f:
+                key, rows = marshal.loads(f.read())
+            return rows if key == self._snapshot_key(stat) else None
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+    
+    def _write_snapshot(self, rows):
+        """Write the snapshot cache for the current JSON file"""
+        try:
+            temp_filename = self.snapshot_filename + '.tmp'
+            with open(temp_filename, 'wb') as f:
+                f.write(marshal.dumps((self._snapshot_key(os.stat(self.filename)), rows)))
+            os.replace(temp_filename, self.snapshot_filename)
+        except (OSError, ValueError):
+            # The cache is only an optimization; the JSON file is the record
+            pass
+    
+    def _snapshot_key(self, stat):
+        """Identify the JSON file contents a snapshot was taken from"""
+        return (self.SNAPSHOT_VERSION, marshal.version, stat.st_mtime_ns, stat.st_size)
+    
+    def _iter_items(self, chunk_size=65536):
+        """
+        Parse the elements of the top-level JSON array incrementally
+        
+        Args:
+            chunk_size (int): Number of characters to read at a time
+            
+        Yields:
+            dict: The next element of the array
+        """
+        decoder = json.JSONDecoder()
+        in_array = False
+        
+        with open(self.filename, 'r') as f:
+            buffer = ''
+            pos = 0
+            
+            while True:
+                # Skip separators, reading more text until something is left
+                pos = _SEPARATORS.match(buffer, pos).end()
+                if pos == len(buffer):
+                    chunk = f.read(chunk_size)
+                    if not chunk:
+                        raise ValueError("unexpected end of file")
+                    buffer, pos = chunk, 0
+                    continue
+                
+                if not in_array:
+                    if buffer[pos] != '[':
+                        raise ValueError("expected a JSON array of series")
+                    in_array = True
+                    pos += 1
+                    continue
+                
+                if buffer[pos] == ']':
+                    return
+                
+                try:
+                    item, pos = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    # The element is cut off at the end of the buffer
+                    chunk = f.read(chunk_size)
+                    if not chunk:
+                        raise
+                    buffer, pos = buffer[pos:] + chunk, 0
+                    continue
+                
+                yield item
+    
+    @staticmethod
+    def _row(item):
+        """Turn a saved record into a compact tuple for the snapshot cache"""
+        history = item.get('history')
+        return (item['name'], item['total_episodes'],
+                item.get('genre', 'Unknown'), item.get('episodes_watched', 0),
+                tuple(map(tuple, history)) if history else None)
+    
+    @staticmethod
+    def _series(item):
+        """Build a Series object from a saved record"""
+        series = Series(
+            name=item['name'],
+            total_episodes=item['total_episodes'],
+            genre=item.get('genre', 'Unknown')
+        )
+        series.episodes_watched = item.get('episodes_watched', 0)
+        if item.get('history'):
+            series.history = WatchHistory(item['history'])
+        return series
+    
+    def file_exists(self):
+        """Check if the JSON file exists"""
+        return os.path.exists(self.filename)
@@ -1,146 +1,512 @@
-"""
-TV Series Assistant - A simple tool to track and manage your favorite TV series
-"""
-
-from series_manager import SeriesManager
-from json_storage import JSONStorage
-from ai_recommender import AIRecommender
-
-def display_menu():
-    """Display the main menu"""
-    print("\n" + "="*50)
-    print(" TV SERIES ASSISTANT ")
-    print("="*50)
-    print("1. Add a new series")
-    print("2. View all series")
-    print("3. Update episode watched")
-    print("4. Delete a series")
-    print("5. Search for a series")
-    print("6. View statistics")
-    print("7. Get AI recommendations")
-    print("8. Exit")
-    print("="*50)
-
-def main():
-    """Main function to run the TV series assistant"""
-    # Initialize storage and manager with auto-save
-    storage = JSONStorage("series_data.json")
-    manager = SeriesManager(storage=storage)
-    # Initialize AI recommender
-    ai = AIRecommender(manager)
-    
-    while True:
-        display_menu()
-        choice = input("Choose an option (1-8): ").strip()
-        if choice == '1':
-            add_series(manager)
-        elif choice == '2':
-            manager.view_all_series()
-        elif choice == '3':
-            update_series(manager)
-        elif choice == '4':
-            delete_series(manager)
-        elif choice == '5':
-            search_series(manager)
-        elif choice == '6':
-            view_statistics(manager)
-        elif choice == '7':
-            ai_recommendations(ai)
-        elif choice == '8':
-            view_statistics(manager)
-        elif choice == '7':
-            print("\n Thanks for using TV Series Assistant! Goodbye!")
-            print(" Your data has been saved automatically.")
-            break
-        else:
-            print("Invalid choice. Please try again.")
-
-def add_series(manager):
-    """Add a new series to the manager"""
-    print("\n--- Add New Series ---")
-    name = input("Enter series name: ").strip()
-    
-    if not name:
-        print("Series name cannot be empty!")
-        return
-    
-    total_episodes = input("Enter total episodes: ").strip()
-    try:
-        total_episodes = int(total_episodes)
-        if total_episodes <= 0:
-            print("Total episodes must be positive!")
-            return
-    except ValueError:
-        print("Please enter a valid number!")
-        return
-    
-    genre = input("Enter genre (optional): ").strip() or "Unknown"
-    
-    manager.add_series(name, total_episodes, genre)
-    print(f"'{name}' added successfully!")
-
-def update_series(manager):
-    """Update episodes watched for a series"""
-    print("\n--- Update Episodes ---")
-    name = input("Enter series name: ").strip()
-    
-    episodes_watched = input("Enter episodes watched: ").strip()
-    try:
-        episodes_watched = int(episodes_watched)
-        if episodes_watched < 0:
-            print("Episodes watched cannot be negative!")
-            return
-    except ValueError:
-        print("Please enter a valid number!")
-        return
-    
-    manager.update_episodes(name, episodes_watched)
-
-def delete_series(manager):
-    """Delete a series from the manager"""
-    print("\n--- Delete Series ---")
-    name = input("Enter series name to delete: ").strip()
-    manager.delete_series(name)
-
-def search_series(manager):
-    """Search for a series"""
-    print("\n--- Search Series ---")
-    name = input("Enter series name to search: ").strip()
-    manager.search_series(name)
-
-def view_statistics(manager):
-    """View collection statistics"""
-    print("\n--- Statistics ---")
-    stats = manager.get_statistics()
-    
-    if not stats:
-        print("No series in your collection yet!")
-        return
-    
-    print(f"COLLECTION STATISTICS")
-    print(f"   Total Series: {stats['total_series']}")
-    print(f"   Completed: {stats['completed_series']}")
-    print(f"   In Progress: {stats['total_series'] - stats['completed_series']}")
-    print(f"   Total Episodes: {stats['total_episodes']}")
-    print(f"   Episodes Watched: {stats['watched_episodes']}")
-    print(f"   Overall Progress: {stats['overall_progress']:.1f}%")
-
-def ai_recommendations(ai):
-    """Get AI-powered series recommendations"""
-    print("\n--- AI Recommendations ---")
-    print("Analyzing your watching habits...")
-    count = input("How many recommendations would you like? (default: 3): ").strip()
-    
-    try:
-        count = int(count) if count else 3
-        if count <= 0:
-            print("Please enter a positive number!")
-            return
-    except ValueError:
-        print("Please enter a valid number!")
-        return
-    
-    ai.display_recommendations(count)
-
-if __name__ == "__main__":
-    main()
+"""
+TV Series Assistant - A simple tool to track and manage your favorite TV series
+
+Run without arguments for the interactive menu, or with a command for
+scripted use:
+
+    python main.py add "Dark" 26 --genre Sci-Fi
+    python main.py --json stats
+    python main.py --batch commands.txt
+    python main.py --stats --profile cprofile stats
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import shlex
+import sys
+
+# The manager, storage and recommender modules are imported where they are
+# first needed, so a command only pays for the backend it actually uses
+
+def display_menu(stats=False):
+    """Display the main menu"""
+    print("\n" + "="*50)
+    print(" TV SERIES ASSISTANT ")
+    print("="*50)
+    print("1. Add a new series")
+    print("2. View all series")
+    print("3. Update episode watched")
+    print("4. Delete a series")
+    print("5. Search for a series")
+    print("6. View statistics")
+    print("7. Get AI recommendations")
+    print("8. Exit")
+    if stats:
+        print("9. Performance statistics")
+    print("="*50)
+
+def build_parser():
+    """Build the command line parser"""
+    parser = argparse.ArgumentParser(
+        description="Track and manage your favorite TV series.",
+        epilog="Run without a command to use the interactive menu."
+    )
+    parser.add_argument('--data', default="series_data.json",
+                        help="data file; .journal and .db files use the journal and SQLite storage "
+                             "(default: %(default)s)")
+    parser.add_argument('--json', action='store_true',
+                        help="print one JSON object per command instead of text")
+    parser.add_argument('--batch', metavar='FILE',
+                        help="run the commands in FILE, one per line, against one loaded collection")
+    parser.add_argument('--snapshot', action='store_true',
+                        help="keep a binary snapshot of a JSON data file for faster startup")
+    parser.add_argument('--content', action='store_true',
+                        help="recommend series whose descriptions resemble the ones you watch")
+    parser.add_argument('--stats', action='store_true',
+                        help="time storage, manager and recommender calls and print the numbers "
+                             "to stderr at exit (adds a menu entry in the interactive menu)")
+    parser.add_argument('--profile', choices=['cprofile', 'tracemalloc'],
+                        help="profile the command with cProfile or tracemalloc")
+    parser.add_argument('--profile-output', metavar='FILE',
+                        help="save the raw profile or memory snapshot to FILE instead of "
+                             "printing a summary")
+    
+    commands = parser.add_subparsers(dest='command', metavar='command')
+    
+    add = commands.add_parser('add', help="add a new series")
+    add.add_argument('name')
+    add.add_argument('total_episodes', type=int)
+    add.add_argument('--genre', default="Unknown")
+    
+    update = commands.add_parser('update', help="update episodes watched")
+    update.add_argument('name')
+    update.add_argument('episodes_watched', type=int)
+    
+    delete = commands.add_parser('delete', help="delete a series")
+    delete.add_argument('name')
+    
+    list_ = commands.add_parser('list', help="list all series")
+    list_.add_argument('--offset', type=int, default=0, help="series to skip")
+    list_.add_argument('--limit', type=int, help="most series to list")
+    
+    search = commands.add_parser('search', help="search series by name")
+    search.add_argument('name')
+    search.add_argument('--fuzzy', action='store_true', help="tolerate typos")
+    search.add_argument('--offset', type=int, default=0, help="matches to skip")
+    search.add_argument('--limit', type=int, help="most matches to list")
+    
+    commands.add_parser('stats', help="show collection statistics")
+    
+    pace = commands.add_parser('pace', help="show watching pace and expected finish date")
+    pace.add_argument('name', nargs='?', help="a series (default: the whole collection)")
+    pace.add_argument('--weeks', type=int, default=4, help="weeks to average over (default: %(default)s)")
+    
+    next_ = commands.add_parser('next', help="list what to watch next")
+    next_.add_argument('--order', choices=['closest', 'remaining'], default='closest',
+                       help="closest to completion, or most episodes remaining (default: %(default)s)")
+    next_.add_argument('--genre', help="only series of this genre")
+    next_.add_argument('--count', type=int, default=10)
+    
+    recommend = commands.add_parser('recommend', help="get AI recommendations")
+    recommend.add_argument('--count', type=int, default=3)
+    
+    import_ = commands.add_parser('import', help="import series from a CSV or JSONL file")
+    import_.add_argument('file')
+    
+    export = commands.add_parser('export', help="export series to a CSV or JSONL file")
+    export.add_argument('file')
+    
+    sync = commands.add_parser('sync', help="exchange changes with another data file")
+    sync.add_argument('other', help="the other data file, such as a copy on another drive")
+    
+    return parser
+
+def open_manager(filename, snapshot=False, defer=False):
+    """Create a manager over the data file and load the collection"""
+    from series_manager import SeriesManager
+    from storage import open_storage
+    manager = SeriesManager(storage=open_storage(filename, snapshot))
+    manager.load_from_storage(defer=defer)
+    return manager
+
+def watch_sync(manager):
+    """
+    Start dating changes for sync, if the data file has been synced before
+    
+    A change is dated when it happens only while a Replica watches the
+    manager; otherwise the next sync can only date it by when it ran.
+    
+    Returns:
+        Replica: The data file's replica, to pass to close_manager; None
+        if the data file has no sync state
+    """
+    state_file = manager.storage.filename + '.sync'
+    if not os.path.exists(state_file):
+        return None
+    from sync import Replica
+    replica = Replica(manager, state_file)
+    replica.refresh()
+    return replica
+
+def close_manager(manager, replica=None):
+    """Record the run's changes in the sync state, if watched, and close the manager"""
+    if replica is not None:
+        replica.refresh()
+        replica.save()
+    manager.close()
+
+def make_recommender(manager, content=False):
+    """Create the AI recommender for a manager, content-based if asked"""
+    if content:
+        # The index is cached next to the data file, so later runs load it
+        # instead of tokenizing the whole catalogue again
+        from ai_recommender import AIRecommender
+        from catalogue import Catalogue
+        from content_based import ContentRecommender, TfidfIndex
+        catalogue = Catalogue(AIRecommender.SERIES_DATABASE)
+        index = TfidfIndex.open(catalogue, manager.storage.filename + '.tfidf')
+        return ContentRecommender(manager, index, catalogue)
+    from ai_recommender import AIRecommender
+    return AIRecommender(manager)
+
+def main(argv=None):
+    """Main function to run the TV series assistant"""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    
+    with contextlib.ExitStack() as stack:
+        if args.stats:
+            import instrumentation
+            instrumentation.enable()
+            stack.callback(dump_stats, args.json)
+        if args.profile:
+            import instrumentation
+            stack.enter_context(instrumentation.capture(args.profile, args.profile_output))
+        return run(parser, args)
+
+def dump_stats(as_json=False):
+    """Print the instrumentation numbers to stderr"""
+    import instrumentation
+    if as_json:
+        print(json.dumps({'stats': instrumentation.stats()}), file=sys.stderr)
+    else:
+        print(file=sys.stderr)
+        instrumentation.report(sys.stderr)
+
+def run(parser, args):
+    """Run the menu, a batch file or a single command"""
+    if args.command is None and args.batch is None:
+        run_menu(args.data, args.snapshot, args.stats, args.content)
+        return 0
+    
+    # In JSON mode the usual messages go to stderr, keeping stdout parseable
+    out = sys.stdout
+    with contextlib.redirect_stdout(sys.stderr if args.json else out):
+        manager = open_manager(args.data, args.snapshot)
+        replica = watch_sync(manager)
+        # Only recommendations need the recommender and its catalogue
+        ai = make_recommender(manager, args.content) if args.batch or args.command == 'recommend' else None
+        
+        def emit(result):
+            if args.json:
+                out.write(json.dumps(result) + "\n")
+                out.flush()
+        
+        if args.batch:
+            ok = run_batch(parser, args.batch, manager, ai, emit, replica)
+        else:
+            try:
+                result = run_command(args, manager, ai, replica)
+            except (OSError, ValueError) as e:
+                print(f"Error: {e}")
+                result = {'command': args.command, 'ok': False, 'error': str(e)}
+            emit(result)
+            ok = result['ok']
+        
+        close_manager(manager, replica)
+    
+    return 0 if ok else 1
+
+def run_batch(parser, filename, manager, ai, emit, replica=None):
+    """
+    Run every command in a batch file against one loaded collection
+    
+    Blank lines and lines starting with '#' are skipped. Changes are
+    saved once, after the last command.
+    
+    Returns:
+        bool: True if every command succeeded
+    """
+    ok = True
+    with open(filename, 'r') as f, manager.batch():
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            
+            try:
+                args = parser.parse_args(shlex.split(line))
+                if args.command is None:
+                    raise ValueError("no command given")
+                result = run_command(args, manager, ai, replica)
+            except (SystemExit, OSError, ValueError) as e:
+                # argparse exits on bad arguments, and commands raise on
+                # missing or unreadable files; report it and carry on
+                result = {'command': line.split()[0], 'ok': False,
+                          'error': "invalid arguments" if isinstance(e, SystemExit) else str(e)}
+                print(f"Line {line_number}: {result['error']}")
+            
+            result['line'] = line_number
+            emit(result)
+            ok = ok and result['ok']
+    return ok
+
+def run_command(args, manager, ai, replica=None):
+    """
+    Run one parsed command
+    
+    Prints the usual text output and returns a JSON-serializable result.
+    replica is the data file's Replica from watch_sync, if any, which a
+    sync then uses rather than opening the same sync state twice.
+    
+    Returns:
+        dict: 'command', 'ok' and any data the command produced
+    """
+    from series_io import series_to_dict
+    result = {'command': args.command, 'ok': True}
+    
+    if args.command == 'add':
+        if args.total_episodes <= 0:
+            print("Total episodes must be positive!")
+            result['ok'] = False
+        else:
+            result['ok'] = manager.add_series(args.name, args.total_episodes, args.genre)
+            if result['ok']:
+                print(f"'{args.name}' added successfully!")
+    
+    elif args.command == 'update':
+        result['ok'] = manager.update_episodes(args.name, args.episodes_watched)
+    
+    elif args.command == 'delete':
+        result['ok'] = manager.delete_series(args.name)
+    
+    elif args.command == 'list':
+        from render import Renderer
+        series_list = manager.list_series(args.offset, args.limit)
+        result['series'] = [series_to_dict(s) for s in series_list]
+        Renderer().show_collection(series_list, manager.count_series(), args.offset)
+    
+    elif args.command == 'search':
+        from render import Renderer
+        results = manager.match_series(args.name, fuzzy=args.fuzzy, limit=args.limit, offset=args.offset)
+        result['series'] = [series_to_dict(s) for s in results]
+        suggestions = manager.match_series(args.name, fuzzy=True, limit=3) if not results else ()
+        Renderer().show_search(args.name, results, suggestions)
+    
+    elif args.command == 'stats':
+        result['statistics'] = manager.get_statistics()
+        view_statistics(manager)
+    
+    elif args.command == 'next':
+        from render import Renderer
+        series_list = manager.top_series(args.order, args.count, args.genre)
+        result['series'] = [series_to_dict(s) for s in series_list]
+        if series_list:
+            Renderer().write_series(series_list, len(series_list))
+        else:
+            print("\n Nothing in progress to show.")
+    
+    elif args.command == 'pace':
+        if args.weeks <= 0:
+            print("Weeks must be positive!")
+            result['ok'] = False
+        else:
+            report = manager.get_pace(args.name, args.weeks)
+            if report is None:
+                print(f" Series '{args.name}' not found!")
+                result['ok'] = False
+            else:
+                result['pace'] = report
+                view_pace(args.name, report)
+    
+    elif args.command == 'recommend':
+        recommendations = ai.get_recommendations(args.count)
+        result['recommendations'] = [
+            {'name': name, 'episodes': episodes, 'description': description}
+            for name, episodes, description in recommendations
+        ]
+        # Show the same picks; random ones would differ if fetched again
+        ai.display_recommendations(args.count, recommendations)
+    
+    elif args.command == 'import':
+        try:
+            report = manager.import_file(args.file)
+        except (OSError, ValueError) as e:
+            raise ValueError(f"nothing imported from '{args.file}': {e}") from e
+        result.update(report)
+        print(f"Imported {report['added']} series "
+              f"({report['duplicates']} duplicates, {len(report['errors'])} errors)")
+        for row, error in report['errors']:
+            print(f"   Row {row}: {error}")
+    
+    elif args.command == 'export':
+        result['count'] = manager.export_file(args.file)
+        print(f"Exported {result['count']} series to '{args.file}'")
+    
+    elif args.command == 'sync':
+        from sync import Replica, sync
+        other = open_manager(args.other)
+        report = sync(replica or Replica(manager, manager.storage.filename + '.sync'),
+                      Replica(other, args.other + '.sync'))
+        other.close()
+        result.update(report)
+        print(f"Synced with '{args.other}': sent {report['sent']}, "
+              f"received {report['received']} series")
+    
+    return result
+
+def run_menu(filename, snapshot=False, stats=False, content=False):
+    """Run the interactive menu"""
+    # Initialize storage and manager with auto-save; the data file is read
+    # when the collection is first used, so the menu appears right away
+    manager = open_manager(filename, snapshot, defer=True)
+    replica = watch_sync(manager)
+    ai = None
+    
+    while True:
+        display_menu(stats)
+        choice = input(f"Choose an option (1-{9 if stats else 8}): ").strip()
+        if choice == '1':
+            add_series(manager)
+        elif choice == '2':
+            manager.view_all_series(renderer=pager())
+        elif choice == '3':
+            update_series(manager)
+        elif choice == '4':
+            delete_series(manager)
+        elif choice == '5':
+            search_series(manager)
+        elif choice == '6':
+            view_statistics(manager)
+        elif choice == '7':
+            # Initialize AI recommender on first use
+            if ai is None:
+                ai = make_recommender(manager, content)
+            ai_recommendations(ai)
+        elif choice == '8':
+            close_manager(manager, replica)
+            print("\n Thanks for using TV Series Assistant! Goodbye!")
+            print(" Your data has been saved automatically.")
+            break
+        elif choice == '9' and stats:
+            import instrumentation
+            print("\n--- Performance Statistics ---")
+            instrumentation.report()
+        else:
+            print("Invalid choice. Please try again.")
+
+def pager():
+    """Create a renderer that stops after each screenful to ask for more"""
+    from render import Renderer, ask_more
+    return Renderer(page_size=10, pause=ask_more)
+
+def add_series(manager):
+    """Add a new series to the manager"""
+    print("\n--- Add New Series ---")
+    name = input("Enter series name: ").strip()
+    
+    if not name:
+        print("Series name cannot be empty!")
+        return
+    
+    total_episodes = input("Enter total episodes: ").strip()
+    try:
+        total_episodes = int(total_episodes)
+        if total_episodes <= 0:
+            print("Total episodes must be positive!")
+            return
+    except ValueError:
+        print("Please enter a valid number!")
+        return
+    
+    genre = input("Enter genre (optional): ").strip() or "Unknown"
+    
+    manager.add_series(name, total_episodes, genre)
+    print(f"'{name}' added successfully!")
+
+def update_series(manager):
+    """Update episodes watched for a series"""
+    print("\n--- Update Episodes ---")
+    name = input("Enter series name: ").strip()
+    
+    episodes_watched = input("Enter episodes watched: ").strip()
+    try:
+        episodes_watched = int(episodes_watched)
+        if episodes_watched < 0:
+            print("Episodes watched cannot be negative!")
+            return
+    except ValueError:
+        print("Please enter a valid number!")
+        return
+    
+    manager.update_episodes(name, episodes_watched)
+
+def delete_series(manager):
+    """Delete a series from the manager"""
+    print("\n--- Delete Series ---")
+    name = input("Enter series name to delete: ").strip()
+    manager.delete_series(name)
+
+def search_series(manager):
+    """Search for a series"""
+    print("\n--- Search Series ---")
+    name = input("Enter series name to search: ").strip()
+    manager.search_series(name, renderer=pager())
+
+def view_statistics(manager):
+    """View collection statistics"""
+    print("\n--- Statistics ---")
+    stats = manager.get_statistics()
+    
+    if not stats:
+        print("No series in your collection yet!")
+        return
+    
+    print(f"COLLECTION STATISTICS")
+    print(f"   Total Series: {stats['total_series']}")
+    print(f"   Completed: {stats['completed_series']}")
+    print(f"   In Progress: {stats['total_series'] - stats['completed_series']}")
+    print(f"   Total Episodes: {stats['total_episodes']}")
+    print(f"   Episodes Watched: {stats['watched_episodes']}")
+    print(f"   Overall Progress: {stats['overall_progress']:.1f}%")
+    
+    if stats.get('genres'):
+        print(f"BY GENRE")
+        for genre, genre_stats in sorted(stats['genres'].items()):
+            print(f"   {genre}: {genre_stats['total_series']} series, "
+                  f"{genre_stats['completed_series']} completed, "
+                  f"{genre_stats['overall_progress']:.1f}% watched")
+
+def view_pace(name, report):
+    """Show a pace report from SeriesManager.get_pace"""
+    print(f"\nPACE - {name or 'WHOLE COLLECTION'}")
+    print(f"   Episodes per week: {report['episodes_per_week']:.1f}")
+    print(f"   Remaining: {report['remaining']} episodes")
+    if report['eta']:
+        print(f"   Expected to finish: {report['eta']}")
+    elif report['remaining']:
+        print(f"   Expected to finish: not enough recent watching to tell")
+    for week in report['weekly']:
+        print(f"   Week of {week['week']}: {week['episodes']} episodes")
+
+def ai_recommendations(ai):
+    """Get AI-powered series recommendations"""
+    print("\n--- AI Recommendations ---")
+    print("Analyzing your watching habits...")
+    count = input("How many recommendations would you like? (default: 3): ").strip()
+    
+    try:
+        count = int(count) if count else 3
+        if count <= 0:
+            print("Please enter a positive number!")
+            return
+    except ValueError:
+        print("Please enter a valid number!")
+        return
+    
+    ai.display_recommendations(count)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,234 @@
+"""
+Ordered views over the collection, kept up to date as series change
+"""
+
+import heapq
+import threading
+
+class RankedHeap:
+    """
+    A min-heap of keys with changeable priorities
+    
+    Changing or removing a key only leaves its old entry behind as stale;
+    stale entries are skipped when reading and dropped in bulk once they
+    outnumber the live ones. Reading the k smallest walks the heap from
+    the root without popping, in O(k log k) plus the stale entries met
+    on the way.
+    
+    Entries are flat (*priority, number, key) tuples rather than mutable
+    records, which keeps building a large heap cheap.
+    """
+    
+    def __init__(self):
+        """Initialize an empty heap"""
+        self._heap = []   # (*priority, number, key) entries
+        self._live = {}   # Key -> its current entry
+        self._next = 0    # Breaks priority ties in insertion order
+    
+    def __len__(self):
+        return len(self._live)
+    
+    def __contains__(self, key):
+        return key in self._live
+    
+    def set(self, key, priority):
+        """
+        Add a key, or move it to a new priority
+        
+        Args:
+            key (str): The series key
+            priority (tuple): Smaller sorts first
+        """
+        entry = self._live[key] = priority + (self._next, key)
+        self._next += 1
+        heapq.heappush(self._heap, entry)
+        self._compact()
+    
+    def extend(self, items):
+        """
+        Add many keys not in the heap yet, heapifying once
+        
+        Args:
+            items (iterable): (key, priority) pairs
+        """
+        live = self._live
+        heap = self._heap
+        number = self._next
+        for key, priority in items:
+            entry = live[key] = priority + (number, key)
+            heap.append(entry)
+            number += 1
+        self._next = number
+        heapq.heapify(heap)
+    
+    def discard(self, key):
+        """Remove a key if present"""
+        if self._live.pop(key, None) is not None:
+            self._compact()
+    
+    def smallest(self, count):
+        """
+        Get the keys with the smallest priorities without changing the heap
+        
+        Args:
+            count (int): Number of keys to return
+            
+        Returns:
+            list: Keys, smallest priority first
+        """
+        heap = self._heap
+        live = self._live
+        keys = []
+        if not heap or count <= 0:
+            return keys
+        # Children of a heap entry are never smaller than it, so the next
+        # smallest entry is always among the children of those taken
+        frontier = [(heap[0], 0)]
+        while frontier and len(keys) < count:
+            entry, i = heapq.heappop(frontier)
+            if live.get(entry[-1]) is entry:
+                keys.append(entry[-1])
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < len(heap):
+                    heapq.heappush(frontier, (heap[child], child))
+        return keys
+    
+    def items(self):
+        """Iterate over the live (key, priority) pairs in no particular order"""
+        for key, entry in self._live.items():
+            yield key, entry[:-2]
+    
+    def _compact(self):
+        """Drop the stale entries once they outnumber the live ones"""
+        if len(self._heap) > 2 * len(self._live) + 64:
+            live = self._live
+            self._heap = [entry for entry in self._heap if live.get(entry[-1]) is entry]
+            heapq.heapify(self._heap)
+
+class OrderedViews:
+    """
+    "What's next" orderings of a collection, each kept in a RankedHeap
+    
+    Views:
+        'closest': Started but unfinished series, highest progress first
+            (fewest remaining episodes breaking ties)
+        'remaining': Unfinished series, most remaining episodes first
+        
+    A view filtered by genre gets its own heap the first time it is
+    asked for, and is kept up to date from then on.
+    """
+    
+    VIEWS = ('closest', 'remaining')
+    
+    def __init__(self):
+        """Initialize empty views"""
+        self._views = {view: RankedHeap() for view in self.VIEWS}
+        self._by_genre = {}  # (view, genre) -> RankedHeap of that genre's series
+        self._genre_of = {}  # Key -> genre, for every series in a view
+        # Readers may build genre heaps side by side; changes come one at a time
+        self._genre_lock = threading.Lock()
+    
+    @classmethod
+    def build(cls, items):
+        """
+        Build the views for a whole collection at once
+        
+        Args:
+            items (iterable): (key, Series) pairs not repeating a key
+        """
+        views = cls()
+        genre_of = views._genre_of
+        closest, remaining = [], []
+        for key, series in items:
+            watched = series.episodes_watched
+            total = series.total_episodes
+            left = total - watched
+            if left <= 0:
+                continue
+            genre_of[key] = series.genre
+            remaining.append((key, (-left,)))
+            if watched > 0:
+                closest.append((key, (-watched / total, left)))
+        views._views['closest'].extend(closest)
+        views._views['remaining'].extend(remaining)
+        return views
+    
+    @staticmethod
+    def priorities(series):
+        """
+        Get the priority of a series in each view it belongs to
+        
+        Returns:
+            dict: View name -> priority tuple
+        """
+        watched = series.episodes_watched
+        total = series.total_episodes
+        left = total - watched
+        if left <= 0:
+            return {}
+        priorities = {'remaining': (-left,)}
+        if watched > 0:
+            priorities['closest'] = (-watched / total, left)
+        return priorities
+    
+    def add(self, key, series):
+        """
+        File a series under its current progress
+        
+        Args:
+            key (str): The casefolded series name
+            series (Series): The series
+        """
+        self.discard(key)
+        priorities = self.priorities(series)
+        if not priorities:
+            return
+        self._genre_of[key] = series.genre
+        for view, priority in priorities.items():
+            self._views[view].set(key, priority)
+            heap = self._by_genre.get((view, series.genre))
+            if heap is not None:
+                heap.set(key, priority)
+    
+    def discard(self, key):
+        """Remove a series from every view"""
+        genre = self._genre_of.pop(key, None)
+        if genre is None:
+            return
+        for view, heap in self._views.items():
+            heap.discard(key)
+            heap = self._by_genre.get((view, genre))
+            if heap is not None:
+                heap.discard(key)
+    
+    def top(self, view, count, genre=None):
+        """
+        Get the first keys of a view
+        
+        Args:
+            view (str): One of VIEWS
+            count (int): Number of keys to return
+            genre (str): Only series of this genre
+            
+        Returns:
+            list: Keys in view order
+            
+        Raises:
+            ValueError: For an unknown view
+        """
+        if view not in self._views:
+            raise ValueError(f"unknown view: {view!r}")
+        if genre is None:
+            return self._views[view].smallest(count)
+        
+        heap = self._by_genre.get((view, genre))
+        if heap is None:
+            with self._genre_lock:
+                heap = self._by_genre.get((view, genre))
+                if heap is None:
+                    genre_of = self._genre_of
+                    heap = RankedHeap()
+                    heap.extend((key, priority) for key, priority in self._views[view].items()
+                                if genre_of[key] == genre)
+                    self._by_genre[view, genre] = heap
+        return heap.smallest(count)
@@ -0,0 +1,357 @@
+"""
+Profile store - many users' series collections, sharded across directories
+
+Each user's collection lives in its own data file under one of a fixed
+number of shard directories, picked by a hash of the user name, so no
+directory grows too large. Managers are opened on demand and the least
+recently used ones are closed once too many are loaded.
+
+recommend_all computes recommendations for every stored user in
+parallel across processes. Run as a script it writes them out as JSON
+Lines:
+
+    python profile_store.py --root profiles [--count N] [--workers N]
+                            [--catalogue FILE] [--output FILE]
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import re
+import sys
+import threading
+import weakref
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+from storage import open_storage
+
+# User names become file names, so keep them to a safe character set
+USER_NAME = re.compile(r'[A-Za-z0-9_.-]{1,64}')
+
+class Profile:
+    """One user's manager, with a recommender created on first use"""
+    
+    def __init__(self, user, manager, recommender_factory=None):
+        self.user = user
+        self.manager = manager
+        # Number of ProfileStore.using blocks holding the profile; a
+        # pinned profile is never evicted
+        self.pins = 0
+        self._recommender_factory = recommender_factory
+        self._recommender = None
+    
+    @property
+    def recommender(self):
+        """The recommender for this user's collection (AIRecommender by default)"""
+        if self._recommender is None:
+            if self._recommender_factory is not None:
+                self._recommender = self._recommender_factory(self)
+            else:
+                from ai_recommender import AIRecommender
+                self._recommender = AIRecommender(self.manager)
+        return self._recommender
+
+class ProfileStore:
+    """Sharded per-user storage with an LRU of loaded managers"""
+    
+    def __init__(self, root, shards=16, extension='.json', max_loaded=256,
+                 write_behind=True, flush_delay=1.0, recommender_factory=None):
+        """
+        Initialize the store
+        
+        Args:
+            root (str): Directory holding the shard directories
+            shards (int): Number of shard directories; keep it fixed for
+                a given root, since it decides where each user lives
+            extension (str): Data file extension; picks the storage
+                backend as storage.open_storage does ('.json', '.journal' or '.db')
+            max_loaded (int): Managers kept open before the least
+                recently used one is saved and closed
+            write_behind (bool): Open managers in write-behind mode
+            flush_delay (float): Seconds a change may wait before being saved
+            recommender_factory (callable): Builds a profile's recommender
+                from the Profile; None uses AIRecommender
+        """
+        self.root = root
+        self.shards = shards
+        self.extension = extension
+        self.max_loaded = max_loaded
+        self.write_behind = write_behind
+        self.flush_delay = flush_delay
+        self.recommender_factory = recommender_factory
+        self._loaded = OrderedDict()  # User -> Profile, least recently used first
+        # Evicted profiles some caller still holds, taken back on next use
+        self._evicted = weakref.WeakValueDictionary()
+        # User -> Event set when the load of their profile in progress ends
+        self._loading = {}
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.evictions = 0
+    
+    def path(self, user):
+        """
+        Get the data file of a user
+        
+        Raises:
+            ValueError: If the user name is not a safe file name
+        """
+        if not USER_NAME.fullmatch(user) or user in ('.', '..'):
+            raise ValueError(f"invalid user name: {user!r}")
+        shard = zlib.crc32(user.encode('utf-8')) % self.shards
+        return os.path.join(self.root, f"shard-{shard:03d}", user + self.extension)
+    
+    def profile(self, user):
+        """
+        Get a user's profile, loading it if it is not loaded
+        
+        Prefer using() while working with the profile: an unpinned
+        profile may be evicted meanwhile. If it is, and the caller still
+        holds it, the next request for the user gets the same profile
+        back, so there are never two managers on one data file.
+        """
+        return self._get(user, pin=False)
+    
+    @contextmanager
+    def using(self, user):
+        """
+        Hold a user's profile for the length of a block
+        
+        The profile is pinned meanwhile, so it is not evicted and its
+        manager and storage are not closed under the caller.
+        
+            with store.using(user) as profile:
+                profile.manager.add_series(name, episodes)
+        """
+        profile = self._get(user, pin=True)
+        try:
+            yield profile
+        finally:
+            with self._lock:
+                profile.pins -= 1
+    
+    def _get(self, user, pin):
+        """
+        Get a user's profile, loading or taking it back as needed
+        
+        Loading reads the data file, so it runs outside the store lock:
+        requests for other users go ahead meanwhile, and further requests
+        for the same user wait for that one load.
+        """
+        filename = self.path(user)
+        while True:
+            with self._lock:
+                profile = self._loaded.get(user)
+                if profile is not None:
+                    self._loaded.move_to_end(user)
+                    profile.pins += pin
+                    return profile
+                
+                profile = self._evicted.pop(user, None)
+                if profile is not None:
+                    evicted = self._insert(profile, pin)
+                    break
+                loading = self._loading.get(user)
+                if loading is None:
+                    self._loading[user] = threading.Event()
+                    break
+            # Another request is loading the user; take what it loads
+            loading.wait()
+        
+        if profile is None:
+            try:
+                profile = Profile(user, self._open(filename), self.recommender_factory)
+            except BaseException:
+                with self._lock:
+                    self._loading.pop(user).set()
+                raise
+            with self._lock:
+                self._loading.pop(user).set()
+                self.loads += 1
+                evicted = self._insert(profile, pin)
+        
+        # Saving the evicted managers can take a while; do it unlocked
+        for old in evicted:
+            self._close(old)
+        return profile
+    
+    def _open(self, filename):
+        """Create a manager over a user's data file and load it"""
+        from series_manager import SeriesManager
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        manager = SeriesManager(storage=open_storage(filename), write_behind=self.write_behind,
+                                flush_delay=self.flush_delay)
+        manager.load_from_storage()
+        return manager
+    
+    def _insert(self, profile, pin):
+        """
+        Put a profile in the LRU, evicting the least recently used ones
+        
+        Only profiles nobody has pinned are evicted; if too many are
+        pinned the store runs over max_loaded. Called with the lock held.
+        
+        Returns:
+            list: The evicted profiles, for the caller to close unlocked
+        """
+        self._loaded[profile.user] = profile
+        profile.pins += pin
+        evicted = []
+        excess = len(self._loaded) - self.max_loaded
+        if excess > 0:
+            for old in self._loaded.values():
+                if len(evicted) == excess:
+                    break
+                if not old.pins and old is not profile:
+                    evicted.append(old)
+            for old in evicted:
+                del self._loaded[old.user]
+                self._evicted[old.user] = old
+                self.evictions += 1
+        return evicted
+    
+    def manager(self, user):
+        """Get a user's SeriesManager, loading it if needed"""
+        return self.profile(user).manager
+    
+    def users(self):
+        """Yield the names of all users with a data file, shard by shard"""
+        for shard in range(self.shards):
+            directory = os.path.join(self.root, f"shard-{shard:03d}")
+            if not os.path.isdir(directory):
+                continue
+            for filename in sorted(os.listdir(directory)):
+                user = filename[:-len(self.extension)]
+                if filename.endswith(self.extension) and USER_NAME.fullmatch(user):
+                    yield user
+    
+    def loaded(self):
+        """Get the names of the currently loaded users, least recent first"""
+        with self._lock:
+            return list(self._loaded)
+    
+    def flush(self):
+        """Write every loaded user's pending changes"""
+        with self._lock:
+            profiles = list(self._loaded.values())
+        for profile in profiles:
+            profile.manager.flush()
+    
+    def close(self):
+        """Save and close every loaded manager"""
+        with self._lock:
+            profiles = list(self._loaded.values())
+            self._loaded.clear()
+            self._evicted.clear()
+        for profile in profiles:
+            self._close(profile)
+    
+    def _close(self, profile):
+        """Save a profile and release its storage (such as a database connection)"""
+        profile.manager.close()
+        with self._lock:
+            # Taken back by _get while it was being saved; leave it open
+            if self._loaded.get(profile.user) is profile:
+                return
+            if hasattr(profile.manager.storage, 'close'):
+                profile.manager.storage.close()
+
+# Set in each worker process by _init_worker
+_worker_catalogue = None
+
+def _init_worker(catalogue_file):
+    """Open the shared catalogue once per worker and silence the managers"""
+    global _worker_catalogue
+    if catalogue_file:
+        # The file is memory-mapped read-only, so every worker shares the
+        # same page-cache pages instead of holding its own copy
+        from catalogue import FileCatalogue
+        _worker_catalogue = FileCatalogue(catalogue_file)
+    else:
+        from ai_recommender import AIRecommender
+        from catalogue import Catalogue
+        _worker_catalogue = Catalogue(AIRecommender.SERIES_DATABASE)
+    sys.stdout = open(os.devnull, 'w')
+
+def _recommend_chunk(paths, count):
+    """Recommend for a chunk of (user, data file) pairs in a worker process"""
+    from series_manager import SeriesManager
+    from ai_recommender import AIRecommender
+    results = []
+    for user, filename in paths:
+        manager = SeriesManager(storage=open_storage(filename))
+        manager.load_from_storage()
+        recommender = AIRecommender(manager, _worker_catalogue, cache_size=0)
+        results.append((user, recommender.get_recommendations(count)))
+        if hasattr(manager.storage, 'close'):
+            manager.storage.close()
+    return results
+
+def recommend_all(store, count=3, workers=None, catalogue_file=None, chunk_size=64):
+    """
+    Compute recommendations for every stored user across processes
+    
+    Pending changes are saved first, since the workers read the data
+    files directly. Users are handed out in chunks to keep the per-task
+    overhead low.
+    
+    Args:
+        store (ProfileStore): The profiles to recommend for
+        count (int): Recommendations per user
+        workers (int): Worker processes; None uses one per core
+        catalogue_file (str): A FileCatalogue to draw from, shared by all
+            workers; None uses the built-in catalogue
+        chunk_size (int): Users per task
+        
+    Yields:
+        tuple: (user, list of (name, episodes, description)) as chunks finish
+    """
+    store.flush()
+    
+    chunks, chunk = [], []
+    for user in store.users():
+        chunk.append((user, store.path(user)))
+        if len(chunk) == chunk_size:
+            chunks.append(chunk)
+            chunk = []
+    if chunk:
+        chunks.append(chunk)
+    
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(catalogue_file,)) as executor:
+        futures = [executor.submit(_recommend_chunk, chunk, count) for chunk in chunks]
+        for future in futures:
+            yield from future.result()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compute recommendations for every stored user.")
+    parser.add_argument('--root', default="profiles", help="profile store directory")
+    parser.add_argument('--shards', type=int, default=16)
+    parser.add_argument('--storage', choices=['json', 'journal', 'db'], default='json')
+    parser.add_argument('--count', type=int, default=3, help="recommendations per user")
+    parser.add_argument('--workers', type=int, help="worker processes (default: one per core)")
+    parser.add_argument('--catalogue', help="FileCatalogue to recommend from")
+    parser.add_argument('--output', help="JSON Lines file to write (default: stdout)")
+    args = parser.parse_args(argv)
+    
+    store = ProfileStore(args.root, args.shards, '.' + args.storage)
+    with contextlib.ExitStack() as stack:
+        out = stack.enter_context(open(args.output, 'w')) if args.output else sys.stdout
+        users = 0
+        for user, recommendations in recommend_all(store, args.count, args.workers, args.catalogue):
+            out.write(json.dumps({
+                'user': user,
+                'recommendations': [
+                    {'name': name, 'episodes': episodes, 'description': description}
+                    for name, episodes, description in recommendations
+                ]
+            }) + "\n")
+            users += 1
+    print(f"Recommended for {users} users", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
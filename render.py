@@ -0,0 +1,144 @@
+"""
+Text rendering for series lists - formats rows a page at a time
+
+Each page is formatted into one string and written with a single call,
+instead of a print() per line, and the writer can stop between pages:
+when a pause callback declines to continue, or on Ctrl-C.
+"""
+
+import sys
+
+def format_series(series, number=None):
+    """
+    Format a series the way Series.display_info shows it
+    
+    Args:
+        series (Series): The series to format
+        number (int): Position in a numbered list, shown above the block
+        
+    Returns:
+        str: The formatted block, starting with a blank line
+    """
+    watched = series.episodes_watched
+    total = series.total_episodes
+    progress = (watched / total) * 100 if total else 0
+    status = "COMPLETED" if watched >= total else "IN PROGRESS"
+    heading = f"\n{number}. {series.name}\n" if number is not None else ""
+    return (f"{heading}\n{series.name}\n"
+            f"   Genre: {series.genre}\n"
+            f"   Episodes: {watched}/{total}\n"
+            f"   Progress: {progress:.1f}% {status}\n"
+            f"   Remaining: {max(0, total - watched)} episodes\n")
+
+def ask_more(shown, total=None):
+    """
+    Ask on the terminal whether to show the next page
+    
+    Returns:
+        bool: False if the user typed q
+    """
+    where = f"{shown}/{total}" if total is not None else f"{shown}"
+    answer = input(f"-- {where} shown: Enter for more, q to stop -- ")
+    return answer.strip().lower() != 'q'
+
+class Renderer:
+    """Writes series to a text stream in buffered pages"""
+    
+    def __init__(self, file=None, page_size=50, pause=None):
+        """
+        Initialize the renderer
+        
+        Args:
+            file: Text stream to write to (default: sys.stdout at write time)
+            page_size (int): Series formatted per write
+            pause (callable): Called as pause(shown, total) after each
+                page but the last; returning False stops the listing.
+                None streams every page without stopping (see ask_more)
+        """
+        self.file = file
+        self.page_size = page_size
+        self.pause = pause
+    
+    def write(self, text):
+        """Write text and flush it"""
+        file = self.file or sys.stdout
+        file.write(text)
+        file.flush()
+    
+    def write_series(self, series_iter, total=None, start=1, numbered=True):
+        """
+        Write series a page at a time
+        
+        The iterable is consumed lazily, so a generator streams through
+        without the whole listing ever being formatted at once.
+        
+        Args:
+            series_iter (iterable): The Series objects to write
+            total (int): Number of series expected, for the pause prompt
+            start (int): Number of the first series in a numbered list
+            numbered (bool): Put the list position above each series
+            
+        Returns:
+            int: Number of series written
+        """
+        shown = 0
+        page = []
+        try:
+            for series in series_iter:
+                if page and len(page) == self.page_size:
+                    self.write(''.join(page))
+                    page = []
+                    if self.pause and not self.pause(shown, total):
+                        return shown
+                page.append(format_series(series, start + shown if numbered else None))
+                shown += 1
+            if page:
+                self.write(''.join(page))
+        except KeyboardInterrupt:
+            self.write("\n Listing stopped.\n")
+        return shown
+    
+    def show_collection(self, series_list, total, offset=0):
+        """
+        Write a numbered collection listing with its header and footer
+        
+        Args:
+            series_list (iterable): The Series objects to list
+            total (int): Number of series in the whole collection
+            offset (int): Position of the first series in the collection
+            
+        Returns:
+            int: Number of series written
+        """
+        if not total:
+            self.write("\n Your series list is empty! Add a series to get started.\n")
+            return 0
+        
+        rule = "=" * 60
+        self.write(f"\n{rule}\nYOUR SERIES COLLECTION\n{rule}\n")
+        shown = self.write_series(series_list, total, start=offset + 1)
+        self.write(f"\n{rule}\nTotal series: {total}\n{rule}\n")
+        return shown
+    
+    def show_search(self, name, results, suggestions=()):
+        """
+        Write search results, or the suggestions when nothing matched
+        
+        Args:
+            name (str): The search term
+            results (list): The matching Series objects
+            suggestions (iterable): Series to suggest when results is empty
+            
+        Returns:
+            int: Number of series written
+        """
+        if not results:
+            text = f"\n No series found matching '{name}'\n"
+            names = [s.name for s in suggestions]
+            if names:
+                text += f" Did you mean: {', '.join(names)}?\n"
+            self.write(text)
+            return 0
+        
+        self.write(f"\n Found {len(results)} series matching '{name}':\n")
+        return self.write_series(results, len(results), numbered=False)
@@ -0,0 +1,126 @@
+"""
+Reader-writer lock - many concurrent readers or a single writer
+"""
+
+import threading
+from contextlib import contextmanager
+
+class ReadWriteLock:
+    """
+    A lock that lets readers share access while writers get it alone
+    
+    Waiting writers are served before new readers, so a steady stream of
+    readers cannot starve them; when a writer finishes, the readers that
+    were already waiting go next, so a steady stream of writers cannot
+    starve readers either. Both sides are reentrant, and the thread
+    holding the write lock may also take the read lock. A thread holding
+    only the read lock cannot take the write lock (that would deadlock
+    against another reader doing the same), so it raises RuntimeError.
+    
+        lock = ReadWriteLock()
+        with lock.read():
+            ...
+        with lock.write():
+            ...
+    """
+    
+    def __init__(self):
+        """Initialize an unlocked lock"""
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0            # Threads holding the read lock
+        self._writer = None          # Ident of the thread holding the write lock
+        self._write_depth = 0
+        self._writers_waiting = 0
+        self._readers_waiting = 0
+        self._admit = 0              # Waiting readers let in ahead of writers
+        self._local = threading.local()
+    
+    def acquire_read(self):
+        """Take the read lock, waiting while a writer holds or wants it"""
+        local = self._local
+        depth = getattr(local, 'depth', 0)
+        if depth:
+            local.depth = depth + 1
+            return
+        
+        if self._writer == threading.get_ident():
+            # The writer already excludes everyone else; don't count it
+            local.shared = False
+        else:
+            with self._cond:
+                self._readers_waiting += 1
+                try:
+                    while self._writer is not None or (self._writers_waiting and not self._admit):
+                        self._cond.wait()
+                finally:
+                    self._readers_waiting -= 1
+                if self._admit:
+                    self._admit -= 1
+                self._readers += 1
+            local.shared = True
+        local.depth = 1
+    
+    def release_read(self):
+        """Release the read lock"""
+        local = self._local
+        if not getattr(local, 'depth', 0):
+            raise RuntimeError("release of an unheld read lock")
+        local.depth -= 1
+        if local.depth or not local.shared:
+            return
+        with self._cond:
+            self._readers -= 1
+            if not self._readers:
+                self._cond.notify_all()
+    
+    def acquire_write(self):
+        """Take the write lock, waiting until no reader or writer holds it"""
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me:
+                self._write_depth += 1
+                return
+            if getattr(self._local, 'depth', 0):
+                raise RuntimeError("cannot upgrade a read lock to a write lock")
+            
+            self._writers_waiting += 1
+            try:
+                while self._writer is not None or self._readers or self._admit:
+                    self._cond.wait()
+            finally:
+                self._writers_waiting -= 1
+            self._writer = me
+            self._write_depth = 1
+    
+    def release_write(self):
+        """Release the write lock"""
+        with self._cond:
+            if self._writer != threading.get_ident():
+                raise RuntimeError("release of an unheld write lock")
+            self._write_depth -= 1
+            if not self._write_depth:
+                self._writer = None
+                self._admit = self._readers_waiting
+                self._cond.notify_all()
+    
+    def is_writer(self):
+        """Check whether the calling thread holds the write lock"""
+        return self._writer == threading.get_ident()
+    
+    @contextmanager
+    def read(self):
+        """Hold the read lock for the duration of a with block"""
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+    
+    @contextmanager
+    def write(self):
+        """Hold the write lock for the duration of a with block"""
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
@@ -0,0 +1,110 @@
+"""
+Trigram index for fast substring and typo-tolerant search over series names
+"""
+
+import heapq
+
+class TrigramIndex:
+    """Inverted index from three-character substrings to series keys"""
+    
+    def __init__(self):
+        """Initialize an empty index"""
+        self._postings = {}  # Trigram -> set of keys containing it
+        self._order = {}     # Key -> insertion number, to keep results in order
+        self._next = 0
+    
+    def __len__(self):
+        return len(self._order)
+    
+    @staticmethod
+    def trigrams(text):
+        """Get the set of trigrams in a string"""
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+    
+    def add(self, key):
+        """
+        Index a series key
+        
+        Args:
+            key (str): The casefolded series name
+        """
+        if key in self._order:
+            return
+        self._order[key] = self._next
+        self._next += 1
+        for trigram in self.trigrams(key):
+            self._postings.setdefault(trigram, set()).add(key)
+    
+    def discard(self, key):
+        """Remove a series key from the index if present"""
+        if self._order.pop(key, None) is None:
+            return
+        for trigram in self.trigrams(key):
+            keys = self._postings[trigram]
+            keys.discard(key)
+            if not keys:
+                del self._postings[trigram]
+    
+    def clear(self):
+        """Remove all keys from the index"""
+        self.__init__()
+    
+    def search(self, term):
+        """
+        Find the keys containing a substring
+        
+        Args:
+            term (str): The casefolded text to search for
+            
+        Returns:
+            list: Matching keys in insertion order
+        """
+        if len(term) < 3:
+            # Too short to have a trigram; fall back to checking every key
+            return [key for key in self._order if term in key]
+        
+        # Intersect the smallest posting sets first
+        postings = sorted((self._postings.get(t, ()) for t in self.trigrams(term)), key=len)
+        if not postings[0]:
+            return []
+        candidates = set(postings[0])
+        for keys in postings[1:]:
+            candidates.intersection_update(keys)
+            if not candidates:
+                return []
+        
+        # Sharing every trigram does not make the term a substring
+        matches = [key for key in candidates if term in key]
+        return sorted(matches, key=self._order.__getitem__)
+    
+    def rank(self, term, limit=10, min_score=0.3):
+        """
+        Find the keys most similar to a term, tolerating typos
+        
+        Keys are scored by the Dice coefficient of their trigram sets, so a
+        typo only costs the few trigrams it touches.
+        
+        Args:
+            term (str): The casefolded text to search for
+            limit (int): Maximum number of keys to return
+            min_score (float): Minimum similarity between 0 and 1
+            
+        Returns:
+            list: (key, score) tuples, best match first
+        """
+        term_trigrams = self.trigrams(term)
+        if not term_trigrams:
+            return [(key, 1.0) for key in self.search(term)[:limit]]
+        
+        shared = {}
+        for trigram in term_trigrams:
+            for key in self._postings.get(trigram, ()):
+                shared[key] = shared.get(key, 0) + 1
+        
+        scored = []
+        for key, count in shared.items():
+            score = 2 * count / (len(term_trigrams) + len(self.trigrams(key)))
+            if score >= min_score:
+                scored.append((key, score))
+        
+        return heapq.nsmallest(limit, scored, key=lambda item: (-item[1], self._order[item[0]]))
@@ -0,0 +1,111 @@
+"""
+Streaming import and export of series collections as CSV or JSON Lines
+"""
+
+import csv
+import json
+import os
+
+FIELDS = ['name', 'total_episodes', 'genre', 'episodes_watched']
+
+FORMATS = {
+    '.csv': 'csv',
+    '.jsonl': 'jsonl',
+    '.ndjson': 'jsonl',
+}
+
+def detect_format(filename, fmt=None):
+    """
+    Work out the file format from an explicit name or the file extension
+    
+    Args:
+        filename (str): The file being read or written
+        fmt (str): 'csv' or 'jsonl', or None to use the extension
+        
+    Returns:
+        str: 'csv' or 'jsonl'
+    """
+    if fmt is None:
+        fmt = FORMATS.get(os.path.splitext(filename)[1].lower())
+    if fmt not in ('csv', 'jsonl'):
+        raise ValueError(f"Unsupported format for '{filename}': use .csv or .jsonl")
+    return fmt
+
+def read_records(filename, fmt=None):
+    """
+    Read series records one row at a time
+    
+    Args:
+        filename (str): The CSV or JSON Lines file to read
+        fmt (str): 'csv' or 'jsonl', or None to use the extension
+        
+    Yields:
+        tuple: (row number, record dict or None, error message or None)
+    """
+    fmt = detect_format(filename, fmt)
+    
+    with open(filename, 'r', newline='', encoding='utf-8') as f:
+        if fmt == 'csv':
+            # Row 1 is the header
+            for row, record in enumerate(csv.DictReader(f), 2):
+                yield row, record, None
+            return
+        
+        for row, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield row, None, f"invalid JSON: {e.msg}"
+                continue
+            if not isinstance(record, dict):
+                yield row, None, "expected a JSON object"
+                continue
+            yield row, record, None
+
+def series_to_dict(series):
+    """Convert a series to a JSON-serializable dict, with its progress"""
+    return {
+        'name': series.name,
+        'total_episodes': series.total_episodes,
+        'genre': series.genre,
+        'episodes_watched': series.episodes_watched,
+        'progress': series.get_progress(),
+        'completed': series.is_completed()
+    }
+
+def write_records(filename, series_list, fmt=None):
+    """
+    Write series to a file one row at a time
+    
+    The file is written under a temporary name and moved into place, so
+    an interrupted export never leaves a partial file behind.
+    
+    Args:
+        filename (str): The CSV or JSON Lines file to write
+        series_list (iterable): Series objects to write
+        fmt (str): 'csv' or 'jsonl', or None to use the extension
+        
+    Returns:
+        int: Number of series written
+    """
+    fmt = detect_format(filename, fmt)
+    count = 0
+    temp_filename = filename + '.tmp'
+    
+    with open(temp_filename, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f) if fmt == 'csv' else None
+        if writer:
+            writer.writerow(FIELDS)
+        
+        for series in series_list:
+            row = [series.name, series.total_episodes, series.genre, series.episodes_watched]
+            if writer:
+                writer.writerow(row)
+            else:
+                f.write(json.dumps(dict(zip(FIELDS, row)), ensure_ascii=False) + '\n')
+            count += 1
+    
+    os.replace(temp_filename, filename)
+    return count
@@ -1,161 +1,1005 @@
-"""
-SeriesManager class - Manages a collection of TV series
-"""
-
-from series import Series
-from json_storage import JSONStorage
-
-class SeriesManager:
-    """A class to manage multiple TV series"""
-    
-    def __init__(self, storage=None):
-        """
-        Initialize the SeriesManager
-        
-        Args:
-            storage (JSONStorage): Optional storage handler for persistence
-        """
-        self.series_list = []
-        self.storage = storage
-    
-    def add_series(self, name, total_episodes, genre="Unknown"):
-        """
-        Add a new series to the manager
-        
-        Args:
-            name (str): The name of the series
-            total_episodes (int): Total number of episodes
-            genre (str): The genre of the series
-        """
-        # Check if series already exists
-        if self.find_series(name):
-            print(f"'{name}' already exists in your list!")
-            return False
-        
-        new_series = Series(name, total_episodes, genre)
-        self.series_list.append(new_series)
-        self._save()
-        return True
-    
-    def find_series(self, name):
-        """
-        Find a series by name
-        
-        Args:
-            name (str): The name of the series to find
-            
-        Returns:
-            Series object if found, None otherwise
-        """
-        for series in self.series_list:
-            if series.name.lower() == name.lower():
-                return series
-        return None
-    
-    def view_all_series(self):
-        """Display all series in the list"""
-        if not self.series_list:
-            print("\n Your series list is empty! Add a series to get started.")
-            return
-        
-        print("\n" + "="*60)
-        print("YOUR SERIES COLLECTION")
-        print("="*60)
-        
-        for i, series in enumerate(self.series_list, 1):
-            print(f"\n{i}. {series.name}")
-            series.display_info()
-        
-        print("\n" + "="*60)
-        print(f"Total series: {len(self.series_list)}")
-        print("="*60)
-    
-    def update_episodes(self, name, episodes_watched):
-        """
-        Update the episodes watched for a series
-        
-        Args:
-            name (str): The name of the series
-            episodes_watched (int): Number of episodes watched
-        """
-        series = self.find_series(name)
-        
-        if not series:
-            print(f"❌ Series '{name}' not found!")
-            return False
-        
-        if series.update_episodes_watched(episodes_watched):
-            print(f"Updated '{name}': {episodes_watched}/{series.total_episodes} episodes watched")
-            self._save()
-            return True
-        
-        return False
-    
-    def delete_series(self, name):
-        """
-        Delete a series from the manager
-        
-        Args:
-            name (str): The name of the series to delete
-        """
-        series = self.find_series(name)
-        
-        if not series:
-            print(f" Series '{name}' not found!")
-            return False
-        
-        self.series_list.remove(series)
-        print(f" '{name}' has been deleted from your list.")
-        self._save()
-        return True
-    
-    def search_series(self, name):
-        """
-        Search for a series by name
-        
-        Args:
-            name (str): The name (or partial name) to search for
-        """
-        results = []
-        search_term = name.lower()
-        
-        for series in self.series_list:
-            if search_term in series.name.lower():
-                results.append(series)
-        
-        if not results:
-            print(f"\n No series found matching '{name}'")
-            return
-        
-        print(f"\n Found {len(results)} series matching '{name}':")
-        for series in results:
-            series.display_info()
-    
-    def get_statistics(self):
-        """Get statistics about the series collection"""
-        if not self.series_list:
-            return None
-        
-        total_series = len(self.series_list)
-        completed = sum(1 for s in self.series_list if s.is_completed())
-        total_episodes = sum(s.total_episodes for s in self.series_list)
-        watched_episodes = sum(s.episodes_watched for s in self.series_list)
-        
-        return {
-            'total_series': total_series,
-            'completed_series': completed,
-            'total_episodes': total_episodes,
-            'watched_episodes': watched_episodes,
-            'overall_progress': (watched_episodes / total_episodes * 100) if total_episodes > 0 else 0
-        }
-    
-    def _save(self):
-        """Save data to JSON file if storage is configured"""
-        if self.storage:
-            self.storage.save_series(self.series_list)
-    
-    def load_from_storage(self):
-        """Load data from JSON file"""
-        if self.storage:
-            self.series_list = self.storage.load_series()
-
+"""
+SeriesManager class - Manages a collection of TV series
+"""
+
+import atexit
+import functools
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from series import Series
+from render import Renderer
+from json_storage import JSONStorage
+from columnar_store import ColumnarSeriesStore, SeriesView
+from search_index import TrigramIndex
+from ordered_index import OrderedViews
+from watch_history import DAY, Rollup, day_of, pace
+from rwlock import ReadWriteLock
+import series_io
+
+def _synchronized(method):
+    """
+    Run a SeriesManager method that changes the collection
+    
+    The method runs alone, holding the write side of the collection lock.
+    Its changes are written to storage after the lock is released, so
+    readers are not held up by the write.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        self._ensure_loaded()
+        with self._rw.write():
+            result = method(self, *args, **kwargs)
+        if not self._rw.is_writer():
+            self._settle()
+        return result
+    return wrapper
+
+def _reading(method):
+    """Run a SeriesManager method that only reads, alongside other readers"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        # A deferred load writes, so it must happen before the read lock
+        self._ensure_loaded()
+        with self._rw.read():
+            return method(self, *args, **kwargs)
+    return wrapper
+
+class SeriesManager:
+    """A class to manage multiple TV series"""
+    
+    def __init__(self, storage=None, compact=False, write_behind=False,
+                 flush_delay=1.0, flush_every=100):
+        """
+        Initialize the SeriesManager
+        
+        Args:
+            storage (JSONStorage): Optional storage handler for persistence
+            compact (bool): Keep the collection in a ColumnarSeriesStore to
+                save memory on very large collections
+            write_behind (bool): Save changes from a background thread
+                instead of on every call, coalescing them into fewer writes
+            flush_delay (float): Seconds a change may wait before a
+                write-behind flush
+            flush_every (int): Number of pending changes that triggers a
+                write-behind flush without waiting for flush_delay
+        """
+        self.compact = compact
+        # Casefolded name -> Series; dicts keep insertion order, so this
+        # doubles as the ordered collection with O(1) lookup and delete
+        self._series = self._new_store()
+        # Running totals for get_statistics, kept in step with every change
+        self._totals = self._new_totals()
+        self._genre_totals = {}
+        # Trigram index over the keys for search_series; built on the
+        # first search rather than on load (see _names)
+        self._name_index = None
+        # "What's next" orderings for top_series; also built on first use
+        self._ordered = None
+        # Daily and weekly episodes across the whole collection, summed
+        # from every series' watch history on first use
+        self._watch_totals = None
+        # Bumped on every change so caches built from the collection
+        # (such as AIRecommender's) can tell when they are stale
+        self.version = 0
+        # Casefolded name -> when it last changed (whole seconds, as watch
+        # events are dated) since the last take_changes, for sync; None
+        # until someone asks, or after the collection is replaced
+        self._changes = None
+        self.storage = storage
+        # Storages that can answer queries themselves (SQLiteStorage) hold
+        # the collection; nothing is loaded into memory in that mode
+        self._db = storage if getattr(storage, 'supports_queries', False) else None
+        # Set by load_from_storage(defer=True) until the collection is used
+        self._load_pending = False
+        
+        # Readers share the collection; changes take it alone. Lock order:
+        # _io_lock, then _rw, then _lock; _lock is only held briefly
+        self._rw = ReadWriteLock()
+        # Only one thread writes to storage at a time
+        self._io_lock = threading.Lock()
+        # Guards _name_index and _ordered while a reader builds them
+        self._index_lock = threading.Lock()
+        
+        # Write-behind state: changes not yet written, guarded by _lock
+        self.write_behind = write_behind
+        self.flush_delay = flush_delay
+        self.flush_every = flush_every
+        self._lock = threading.RLock()
+        self._flush_wanted = threading.Condition(self._lock)
+        self._pending = []
+        self._dirty_since = None
+        self._batch_depth = 0
+        self._flusher = None
+        self._closing = False
+    
+    @staticmethod
+    def _key(name):
+        """Normalize a series name for case-insensitive lookups"""
+        return name.casefold()
+    
+    @property
+    @_reading
+    def series_list(self):
+        """List of all series in insertion order"""
+        return list(self._all_series())
+    
+    @series_list.setter
+    @_synchronized
+    def series_list(self, series_list):
+        # Replacing the collection supersedes any deferred load
+        self._load_pending = False
+        self._series = self._new_store()
+        self._totals = self._new_totals()
+        self._genre_totals = {}
+        self._name_index = None
+        self._ordered = None
+        self._watch_totals = None
+        self._changes = None
+        self.version += 1
+        for series in series_list:
+            key = self._key(series.name)
+            # Keep the first entry when names collide, as find_series did
+            if key not in self._series:
+                self._series[key] = series
+                self._track(series)
+    
+    @_synchronized
+    def add_series(self, name, total_episodes, genre="Unknown"):
+        """
+        Add a new series to the manager
+        
+        Args:
+            name (str): The name of the series
+            total_episodes (int): Total number of episodes
+            genre (str): The genre of the series
+        """
+        # Check if series already exists
+        if self.find_series(name):
+            print(f"'{name}' already exists in your list!")
+            return False
+        
+        self._insert(Series(name, total_episodes, genre))
+        return True
+    
+    @_synchronized
+    def bulk_add(self, records):
+        """
+        Add many series in one pass and save them once
+        
+        Each record is validated and checked against the name index
+        (including names added earlier in the same call). Bad rows are
+        reported instead of stopping the load.
+        
+        Args:
+            records (iterable): Dicts with 'name' and 'total_episodes', and
+                optionally 'genre' and 'episodes_watched'
+                
+        Returns:
+            dict: 'added' and 'duplicates' counts, and 'errors' as a list
+            of (row number, message) tuples
+        """
+        return self._bulk_add((row, record, None) for row, record in enumerate(records, 1))
+    
+    @_synchronized
+    def import_file(self, filename, fmt=None):
+        """
+        Import series from a CSV or JSON Lines file
+        
+        The file is streamed row by row and saved once at the end. CSV
+        files need a header row naming the columns. Bad rows are
+        reported and skipped, but if reading the file fails part-way
+        (an undecodable byte, say) the error is raised and nothing is
+        added, whatever the storage.
+        
+        Args:
+            filename (str): The file to import
+            fmt (str): 'csv' or 'jsonl', or None to use the file extension
+            
+        Returns:
+            dict: The report from bulk_add
+        """
+        return self._bulk_add(series_io.read_records(filename, fmt))
+    
+    @_reading
+    def export_file(self, filename, fmt=None):
+        """
+        Export all series to a CSV or JSON Lines file
+        
+        Args:
+            filename (str): The file to write
+            fmt (str): 'csv' or 'jsonl', or None to use the file extension
+            
+        Returns:
+            int: Number of series exported
+        """
+        return series_io.write_records(filename, self._all_series(), fmt)
+    
+    @_reading
+    def find_series(self, name):
+        """
+        Find a series by name
+        
+        Args:
+            name (str): The name of the series to find
+            
+        Returns:
+            Series object if found, None otherwise
+        """
+        if self._db:
+            return self._db.find_series(name)
+        return self._series.get(self._key(name))
+    
+    @_reading
+    def count_series(self):
+        """Get the number of series in the collection"""
+        return self._count()
+    
+    @_reading
+    def list_series(self, offset=0, limit=None):
+        """
+        Get a slice of the collection without printing anything
+        
+        Args:
+            offset (int): Number of series to skip
+            limit (int): Maximum number of series to return; None for all
+            
+        Returns:
+            list: Series objects in insertion order
+        """
+        if self._db:
+            return list(self._db.iter_series(offset, limit))
+        stop = None if limit is None else offset + limit
+        return list(itertools.islice(self._series.values(), offset, stop))
+    
+    def view_all_series(self, offset=0, limit=None, renderer=None):
+        """
+        Display the series in the list
+        
+        The series are fetched one page at a time, each under the lock,
+        and written afterwards, so a slow terminal or a paused pager does
+        not hold up writers, and a listing stopped early never loads the
+        rest of the collection.
+        
+        Args:
+            offset (int): Number of series to skip
+            limit (int): Maximum number of series to show; None for all
+            renderer (Renderer): Where and how to write; None writes
+                everything to stdout
+        """
+        renderer = renderer or Renderer()
+        total = self.count_series()
+        renderer.show_collection(self._pages(offset, limit, renderer.page_size), total, offset)
+    
+    def _pages(self, offset, limit, page_size):
+        """Yield a slice of the collection, fetching page_size series at a time"""
+        position = None
+        shown = 0
+        while limit is None or shown < limit:
+            size = page_size if limit is None else min(page_size, limit - shown)
+            page, position = self._next_page(position, offset, size)
+            yield from page
+            shown += len(page)
+            if len(page) < size:
+                return
+    
+    @_reading
+    def _next_page(self, position, offset, size):
+        """
+        Fetch the page after a position, for _pages
+        
+        Each page carries on where the last one stopped instead of
+        skipping offset + shown series again, so a whole listing costs
+        one pass. In database mode the position is the last row id seen;
+        in memory it is a snapshot of the keys taken on the first page,
+        from which series deleted since are skipped.
+        
+        Args:
+            position: As returned with the previous page; None for the first
+            offset (int): Number of series to skip before the first page
+            size (int): Maximum number of series on the page
+            
+        Returns:
+            tuple: (list of Series objects, position after the page)
+        """
+        if self._db:
+            after = position or 0
+            return self._db.page_series(after, size, offset if position is None else 0)
+        if position is None:
+            position = (list(itertools.islice(self._series, offset, None)), 0)
+        keys, start = position
+        page = []
+        while len(page) < size and start < len(keys):
+            series = self._series.get(keys[start])
+            start += 1
+            if series is not None:
+                page.append(series)
+        return page, (keys, start)
+    
+    @_synchronized
+    def update_episodes(self, name, episodes_watched):
+        """
+        Update the episodes watched for a series
+        
+        Args:
+            name (str): The name of the series
+            episodes_watched (int): Number of episodes watched
+        """
+        series = self.find_series(name)
+        
+        if not series:
+            print(f"❌ Series '{name}' not found!")
+            return False
+        
+        # Take the old counts out of the running totals, then add the new ones
+        self._track(series, -1)
+        recorded = len(series.history) if series.history else 0
+        updated = series.update_episodes_watched(episodes_watched)
+        self._track(series)
+        if self._watch_totals is not None and series.history:
+            for timestamp, delta in series.history.events(recorded):
+                self._watch_totals.add(timestamp, delta)
+        
+        if updated:
+            self.version += 1
+            print(f"Updated '{name}': {episodes_watched}/{series.total_episodes} episodes watched")
+            self._save('update', series)
+            return True
+        
+        return False
+    
+    @_synchronized
+    def delete_series(self, name):
+        """
+        Delete a series from the manager
+        
+        Args:
+            name (str): The name of the series to delete
+        """
+        series = self._remove(name)
+        
+        if not series:
+            print(f" Series '{name}' not found!")
+            return False
+        
+        self.version += 1
+        print(f" '{name}' has been deleted from your list.")
+        self._save('delete', series)
+        return True
+    
+    def search_series(self, name, offset=0, limit=None, renderer=None):
+        """
+        Search for a series by name and display the results
+        
+        Args:
+            name (str): The name (or partial name) to search for
+            offset (int): Number of matches to skip
+            limit (int): Maximum number of matches to show; None for all
+            renderer (Renderer): Where and how to write; None writes
+                everything to stdout
+        """
+        results = self.match_series(name, offset=offset, limit=limit)
+        suggestions = self.match_series(name, fuzzy=True, limit=3) if not results else ()
+        (renderer or Renderer()).show_search(name, results, suggestions)
+    
+    @_reading
+    def match_series(self, name, fuzzy=False, limit=None, offset=0):
+        """
+        Find series by name without printing anything
+        
+        Args:
+            name (str): The name (or partial name) to search for
+            fuzzy (bool): Rank series by name similarity instead of
+                requiring an exact substring, to tolerate typos
+            limit (int): Maximum number of series to return
+            offset (int): Number of matches to skip
+            
+        Returns:
+            list: Matching Series objects; in insertion order, or best
+            match first when fuzzy
+        """
+        term = self._key(name)
+        stop = None if limit is None else offset + limit
+        
+        if self._db:
+            # Only substring search can be pushed down to the database
+            return self._db.search_series(name)[offset:stop]
+        
+        if fuzzy:
+            keys = [key for key, _ in self._names().rank(term, stop or 10)][offset:]
+        else:
+            keys = self._names().search(term)[offset:stop]
+        return [self._series[key] for key in keys]
+    
+    @_reading
+    def top_series(self, order='closest', count=10, genre=None):
+        """
+        Get the first series of an ordered view
+        
+        The views are kept up to date as series are added, updated and
+        deleted, so this costs O(count log count) rather than a sort.
+        
+        Args:
+            order (str): 'closest' for started series nearest completion,
+                or 'remaining' for unfinished series with the most
+                episodes left
+            count (int): Number of series to return
+            genre (str): Only series of this genre
+            
+        Returns:
+            list: Series objects in view order
+            
+        Raises:
+            ValueError: For an unknown order
+        """
+        if order not in OrderedViews.VIEWS:
+            raise ValueError(f"unknown order: {order!r}")
+        if self._db:
+            return self._db.top_series(order, count, genre)
+        return [self._series[key] for key in self._views().top(order, count, genre)]
+    
+    @_reading
+    def get_pace(self, name=None, weeks=4, now=None):
+        """
+        Get the watching pace and the expected finish date
+        
+        Answered from the daily and weekly rollups kept alongside each
+        series' watch history, not by scanning the watch events.
+        
+        Args:
+            name (str): A series; None for the whole collection
+            weeks (int): Length of the trailing window, in weeks
+            now (float): The current time; defaults to now
+            
+        Returns:
+            dict: As returned by watch_history.pace, or None if the
+            series is not found
+        """
+        if name is not None:
+            series = self.find_series(name)
+            if series is None:
+                return None
+            remaining = max(0, series.total_episodes - series.episodes_watched)
+        elif self._db:
+            remaining = self._db.remaining_episodes()
+        else:
+            remaining = self._totals['remaining']
+        
+        if self._db:
+            today = day_of(time.time() if now is None else now)
+            rollup = self._db.watch_rollup((today - 7 * weeks + 1) * DAY, name)
+        elif name is not None:
+            rollup = series.history.rollup if series.history else Rollup()
+        else:
+            rollup = self._watch_rollup()
+        return pace(rollup, remaining, weeks, now)
+    
+    @_reading
+    def get_statistics(self):
+        """Get statistics about the series collection"""
+        if self._db:
+            return self._db.get_statistics()
+        
+        if not self._series:
+            return None
+        
+        stats = self._format_totals(self._totals)
+        stats['genres'] = {
+            genre: self._format_totals(totals)
+            for genre, totals in self._genre_totals.items()
+        }
+        return stats
+    
+    @staticmethod
+    def _new_totals():
+        """Create zeroed running totals"""
+        return {'series': 0, 'completed': 0, 'total_episodes': 0, 'watched_episodes': 0,
+                'remaining': 0}
+    
+    @staticmethod
+    def _format_totals(totals):
+        """Turn running totals into the statistics dict get_statistics returns"""
+        total_episodes = totals['total_episodes']
+        watched_episodes = totals['watched_episodes']
+        return {
+            'total_series': totals['series'],
+            'completed_series': totals['completed'],
+            'total_episodes': total_episodes,
+            'watched_episodes': watched_episodes,
+            'overall_progress': (watched_episodes / total_episodes * 100) if total_episodes > 0 else 0
+        }
+    
+    def _track(self, series, sign=1):
+        """
+        Add a series to the running totals, or remove it with sign=-1
+        
+        Args:
+            series (Series): The series being added or removed
+            sign (int): 1 to add the series, -1 to remove it
+        """
+        if self._db:
+            return
+        
+        if self._ordered is not None:
+            if sign > 0:
+                self._ordered.add(self._key(series.name), series)
+            else:
+                self._ordered.discard(self._key(series.name))
+        
+        completed = sign if series.is_completed() else 0
+        genre_totals = self._genre_totals.get(series.genre)
+        if genre_totals is None:
+            genre_totals = self._genre_totals[series.genre] = self._new_totals()
+        
+        for totals in (self._totals, genre_totals):
+            totals['series'] += sign
+            totals['completed'] += completed
+            totals['total_episodes'] += sign * series.total_episodes
+            totals['watched_episodes'] += sign * series.episodes_watched
+            totals['remaining'] += sign * max(0, series.total_episodes - series.episodes_watched)
+        
+        if not genre_totals['series']:
+            del self._genre_totals[series.genre]
+    
+    def _new_store(self):
+        """Create an empty name -> Series mapping"""
+        return ColumnarSeriesStore() if self.compact else {}
+    
+    def _count(self):
+        """Get the number of series in the collection (call with the lock held)"""
+        if self._db:
+            return self._db.count_series()
+        return len(self._series)
+    
+    def _all_series(self):
+        """Iterate over all series in insertion order (call with the lock held)"""
+        if self._db:
+            return self._db.iter_series()
+        return iter(self._series.values())
+    
+    def _names(self):
+        """Get the trigram index over the keys, building it on first use"""
+        if self._name_index is None:
+            # Several readers may get here at once; build the index once
+            with self._index_lock:
+                if self._name_index is None:
+                    index = TrigramIndex()
+                    for key in self._series:
+                        index.add(key)
+                    self._name_index = index
+        return self._name_index
+    
+    def _watch_rollup(self):
+        """Get the collection's watch rollups, building them on first use"""
+        if self._watch_totals is None:
+            with self._index_lock:
+                if self._watch_totals is None:
+                    rollup = Rollup()
+                    for series in self._series.values():
+                        if series.history:
+                            rollup.merge(series.history.rollup)
+                    self._watch_totals = rollup
+        return self._watch_totals
+    
+    def _views(self):
+        """Get the ordered views, building them on first use"""
+        if self._ordered is None:
+            with self._index_lock:
+                if self._ordered is None:
+                    series = self._series
+                    self._ordered = OrderedViews.build((key, series[key]) for key in series)
+        return self._ordered
+    
+    @_synchronized
+    def take_changes(self):
+        """
+        Get the names changed since the last call, and start tracking anew
+        
+        Lets sync.Replica find what changed, and when, without a pass
+        over the collection.
+        
+        Returns:
+            dict: Casefolded names of series added, updated or deleted ->
+            when each last changed, in whole seconds since the epoch; or
+            None if changes were not being tracked (on the first call, or
+            after the collection was reloaded), so anything may have changed
+        """
+        changes, self._changes = self._changes, {}
+        return changes
+    
+    @_synchronized
+    def replace_series(self, series_list=(), deleted=()):
+        """
+        Put series in place of any of the same name, and delete others
+        
+        Applies another replica's changes during a sync. Nothing is
+        printed and no watch events are recorded: incoming series bring
+        their own history. Everything is saved together.
+        
+        Args:
+            series_list (iterable): Series to add or overwrite
+            deleted (iterable): Names of series to delete if present
+            
+        Returns:
+            int: Number of series added, overwritten or deleted
+        """
+        changed = 0
+        with self.batch():
+            for name in deleted:
+                series = self._remove(name)
+                if series:
+                    self.version += 1
+                    self._save('delete', series)
+                    changed += 1
+            for series in series_list:
+                old = self._remove(series.name)
+                if old:
+                    self._save('delete', old)
+                self._insert(series)
+                changed += 1
+        return changed
+    
+    def _remove(self, name):
+        """
+        Take a series out of the collection and the in-memory indexes
+        
+        In database mode nothing changes until the 'delete' is saved.
+        
+        Returns:
+            Series: The series removed, or None if there was none
+        """
+        if self._db:
+            return self._db.find_series(name)
+        key = self._key(name)
+        series = self._series.pop(key, None)
+        if series:
+            if self._name_index is not None:
+                self._name_index.discard(key)
+            if self._watch_totals is not None and series.history:
+                self._watch_totals.merge(series.history.rollup, -1)
+            self._track(series, -1)
+        return series
+    
+    def _insert(self, series):
+        """Add a series known not to be in the collection yet"""
+        if not self._db:
+            key = self._key(series.name)
+            self._series[key] = series
+            if self._name_index is not None:
+                self._name_index.add(key)
+            if self._watch_totals is not None and series.history:
+                self._watch_totals.merge(series.history.rollup)
+            self._track(series)
+        self.version += 1
+        self._save('add', series)
+    
+    def _bulk_add(self, rows):
+        """
+        Validate, dedupe and add rows inside a single batch
+        
+        Args:
+            rows (iterable): (row number, record, error) tuples
+            
+        Returns:
+            dict: 'added' and 'duplicates' counts and per-row 'errors'
+        """
+        report = {'added': 0, 'duplicates': 0, 'errors': []}
+        added = []
+        
+        with self.batch():
+            try:
+                for row, record, error in rows:
+                    if error is None:
+                        try:
+                            series = self._series_from_record(record)
+                        except (KeyError, TypeError, ValueError) as e:
+                            error = str(e)
+                    
+                    if error is not None:
+                        report['errors'].append((row, error))
+                        continue
+                    
+                    if self.find_series(series.name):
+                        report['duplicates'] += 1
+                        continue
+                    
+                    self._insert(series)
+                    added.append(series)
+                    report['added'] += 1
+            except BaseException:
+                # The database rolls the batch back; do the same in memory
+                self._unadd(added)
+                raise
+        
+        return report
+    
+    def _unadd(self, added):
+        """
+        Take back series added earlier in the current batch, unsaved
+        
+        Their 'add' changes are the last ones queued: the write lock is
+        held throughout, so nobody else has queued any since.
+        """
+        if self._db or not added:
+            return
+        for series in added:
+            self._remove(series.name)
+        self.version += 1
+        if self.storage:
+            with self._lock:
+                del self._pending[-len(added):]
+    
+    @staticmethod
+    def _series_from_record(record):
+        """
+        Build a Series from an imported record, validating each field
+        
+        Raises:
+            ValueError: If a field is missing or invalid
+        """
+        name = str(record.get('name') or '').strip()
+        if not name:
+            raise ValueError("series name cannot be empty")
+        
+        try:
+            total_episodes = int(record.get('total_episodes'))
+        except (TypeError, ValueError):
+            raise ValueError(f"'{name}': total episodes must be a number")
+        if total_episodes <= 0:
+            raise ValueError(f"'{name}': total episodes must be positive")
+        
+        try:
+            episodes_watched = int(record.get('episodes_watched') or 0)
+        except (TypeError, ValueError):
+            raise ValueError(f"'{name}': episodes watched must be a number")
+        if episodes_watched < 0:
+            raise ValueError(f"'{name}': episodes watched cannot be negative")
+        
+        series = Series(name, total_episodes, str(record.get('genre') or '').strip() or 'Unknown')
+        series.episodes_watched = episodes_watched
+        return series
+    
+    @contextmanager
+    def batch(self):
+        """
+        Group changes into a single save
+        
+        Inside the block changes are only queued; they are written
+        together when the outermost batch exits.
+        
+            with manager.batch():
+                for name, episodes in titles:
+                    manager.add_series(name, episodes)
+        """
+        with self._lock:
+            self._batch_depth += 1
+        try:
+            if self._db:
+                # The database applies the changes in one transaction
+                with self._db.batch():
+                    yield self
+            else:
+                yield self
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+            # Inside a change (such as import_file) the change settles it
+            if not self._rw.is_writer():
+                self._settle()
+    
+    def flush(self):
+        """
+        Write any queued changes to storage now
+        
+        Storage writes go through here one at a time. What they write is
+        copied while the collection is held for reading, and written
+        after it is released, so changes go on during a slow write. A
+        failed write leaves the changes queued for the next flush.
+        
+        Must not be called while holding the write lock.
+        
+        Returns:
+            bool: True if there was nothing to write or the write succeeded
+        """
+        if not self._pending:
+            return True
+        
+        with self._io_lock:
+            with self._rw.read():
+                with self._lock:
+                    changes, self._pending = self._pending, []
+                    self._dirty_since = None
+                if not changes:
+                    return True
+                if self._appends(changes):
+                    copies, series_list = [(op, self._copy(s)) for op, s in changes], None
+                else:
+                    copies, series_list = changes, [self._copy(s) for s in self._series.values()]
+            if self._write(copies, series_list):
+                return True
+            # Put the changes back in front of any queued since, so the
+            # next flush retries them instead of losing them
+            with self._lock:
+                self._pending[:0] = changes
+                if self._dirty_since is None:
+                    self._dirty_since = time.monotonic()
+            return False
+    
+    def close(self):
+        """
+        Stop the write-behind thread and write any queued changes
+        
+        Changes may still arrive meanwhile (a ProfileStore can hand an
+        evicted profile back while it closes). Those queued after the
+        final flush get a new write-behind thread once closing is over.
+        """
+        with self._lock:
+            self._closing = True
+            self._flush_wanted.notify()
+            flusher, self._flusher = self._flusher, None
+        if flusher is not None:
+            flusher.join()
+            atexit.unregister(self.close)
+        self.flush()
+        with self._lock:
+            self._closing = False
+            if self._pending and self.write_behind:
+                self._start_flusher()
+    
+    def _save(self, op=None, series=None):
+        """
+        Save data to storage if storage is configured
+        
+        Storages that provide append_changes (such as JournalStorage) only
+        record the changes themselves; others rewrite the whole collection.
+        The change is queued here, under the write lock, and written by
+        _settle once the lock is released.
+        
+        Args:
+            op (str): The change being saved: 'add', 'update' or 'delete'
+            series (Series): The series that changed
+        """
+        if self._changes is not None and series is not None:
+            self._changes[self._key(series.name)] = int(time.time())
+        
+        if not self.storage:
+            return
+        
+        # A query-capable storage is read back directly, so it must not lag;
+        # the write lock already makes this the only writer
+        if self._db:
+            self._write([(op, series)] if op else [])
+            return
+        
+        # A view reads its row when written, and the row may be gone by
+        # then; queue a copy of the series as it is now
+        if isinstance(series, SeriesView):
+            series = series.detach()
+        
+        with self._lock:
+            self._pending.append((op, series))
+            if self._dirty_since is None:
+                self._dirty_since = time.monotonic()
+    
+    def _settle(self):
+        """
+        Write queued changes, or hand them to the write-behind thread
+        
+        Called once a change has released the collection lock. Inside
+        batch() nothing happens until the outermost batch exits.
+        """
+        if not self._pending or self._batch_depth:
+            return
+        
+        if not self.write_behind:
+            self.flush()
+            return
+        
+        with self._lock:
+            # While closing, a new thread would stop at once; close()
+            # starts one itself if changes are left once it is done
+            if self._closing:
+                return
+            if self._flusher is None or not self._flusher.is_alive():
+                self._start_flusher()
+            self._flush_wanted.notify()
+    
+    def _start_flusher(self):
+        """Start the write-behind thread; called with _lock held"""
+        self._flusher = threading.Thread(
+            target=self._flush_loop, name="SeriesManager-flusher", daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+    
+    def _appends(self, changes):
+        """Whether the storage can record changes without rewriting everything"""
+        return (bool(changes) and all(op for op, _ in changes) and
+                (hasattr(self.storage, 'append_changes') or hasattr(self.storage, 'append_change')))
+    
+    def _write(self, changes, series_list=None):
+        """
+        Write changes to storage
+        
+        Args:
+            changes (list): (op, series) pairs in the order they happened
+            series_list (list): What a full rewrite saves; None for the
+                collection itself
+                
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        if self._appends(changes):
+            if hasattr(self.storage, 'append_changes'):
+                return self.storage.append_changes(changes)
+            return all([self.storage.append_change(op, s) for op, s in changes])
+        return self.storage.save_series(self._series.values() if series_list is None else series_list)
+    
+    @staticmethod
+    def _copy(series):
+        """Get a plain copy of a series that shares its history, which only grows"""
+        if isinstance(series, SeriesView):
+            return series.detach()
+        copy = Series(series.name, series.total_episodes, series.genre)
+        copy.episodes_watched = series.episodes_watched
+        copy.history = series.history
+        return copy
+    
+    def _flush_loop(self):
+        """Background thread that flushes queued changes in write-behind mode"""
+        while True:
+            with self._lock:
+                if self._closing:
+                    return
+                if not self._pending or self._batch_depth:
+                    self._flush_wanted.wait()
+                    continue
+                
+                # Let changes pile up until the delay passes or enough queue
+                remaining = self._dirty_since + self.flush_delay - time.monotonic()
+                if remaining > 0 and len(self._pending) < self.flush_every:
+                    self._flush_wanted.wait(remaining)
+                    continue
+            
+            # Flush without _lock so changes can keep queueing meanwhile
+            if not self.flush():
+                # Storage is failing; wait before retrying rather than spin
+                with self._lock:
+                    if not self._closing:
+                        self._flush_wanted.wait(self.flush_delay)
+    
+    def load_from_storage(self, defer=False):
+        """
+        Load data from JSON file
+        
+        Args:
+            defer (bool): Wait until the collection is first used, so
+                startup does not pay for parsing the data file
+        """
+        # A query-capable storage already holds the collection
+        if not self.storage or self._db:
+            return
+        
+        if defer:
+            self._load_pending = True
+            return
+        
+        with self._rw.write():
+            self._load_pending = False
+            # Stream series straight into the index when the storage can
+            if hasattr(self.storage, 'iter_series'):
+                self.series_list = self.storage.iter_series()
+            else:
+                self.series_list = self.storage.load_series()
+    
+    def _ensure_loaded(self):
+        """Run a deferred load_from_storage before the collection is used"""
+        if self._load_pending:
+            with self._rw.write():
+                if self._load_pending:
+                    # The deferred load brings in what was there all along,
+                    # so changes already being tracked stay tracked
+                    changes = self._changes
+                    self.load_from_storage()
+                    self._changes = changes
+
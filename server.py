@@ -0,0 +1,389 @@
+"""
+TV Series Assistant HTTP service - serves many users' profiles from one process
+
+Each user gets their own data file in a sharded ProfileStore and their
+own SeriesManager, opened on the first request for that user and closed
+again when too many users are loaded. Requests are parsed on an asyncio
+event loop; manager calls, which may load or save data, run on a thread
+pool so the loop keeps serving other requests.
+Managers use write-behind, so a burst of changes costs one save.
+
+Usage:
+    python server.py [--data-dir DIR] [--host HOST] [--port PORT] [--max-loaded N]
+    
+Endpoints (JSON in and out):
+    GET    /users/<user>/series                  list all series
+    POST   /users/<user>/series                  add {"name", "total_episodes", "genre"}
+    GET    /users/<user>/series/<name>           get one series
+    PATCH  /users/<user>/series/<name>           update {"episodes_watched"}
+    DELETE /users/<user>/series/<name>           delete a series
+    GET    /users/<user>/search?q=<text>         search, with &fuzzy=1 and &limit=N
+    GET    /users/<user>/next?order=closest      what to watch next (or order=remaining),
+                                                 with &genre=<genre> and &count=N
+    GET    /users/<user>/pace                    watching pace and finish date, with
+                                                 &name=<series> and &weeks=N
+    GET    /users/<user>/stats                   collection statistics
+    GET    /users/<user>/recommendations         AI recommendations, with &count=N
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import signal
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from series_io import series_to_dict
+from profile_store import ProfileStore
+
+REASONS = {
+    200: 'OK',
+    201: 'Created',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    409: 'Conflict',
+    413: 'Payload Too Large',
+    500: 'Internal Server Error',
+}
+
+MAX_BODY = 1 << 20
+
+class HTTPError(Exception):
+    """An error that becomes a JSON error response"""
+    
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+class SeriesService:
+    """Maps JSON requests onto per-user SeriesManager operations"""
+    
+    def __init__(self, store, workers=8):
+        """
+        Initialize the service
+        
+        Args:
+            store (ProfileStore): Where users' collections are kept
+            workers (int): Threads available for manager and storage calls
+        """
+        self.store = store
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="SeriesService")
+    
+    def close(self):
+        """Save every user's pending changes and stop the thread pool"""
+        self.executor.shutdown(wait=True)
+        self.store.close()
+    
+    async def handle(self, method, path, query, body):
+        """
+        Handle one request
+        
+        Returns:
+            tuple: (HTTP status, JSON-serializable response)
+        """
+        parts = [unquote(part) for part in path.strip('/').split('/')]
+        if len(parts) < 3 or parts[0] != 'users':
+            raise HTTPError(404, "unknown endpoint")
+        user, resource, rest = parts[1], parts[2], parts[3:]
+        try:
+            self.store.path(user)
+        except ValueError:
+            raise HTTPError(400, "invalid user name")
+        
+        if resource == 'series' and not rest:
+            if method == 'GET':
+                return await self._call(user, self._list)
+            if method == 'POST':
+                return await self._call(user, self._add, body)
+        elif resource == 'series' and len(rest) == 1:
+            if method == 'GET':
+                return await self._call(user, self._get, rest[0])
+            if method in ('PATCH', 'PUT'):
+                return await self._call(user, self._update, rest[0], body)
+            if method == 'DELETE':
+                return await self._call(user, self._delete, rest[0])
+        elif not rest and resource in ('search', 'next', 'pace', 'stats', 'recommendations'):
+            if method == 'GET':
+                handler = getattr(self, '_' + resource)
+                return await self._call(user, handler, query)
+        else:
+            raise HTTPError(404, "unknown endpoint")
+        raise HTTPError(405, f"{method} not allowed here")
+    
+    async def _call(self, user, handler, *args):
+        """Run a handler for a user on the thread pool"""
+        # The manager is thread-safe: a user's reads run side by side and
+        # only their changes are serialized
+        def run():
+            with self.store.using(user) as profile:
+                return handler(profile, *args)
+        return await asyncio.get_running_loop().run_in_executor(self.executor, run)
+    
+    # Handlers run on the thread pool
+    
+    def _list(self, profile):
+        return 200, {'series': [series_to_dict(s) for s in profile.manager.series_list]}
+    
+    def _add(self, profile, body):
+        name = self._field(body, 'name', str)
+        total_episodes = self._field(body, 'total_episodes', int)
+        genre = body.get('genre') or "Unknown"
+        if not name.strip() or total_episodes <= 0:
+            raise HTTPError(400, "name must not be empty and total_episodes must be positive")
+        if not profile.manager.add_series(name.strip(), total_episodes, str(genre)):
+            raise HTTPError(409, f"'{name}' already exists")
+        return 201, {'series': series_to_dict(profile.manager.find_series(name.strip()))}
+    
+    def _get(self, profile, name):
+        return 200, {'series': series_to_dict(self._find(profile, name))}
+    
+    def _update(self, profile, name, body):
+        episodes_watched = self._field(body, 'episodes_watched', int)
+        if episodes_watched < 0:
+            raise HTTPError(400, "episodes_watched cannot be negative")
+        if not profile.manager.update_episodes(name, episodes_watched):
+            raise HTTPError(404, f"series '{name}' not found")
+        return 200, {'series': series_to_dict(self._find(profile, name))}
+    
+    def _delete(self, profile, name):
+        if not profile.manager.delete_series(name):
+            raise HTTPError(404, f"series '{name}' not found")
+        return 200, {'deleted': name}
+    
+    def _search(self, profile, query):
+        term = query.get('q', [''])[0]
+        fuzzy = query.get('fuzzy', ['0'])[0] not in ('', '0', 'false')
+        limit = self._int_param(query, 'limit', None)
+        results = profile.manager.match_series(term, fuzzy=fuzzy, limit=limit)
+        return 200, {'series': [series_to_dict(s) for s in results]}
+    
+    def _next(self, profile, query):
+        order = query.get('order', ['closest'])[0]
+        genre = query.get('genre', [None])[0]
+        count = self._int_param(query, 'count', 10)
+        try:
+            results = profile.manager.top_series(order, count, genre)
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+        return 200, {'series': [series_to_dict(s) for s in results]}
+    
+    def _pace(self, profile, query):
+        name = query.get('name', [None])[0]
+        weeks = self._int_param(query, 'weeks', 4)
+        if weeks <= 0:
+            raise HTTPError(400, "'weeks' must be positive")
+        report = profile.manager.get_pace(name, weeks)
+        if report is None:
+            raise HTTPError(404, f"series '{name}' not found")
+        return 200, {'pace': report}
+    
+    def _stats(self, profile, query):
+        return 200, {'statistics': profile.manager.get_statistics()}
+    
+    def _recommendations(self, profile, query):
+        count = self._int_param(query, 'count', 3)
+        return 200, {'recommendations': [
+            {'name': name, 'episodes': episodes, 'description': description}
+            for name, episodes, description in profile.recommender.get_recommendations(count)
+        ]}
+    
+    @staticmethod
+    def _find(profile, name):
+        series = profile.manager.find_series(name)
+        if series is None:
+            raise HTTPError(404, f"series '{name}' not found")
+        return series
+    
+    @staticmethod
+    def _field(body, field, kind):
+        value = body.get(field)
+        # bool is an int subclass, but true/false are not episode counts
+        if not isinstance(value, kind) or isinstance(value, bool):
+            raise HTTPError(400, f"'{field}' must be {'a string' if kind is str else 'an integer'}")
+        return value
+    
+    @staticmethod
+    def _int_param(query, name, default):
+        if name not in query:
+            return default
+        try:
+            return max(0, int(query[name][0]))
+        except ValueError:
+            raise HTTPError(400, f"'{name}' must be an integer")
+
+async def read_line(reader):
+    """Read one line of a request head; an over-long line is a client error"""
+    try:
+        return await reader.readline()
+    except ValueError:
+        # StreamReader.readline raises ValueError past its line length limit
+        raise HTTPError(400, "request line or header too long")
+
+async def read_request(reader):
+    """
+    Read one HTTP/1.1 request
+    
+    Returns:
+        tuple: (method, target, headers, body), or None at end of stream
+    """
+    request_line = await read_line(reader)
+    if not request_line.strip():
+        return None
+    try:
+        method, target, version = request_line.decode('latin-1').split()
+    except ValueError:
+        raise HTTPError(400, "malformed request line")
+    
+    headers = {'version': version}
+    while True:
+        line = await read_line(reader)
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    
+    try:
+        length = int(headers.get('content-length') or 0)
+    except ValueError:
+        length = -1
+    if length < 0:
+        raise HTTPError(400, "invalid Content-Length")
+    if length > MAX_BODY:
+        raise HTTPError(413, "request body too large")
+    body = await reader.readexactly(length) if length else b''
+    return method.upper(), target, headers, body
+
+def write_response(writer, status, payload, keep_alive):
+    """Queue a JSON response on the connection"""
+    body = json.dumps(payload).encode('utf-8')
+    writer.write(
+        f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+        f"Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+        f"\r\n".encode('latin-1') + body
+    )
+
+async def serve_connection(service, reader, writer):
+    """Serve requests on one connection until the client closes it"""
+    try:
+        while True:
+            # Until a request has been read the stream state is unknown,
+            # so errors before that point close the connection
+            keep_alive = False
+            try:
+                request = await read_request(reader)
+                if request is None:
+                    break
+                method, target, headers, body = request
+                keep_alive = (headers['version'] == 'HTTP/1.1'
+                              and headers.get('connection', '').lower() != 'close')
+                
+                url = urlsplit(target)
+                try:
+                    payload = json.loads(body) if body else {}
+                except (ValueError, UnicodeDecodeError):
+                    raise HTTPError(400, "request body is not valid JSON")
+                if not isinstance(payload, dict):
+                    raise HTTPError(400, "request body must be a JSON object")
+                
+                status, response = await service.handle(method, url.path, parse_qs(url.query), payload)
+            except HTTPError as e:
+                status, response = e.status, {'error': str(e)}
+            except (asyncio.IncompleteReadError, ConnectionError):
+                break
+            except Exception as e:
+                status, response, keep_alive = 500, {'error': str(e)}, False
+            
+            write_response(writer, status, response, keep_alive)
+            await writer.drain()
+            if not keep_alive:
+                break
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+async def run_server(service, host, port, ready=None):
+    """
+    Serve until cancelled or sent SIGTERM
+    
+    Args:
+        service (SeriesService): The service answering requests
+        host (str): Interface to listen on
+        port (int): Port to listen on; 0 picks a free port
+        ready (callable): Called with the bound port once listening
+    """
+    server = await asyncio.start_server(
+        lambda reader, writer: serve_connection(service, reader, writer), host, port)
+    # Stop cleanly on SIGTERM too, so pending changes are saved
+    stopped = asyncio.get_running_loop().create_future()
+    with contextlib.suppress(NotImplementedError):
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stopped.set_result, None)
+    
+    async with server:
+        bound_port = server.sockets[0].getsockname()[1]
+        if ready:
+            ready(bound_port)
+        await stopped
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--data-dir', default="series_users", help="directory for per-user data files")
+    parser.add_argument('--storage', choices=['json', 'journal', 'db'], default='json',
+                        help="storage backend for the user files (default: %(default)s)")
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--workers', type=int, default=8, help="threads for manager and storage calls")
+    parser.add_argument('--max-loaded', type=int, default=256,
+                        help="users kept loaded before the least recently used is closed")
+    parser.add_argument('--collaborative', action='store_true',
+                        help="recommend from what users with similar collections watch")
+    parser.add_argument('--content', action='store_true',
+                        help="recommend series whose descriptions resemble the user's")
+    parser.add_argument('--verbose', action='store_true', help="keep the managers' console messages")
+    args = parser.parse_args(argv)
+    
+    store = ProfileStore(args.data_dir, extension='.' + args.storage, max_loaded=args.max_loaded)
+    service = SeriesService(store, args.workers)
+    
+    def ready(port):
+        print(f"Serving on http://{args.host}:{port}/", file=sys.stderr, flush=True)
+    
+    # The managers print as they work, which is noise for a service
+    with open(os.devnull, 'w') as devnull, \
+            contextlib.redirect_stdout(sys.stdout if args.verbose else devnull):
+        if args.collaborative:
+            # One model over every stored user; each user's row follows
+            # their collection as they change it
+            from collaborative import CoWatchModel, CollaborativeRecommender
+            model = CoWatchModel.from_store(store)
+            store.recommender_factory = lambda profile: CollaborativeRecommender(
+                profile.manager, model, profile.user)
+            print(f"Co-watch model built from {len(model)} users", file=sys.stderr, flush=True)
+        elif args.content:
+            # One index shared by every user, cached in the data directory
+            from ai_recommender import AIRecommender
+            from catalogue import Catalogue
+            from content_based import ContentRecommender, TfidfIndex
+            catalogue = Catalogue(AIRecommender.SERIES_DATABASE)
+            os.makedirs(args.data_dir, exist_ok=True)
+            index = TfidfIndex.open(catalogue, os.path.join(args.data_dir, 'catalogue.tfidf'))
+            store.recommender_factory = lambda profile: ContentRecommender(
+                profile.manager, index, catalogue)
+            print(f"Content index holds {len(index)} titles", file=sys.stderr, flush=True)
+        
+        try:
+            asyncio.run(run_server(service, args.host, args.port, ready))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            service.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
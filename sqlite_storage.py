@@ -0,0 +1,460 @@
+"""
+SQLite storage backend - keeps series in an indexed database file
+"""
+
+import os
+import sqlite3
+from contextlib import contextmanager
+from series import Series
+from watch_history import DAY, Rollup, WatchHistory
+
+class SQLiteStorage:
+    """Handle saving, loading and querying series data in a SQLite database"""
+    
+    # SeriesManager answers lookups, searches and statistics with SQL
+    # queries instead of loading the whole collection into memory
+    supports_queries = True
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS series (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            name_key TEXT NOT NULL UNIQUE,
+            total_episodes INTEGER NOT NULL,
+            genre TEXT NOT NULL DEFAULT 'Unknown',
+            episodes_watched INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS idx_series_genre ON series (genre);
+        CREATE TABLE IF NOT EXISTS watch_events (
+            name_key TEXT NOT NULL,
+            watched_at INTEGER NOT NULL,
+            delta INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_watch_events_series ON watch_events (name_key, watched_at);
+        CREATE INDEX IF NOT EXISTS idx_watch_events_time ON watch_events (watched_at);
+    """
+    
+    COLUMNS = "name, total_episodes, genre, episodes_watched"
+    
+    def __init__(self, filename="series_data.db"):
+        """
+        Initialize SQLiteStorage
+        
+        Args:
+            filename (str): Name of the database file to store data
+        """
+        self.filename = filename
+        self._conn = None
+        self._batch_depth = 0
+        # id(history) -> (history, events inserted), applied to
+        # history.saved when the transaction holding them commits
+        self._written = {}
+    
+    @property
+    def conn(self):
+        """Open the database on first use"""
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.filename, check_same_thread=False)
+            self._conn.executescript(self.SCHEMA)
+        return self._conn
+    
+    def save_series(self, series_list):
+        """
+        Save all series, replacing the contents of the database
+        
+        Args:
+            series_list (list): List of Series objects to save
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            series_list = list(series_list)
+            with self.conn:
+                self.conn.execute("DELETE FROM series")
+                self.conn.execute("DELETE FROM watch_events")
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO series (name_key, name, total_episodes, genre, episodes_watched) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (self._row(series) for series in series_list)
+                )
+                for series in series_list:
+                    if series.history:
+                        self._insert_unsaved(series, 0)
+            self._mark_written()
+            
+            print(f" Data saved to '{self.filename}'")
+            return True
+        
+        except Exception as e:
+            self._written.clear()
+            print(f" Error saving data: {e}")
+            return False
+    
+    def append_change(self, op, series):
+        """
+        Apply a single change to the database
+        
+        Args:
+            op (str): 'add', 'update' or 'delete'
+            series (Series): The series that changed
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        return self.append_changes([(op, series)])
+    
+    def append_changes(self, changes):
+        """
+        Apply several changes to the database in one transaction
+        
+        Args:
+            changes (list): (op, series) pairs in the order they happened
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            with self._transaction():
+                for op, series in changes:
+                    if op == 'add':
+                        self.conn.execute(
+                            "INSERT INTO series (name_key, name, total_episodes, genre, episodes_watched) "
+                            "VALUES (?, ?, ?, ?, ?)",
+                            self._row(series)
+                        )
+                    elif op == 'update':
+                        self.conn.execute(
+                            "UPDATE series SET episodes_watched = ? WHERE name_key = ?",
+                            (series.episodes_watched, series.name.casefold())
+                        )
+                    elif op == 'delete':
+                        self.conn.execute(
+                            "DELETE FROM series WHERE name_key = ?",
+                            (series.name.casefold(),)
+                        )
+                        self.conn.execute(
+                            "DELETE FROM watch_events WHERE name_key = ?",
+                            (series.name.casefold(),)
+                        )
+                    if op != 'delete' and series.history:
+                        # Series read from the database start without their
+                        # history, so only events recorded since are new
+                        self._insert_unsaved(series)
+            return True
+        
+        except Exception as e:
+            print(f" Error saving data: {e}")
+            return False
+    
+    @contextmanager
+    def batch(self):
+        """
+        Apply every change made inside the block in a single transaction
+        
+        The transaction is committed when the outermost block exits
+        normally, and rolled back if an exception leaves it. A nested
+        block is a savepoint: an exception leaving it undoes only its own
+        changes, and the outer block carries on.
+        """
+        self._batch_depth += 1
+        savepoint = None
+        if self._batch_depth > 1:
+            # Begin explicitly, or releasing the savepoint would commit
+            if not self.conn.in_transaction:
+                self.conn.execute("BEGIN")
+            savepoint = f"batch_{self._batch_depth}"
+            self.conn.execute(f"SAVEPOINT {savepoint}")
+            written = dict(self._written)
+        try:
+            yield self
+        except BaseException:
+            self._batch_depth -= 1
+            if savepoint:
+                self.conn.execute(f"ROLLBACK TO {savepoint}")
+                self.conn.execute(f"RELEASE {savepoint}")
+                self._written = written
+            else:
+                self.conn.rollback()
+                self._written.clear()
+            raise
+        self._batch_depth -= 1
+        if savepoint:
+            self.conn.execute(f"RELEASE {savepoint}")
+        else:
+            self.conn.commit()
+            self._mark_written()
+    
+    @contextmanager
+    def _transaction(self):
+        """Commit or roll back the enclosed statements unless inside a batch"""
+        if self._batch_depth:
+            yield
+            return
+        try:
+            with self.conn:
+                yield
+        except BaseException:
+            self._written.clear()
+            raise
+        self._mark_written()
+    
+    def load_series(self):
+        """
+        Load all series from the database
+        
+        Returns:
+            list: List of Series objects, empty list if file doesn't exist
+        """
+        if not os.path.exists(self.filename):
+            print(f" No saved data found. Starting fresh!")
+            return []
+        
+        try:
+            series_list = list(self.iter_series())
+            histories = {}
+            cursor = self.conn.execute(
+                "SELECT name_key, watched_at, delta FROM watch_events ORDER BY name_key, watched_at, rowid")
+            for name_key, watched_at, delta in cursor:
+                histories.setdefault(name_key, []).append((watched_at, delta))
+            for series in series_list:
+                events = histories.get(series.name.casefold())
+                if events:
+                    series.history = WatchHistory(events)
+                    series.history.saved = len(series.history)
+            print(f" Loaded {len(series_list)} series from '{self.filename}'")
+            return series_list
+        
+        except Exception as e:
+            print(f" Error loading data: {e}")
+            return []
+    
+    def iter_series(self, offset=0, limit=None):
+        """
+        Yield series in insertion order without loading them all at once
+        
+        Args:
+            offset (int): Number of series to skip
+            limit (int): Maximum number of series to yield; None for all
+        """
+        cursor = self.conn.execute(
+            f"SELECT {self.COLUMNS} FROM series ORDER BY id LIMIT ? OFFSET ?",
+            (-1 if limit is None else limit, offset)
+        )
+        for row in cursor:
+            yield self._series(row)
+    
+    def page_series(self, after=0, limit=None, offset=0):
+        """
+        Get the series after a row id, for paging through the collection
+        
+        Seeking by row id costs the same on every page, where OFFSET
+        would step over every earlier row again.
+        
+        Args:
+            after (int): Row id of the last series of the previous page;
+                0 to start at the beginning
+            limit (int): Maximum number of series to return; None for all
+            offset (int): Number of series after that row to skip
+            
+        Returns:
+            tuple: (list of Series objects, row id of the last one, or
+                after if there are none)
+        """
+        rows = self.conn.execute(
+            f"SELECT id, {self.COLUMNS} FROM series WHERE id > ? ORDER BY id LIMIT ? OFFSET ?",
+            (after, -1 if limit is None else limit, offset)
+        ).fetchall()
+        return [self._series(row[1:]) for row in rows], rows[-1][0] if rows else after
+    
+    def find_series(self, name):
+        """
+        Find a series by name using the name index
+        
+        Args:
+            name (str): The name of the series to find
+            
+        Returns:
+            Series object if found, None otherwise
+        """
+        row = self.conn.execute(
+            f"SELECT {self.COLUMNS} FROM series WHERE name_key = ?",
+            (name.casefold(),)
+        ).fetchone()
+        return self._series(row) if row else None
+    
+    def search_series(self, name):
+        """
+        Search for series whose name contains the given text
+        
+        Args:
+            name (str): The name (or partial name) to search for
+            
+        Returns:
+            list: Matching Series objects in insertion order
+        """
+        pattern = name.casefold().replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        cursor = self.conn.execute(
+            f"SELECT {self.COLUMNS} FROM series WHERE name_key LIKE ? ESCAPE '\\' ORDER BY id",
+            (f"%{pattern}%",)
+        )
+        return [self._series(row) for row in cursor]
+    
+    def top_series(self, order, count, genre=None):
+        """
+        Get the first series of an ordered view (see SeriesManager.top_series)
+        
+        Args:
+            order (str): 'closest' or 'remaining'
+            count (int): Number of series to return
+            genre (str): Only series of this genre
+            
+        Returns:
+            list: Series objects in view order
+        """
+        if order == 'closest':
+            where = "episodes_watched > 0 AND episodes_watched < total_episodes"
+            order_by = ("CAST(episodes_watched AS REAL) / total_episodes DESC, "
+                        "total_episodes - episodes_watched, id")
+        else:
+            where = "episodes_watched < total_episodes"
+            order_by = "total_episodes - episodes_watched DESC, id"
+        params = []
+        if genre is not None:
+            where += " AND genre = ?"
+            params.append(genre)
+        cursor = self.conn.execute(
+            f"SELECT {self.COLUMNS} FROM series WHERE {where} ORDER BY {order_by} LIMIT ?",
+            params + [count]
+        )
+        return [self._series(row) for row in cursor]
+    
+    def watch_rollup(self, since, name=None):
+        """
+        Sum the watch events from a time on into daily and weekly rollups
+        
+        Args:
+            since (int): Earliest event time, in seconds since the epoch
+            name (str): Only this series' events; None for all
+            
+        Returns:
+            Rollup: The rollups of the matching events
+        """
+        where = "watched_at >= ?"
+        params = [since]
+        if name is not None:
+            where += " AND name_key = ?"
+            params.append(name.casefold())
+        cursor = self.conn.execute(
+            f"SELECT watched_at / {DAY} AS day, SUM(delta) FROM watch_events WHERE {where} GROUP BY day",
+            params
+        )
+        rollup = Rollup()
+        for day, episodes in cursor:
+            rollup.add(day * DAY, episodes)
+        return rollup
+    
+    def remaining_episodes(self):
+        """Get the number of episodes left to watch across unfinished series"""
+        return self.conn.execute(
+            "SELECT COALESCE(SUM(total_episodes - episodes_watched), 0) FROM series "
+            "WHERE episodes_watched < total_episodes"
+        ).fetchone()[0]
+    
+    def count_series(self):
+        """Get the number of series in the database"""
+        return self.conn.execute("SELECT COUNT(*) FROM series").fetchone()[0]
+    
+    def get_statistics(self):
+        """Get statistics about the series collection, overall and per genre"""
+        total_series, completed, total_episodes, watched_episodes = self.conn.execute(
+            "SELECT COUNT(*), SUM(episodes_watched >= total_episodes), "
+            "SUM(total_episodes), SUM(episodes_watched) FROM series"
+        ).fetchone()
+        
+        if not total_series:
+            return None
+        
+        stats = self._format_statistics(total_series, completed, total_episodes, watched_episodes)
+        stats['genres'] = {
+            genre: self._format_statistics(*totals)
+            for genre, *totals in self.conn.execute(
+                "SELECT genre, COUNT(*), SUM(episodes_watched >= total_episodes), "
+                "SUM(total_episodes), SUM(episodes_watched) FROM series GROUP BY genre"
+            )
+        }
+        return stats
+    
+    def file_exists(self):
+        """Check if the database file exists"""
+        return os.path.exists(self.filename)
+    
+    def close(self):
+        """Close the database connection"""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+    
+    @staticmethod
+    def _format_statistics(total_series, completed, total_episodes, watched_episodes):
+        """Build the statistics dict SeriesManager.get_statistics returns"""
+        return {
+            'total_series': total_series,
+            'completed_series': completed,
+            'total_episodes': total_episodes,
+            'watched_episodes': watched_episodes,
+            'overall_progress': (watched_episodes / total_episodes * 100) if total_episodes > 0 else 0
+        }
+    
+    def _insert_events(self, series, events):
+        """Insert watch events of a series"""
+        key = series.name.casefold()
+        self.conn.executemany(
+            "INSERT INTO watch_events (name_key, watched_at, delta) VALUES (?, ?, ?)",
+            ((key, watched_at, delta) for watched_at, delta in events)
+        )
+    
+    def _insert_unsaved(self, series, start=None):
+        """
+        Insert the watch events of a series not yet in the database
+        
+        The history is only marked as written when the transaction
+        commits (see _mark_written), so a failed write or a rolled back
+        batch leaves the events to be written again.
+        
+        Args:
+            series (Series): The series, which has a history
+            start (int): First event to insert; None for the first not
+                yet written, counting inserts waiting for a commit
+        """
+        history = series.history
+        if start is None:
+            start = self._written.get(id(history), (history, history.saved))[1]
+        events = history.events(start)
+        self._insert_events(series, events)
+        self._written[id(history)] = (history, start + len(events))
+    
+    def _mark_written(self):
+        """Mark the events inserted by a committed transaction as written"""
+        for history, written in self._written.values():
+            history.saved = written
+        self._written.clear()
+    
+    @staticmethod
+    def _row(series):
+        """Build the database row for a series"""
+        return (
+            series.name.casefold(),
+            series.name,
+            series.total_episodes,
+            series.genre,
+            series.episodes_watched
+        )
+    
+    @staticmethod
+    def _series(row):
+        """Build a Series object from a database row"""
+        name, total_episodes, genre, episodes_watched = row
+        series = Series(name=name, total_episodes=total_episodes, genre=genre)
+        series.episodes_watched = episodes_watched
+        return series
@@ -0,0 +1,24 @@
+"""
+Storage backend selection - picks how a data file is read and written from its name
+"""
+
+def open_storage(filename, snapshot=False):
+    """
+    Pick the storage backend from the data file extension
+    
+    The backend modules are imported here, so a caller only pays for
+    the one it uses.
+    
+    Args:
+        filename (str): The data file; .db and .sqlite use SQLiteStorage,
+            .journal JournalStorage and anything else JSONStorage
+        snapshot (bool): Keep a snapshot cache beside a JSON data file
+    """
+    if filename.endswith(('.db', '.sqlite')):
+        from sqlite_storage import SQLiteStorage
+        return SQLiteStorage(filename)
+    if filename.endswith('.journal'):
+        from journal_storage import JournalStorage
+        return JournalStorage(filename)
+    from json_storage import JSONStorage
+    return JSONStorage(filename, snapshot_cache=snapshot)
@@ -0,0 +1,464 @@
+"""
+Delta sync between two collections, using content hashes and last-writer-wins
+"""
+
+import hashlib
+import json
+import os
+import time
+from series import Series
+from watch_history import WatchHistory
+
+# The Merkle tree has LEVELS levels of FANOUT-way nodes; series hang off
+# its BUCKETS leaves
+FANOUT = 16
+LEVELS = 4
+BUCKETS = FANOUT ** (LEVELS - 1)
+
+# Digest of a deleted series
+DELETED = 0
+
+def _hash64(text):
+    """Hash a string to a 64-bit integer"""
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'big')
+
+def digest(series):
+    """
+    Get the content hash of a series
+    
+    Covers the fields a sync exchanges; the watch history goes along
+    with a series but is not compared.
+    """
+    fields = [series.name, series.total_episodes, series.genre, series.episodes_watched]
+    return _hash64(json.dumps(fields)) or 1
+
+def series_to_record(series):
+    """Convert a series to the record a sync sends"""
+    return {
+        'name': series.name,
+        'total_episodes': series.total_episodes,
+        'genre': series.genre,
+        'episodes_watched': series.episodes_watched,
+        'history': series.history.events() if series.history else None,
+    }
+
+def series_from_record(record):
+    """Build a Series from a record made by series_to_record"""
+    series = Series(record['name'], record['total_episodes'], record['genre'])
+    series.episodes_watched = record['episodes_watched']
+    if record.get('history'):
+        series.history = WatchHistory(record['history'])
+    return series
+
+class SyncState:
+    """
+    The digest and modification time of every series a replica has seen
+    
+    Deleted series stay on as tombstones (digest DELETED), so a deletion
+    can win over an older copy on the other side. Each entry is hashed
+    into a leaf bucket of a Merkle tree whose nodes are the XOR of the
+    leaf hashes below them: a change updates one node per level, and two
+    replicas holding the same series have the same root however they got
+    there. Modification times are kept out of the tree, so they only
+    matter when the contents differ.
+    
+    Saved as JSON lines, one [key, digest, modified] per entry change. A
+    save appends only the entries changed since the last one and rewrites
+    the file once stale lines outnumber live ones, as JournalStorage does.
+    
+    Modification times are whole seconds since the epoch, as watch events
+    are dated, so the two compare on the same scale.
+    """
+    
+    def __init__(self):
+        """Initialize an empty state"""
+        self.entries = {}  # Casefolded name -> (digest, modified)
+        # (mtime_ns, size) of the data file when the state was last saved
+        self.source = None
+        self._tree = [[0] * FANOUT ** level for level in range(LEVELS)]
+        self._buckets = {}  # Leaf bucket -> casefolded names
+        self._unsaved = set()
+        self._lines = 0
+    
+    @classmethod
+    def load(cls, filename):
+        """
+        Read a state file; a missing or unreadable one gives an empty state
+        
+        Args:
+            filename (str): The state file
+        """
+        state = cls()
+        try:
+            with open(filename, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        item = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A save cut short; the lines before it still count
+                        break
+                    if isinstance(item, dict):
+                        state.source = tuple(item['source']) if item['source'] else None
+                    else:
+                        state.set(*item)
+                    state._lines += 1
+        except OSError:
+            pass
+        state._unsaved.clear()
+        return state
+    
+    def save(self, filename):
+        """
+        Write the entries changed since the last save
+        
+        Args:
+            filename (str): The state file
+        """
+        source = json.dumps({'source': self.source}) + "\n"
+        if self._lines + len(self._unsaved) > max(1000, 2 * len(self.entries)):
+            temp_filename = filename + '.tmp'
+            with open(temp_filename, 'w', encoding='utf-8') as f:
+                f.write(''.join(json.dumps([key, *entry]) + "\n" for key, entry in self.entries.items()))
+                f.write(source)
+            os.replace(temp_filename, filename)
+            self._lines = len(self.entries) + 1
+        else:
+            with open(filename, 'a', encoding='utf-8') as f:
+                f.write(''.join(json.dumps([key, *self.entries[key]]) + "\n" for key in self._unsaved))
+                f.write(source)
+            self._lines += len(self._unsaved) + 1
+        self._unsaved.clear()
+    
+    def set(self, key, digest, modified):
+        """
+        Record a series' digest and when it changed
+        
+        Args:
+            key (str): The casefolded name
+            digest (int): Its content hash, or DELETED
+            modified (int): When it changed, in whole seconds since the epoch
+        """
+        old = self.entries.get(key)
+        change = _hash64(f"{key}\0{digest}")
+        bucket = _hash64(key) % BUCKETS
+        if old is not None:
+            change ^= _hash64(f"{key}\0{old[0]}")
+        else:
+            self._buckets.setdefault(bucket, set()).add(key)
+        self.entries[key] = (digest, modified)
+        self._unsaved.add(key)
+        
+        node = bucket
+        for level in range(LEVELS - 1, -1, -1):
+            self._tree[level][node] ^= change
+            node //= FANOUT
+    
+    def root(self):
+        """Get the hash of the whole state"""
+        return self._tree[0][0]
+    
+    def children(self, level, nodes):
+        """
+        Get the hashes of the children of some nodes
+        
+        Args:
+            level (int): The level of the nodes; the root is level 0
+            nodes (list): Node numbers within that level
+            
+        Returns:
+            list: A list of FANOUT child hashes for each node
+        """
+        below = self._tree[level + 1]
+        return [below[node * FANOUT:(node + 1) * FANOUT] for node in nodes]
+    
+    def bucket_entries(self, buckets):
+        """
+        Get the entries in some leaf buckets
+        
+        Returns:
+            list: [key, digest, modified] lists
+        """
+        return [[key, *self.entries[key]]
+                for bucket in buckets for key in self._buckets.get(bucket, ())]
+
+class Replica:
+    """
+    One side of a sync: a SeriesManager and the SyncState kept beside it
+    
+    summary, children, entries, fetch, apply and save are what the other
+    side calls during sync(); they take and return plain JSON values, so
+    RemoteReplica can carry them over a socket.
+    """
+    
+    def __init__(self, manager, state_file=None):
+        """
+        Initialize a replica
+        
+        Args:
+            manager (SeriesManager): The collection to sync
+            state_file (str): Where the sync state is kept between runs;
+                None keeps it in memory only
+        """
+        self.manager = manager
+        self.state_file = state_file
+        self.state = SyncState.load(state_file) if state_file else SyncState()
+    
+    def refresh(self, now=None):
+        """
+        Bring the sync state up to date with the collection
+        
+        Only the series the manager reports as changed are hashed again,
+        and each is dated by when the manager saw it change. The whole
+        collection is hashed when the manager was not tracking changes
+        yet and the data file has changed since the state was saved;
+        those changes can only be dated by their watch events, or now.
+        
+        Args:
+            now (int): Modification time for untracked changes found;
+                defaults to now
+                
+        Returns:
+            int: Number of entries that changed
+        """
+        now = int(time.time()) if now is None else now
+        self.manager.flush()
+        changes = self.manager.take_changes()
+        if changes is None and self.state.source is not None and self.state.source == self._source():
+            changes = {}
+        
+        changed = 0
+        if changes is None:
+            seen = set()
+            for series in self.manager.series_list:
+                key = series.name.casefold()
+                seen.add(key)
+                changed += self._observe(key, series, now, guess=True)
+            for key, (entry_digest, _) in list(self.state.entries.items()):
+                if entry_digest != DELETED and key not in seen:
+                    changed += self._observe(key, None, now)
+        else:
+            for key, modified in changes.items():
+                changed += self._observe(key, self.manager.find_series(key), modified)
+        return changed
+    
+    def summary(self):
+        """Refresh the state and get its root hash"""
+        self.refresh()
+        return self.state.root()
+    
+    def children(self, level, nodes):
+        """Get the hashes of the children of some Merkle tree nodes"""
+        return self.state.children(level, nodes)
+    
+    def entries(self, buckets):
+        """Get the [key, digest, modified] entries in some leaf buckets"""
+        return self.state.bucket_entries(buckets)
+    
+    def fetch(self, keys):
+        """Get the records of some series, skipping any that are gone"""
+        records = []
+        for key in keys:
+            series = self.manager.find_series(key)
+            if series is not None:
+                records.append(series_to_record(series))
+        return records
+    
+    def apply(self, records, entries):
+        """
+        Take in the other side's winning changes
+        
+        Args:
+            records (list): Records of the series to add or overwrite
+            entries (list): [key, digest, modified] of every change,
+                tombstones included
+                
+        Returns:
+            int: Number of series changed
+        """
+        deleted = [key for key, entry_digest, _ in entries if entry_digest == DELETED]
+        changed = self.manager.replace_series(map(series_from_record, records), deleted)
+        for key, entry_digest, modified in entries:
+            self.state.set(key, entry_digest, modified)
+        return changed
+    
+    def save(self):
+        """Write the collection and the sync state"""
+        self.manager.flush()
+        self.state.source = self._source()
+        if self.state_file:
+            self.state.save(self.state_file)
+    
+    def _observe(self, key, series, modified, guess=False):
+        """
+        Record the current contents of one series, if they changed
+        
+        Args:
+            key (str): The casefolded name
+            series (Series): The series, or None if it is gone
+            modified (int): When it changed
+            guess (bool): modified is only when the change was found; the
+                series' newest watch event dates it instead when that is
+                newer than the last recorded change
+                
+        Returns:
+            int: 1 if the entry changed, 0 otherwise
+        """
+        entry = self.state.entries.get(key)
+        if series is None:
+            if entry is None or entry[0] == DELETED:
+                return 0
+            self.state.set(key, DELETED, modified)
+            return 1
+        
+        series_digest = digest(series)
+        if entry is not None and entry[0] == series_digest:
+            return 0
+        if guess:
+            latest = series.history.latest() if series.history else None
+            if latest is not None and (entry is None or latest > entry[1]):
+                modified = latest
+        self.state.set(key, series_digest, modified)
+        return 1
+    
+    def _source(self):
+        """Identify the data file contents, or None without a data file"""
+        try:
+            stat = os.stat(self.manager.storage.filename)
+            return (stat.st_mtime_ns, stat.st_size)
+        except (AttributeError, OSError):
+            return None
+
+class RemoteReplica:
+    """A Replica on the other end of a socket, answered by serve()"""
+    
+    def __init__(self, sock):
+        """
+        Initialize the proxy
+        
+        Args:
+            sock (socket.socket): A connected socket, such as one end of
+                socket.socketpair(); closed by close()
+        """
+        self._sock = sock
+        self._reader = sock.makefile('rb')
+        self._writer = sock.makefile('wb')
+        self.bytes_sent = 0
+        self.bytes_received = 0
+    
+    def summary(self):
+        return self._call('summary')
+    
+    def children(self, level, nodes):
+        return self._call('children', level, nodes)
+    
+    def entries(self, buckets):
+        return self._call('entries', buckets)
+    
+    def fetch(self, keys):
+        return self._call('fetch', keys)
+    
+    def apply(self, records, entries):
+        return self._call('apply', records, entries)
+    
+    def save(self):
+        return self._call('save')
+    
+    def close(self):
+        """Close the connection, which ends serve() on the other side"""
+        self._writer.close()
+        self._reader.close()
+        self._sock.close()
+    
+    def _call(self, method, *args):
+        """Send one call and wait for its result"""
+        request = json.dumps([method, args]).encode('utf-8') + b"\n"
+        self._writer.write(request)
+        self._writer.flush()
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionError("sync peer closed the connection")
+        self.bytes_sent += len(request)
+        self.bytes_received += len(line)
+        response = json.loads(line)
+        if 'error' in response:
+            raise RuntimeError(f"sync peer failed in {method}: {response['error']}")
+        return response['result']
+
+# The Replica methods serve() lets a RemoteReplica call
+METHODS = frozenset(['summary', 'children', 'entries', 'fetch', 'apply', 'save'])
+
+def serve(replica, sock):
+    """
+    Answer a RemoteReplica's calls until it closes the connection
+    
+    Args:
+        replica (Replica): The local side
+        sock (socket.socket): A connected socket
+    """
+    with sock.makefile('rb') as reader, sock.makefile('wb') as writer:
+        for line in reader:
+            try:
+                method, args = json.loads(line)
+                if method not in METHODS:
+                    raise ValueError(f"unknown method '{method}'")
+                response = {'result': getattr(replica, method)(*args)}
+            except Exception as e:
+                response = {'error': str(e)}
+            writer.write(json.dumps(response).encode('utf-8') + b"\n")
+            writer.flush()
+
+def sync(local, remote):
+    """
+    Bring two replicas to the same collection, exchanging only what differs
+    
+    The root hashes are compared first, then the children of every node
+    that differs, level by level, down to the leaf buckets. Only the
+    entries of differing buckets are exchanged, and only the series whose
+    digests differ are sent. For each, the side that changed it last wins
+    (ties go to the larger digest, so both sides agree); that includes
+    deletions. The cost grows with the number of changes, not with the
+    size of the collections.
+    
+    Args:
+        local (Replica): One side
+        remote (Replica or RemoteReplica): The other side
+        
+    Returns:
+        dict: 'sent' and 'received' series counts, and the number of leaf
+        'buckets' compared
+    """
+    report = {'sent': 0, 'received': 0, 'buckets': 0}
+    if local.summary() == remote.summary():
+        return report
+    
+    # Walk down the tree, keeping the nodes whose hashes differ
+    nodes = [0]
+    for level in range(LEVELS - 1):
+        mine, theirs = local.children(level, nodes), remote.children(level, nodes)
+        nodes = [node * FANOUT + child
+                 for node, my_hashes, their_hashes in zip(nodes, mine, theirs)
+                 for child in range(FANOUT) if my_hashes[child] != their_hashes[child]]
+    report['buckets'] = len(nodes)
+    
+    mine = {key: (entry_digest, modified) for key, entry_digest, modified in local.entries(nodes)}
+    theirs = {key: (entry_digest, modified) for key, entry_digest, modified in remote.entries(nodes)}
+    push, pull = [], []
+    for key in mine.keys() | theirs.keys():
+        my_entry, their_entry = mine.get(key), theirs.get(key)
+        if my_entry is not None and their_entry is not None and my_entry[0] == their_entry[0]:
+            continue
+        if their_entry is None or (my_entry is not None and
+                                   (my_entry[1], my_entry[0]) > (their_entry[1], their_entry[0])):
+            push.append([key, *my_entry])
+        else:
+            pull.append([key, *their_entry])
+    
+    if push:
+        records = local.fetch([key for key, entry_digest, _ in push if entry_digest != DELETED])
+        report['sent'] = remote.apply(records, push)
+    if pull:
+        records = remote.fetch([key for key, entry_digest, _ in pull if entry_digest != DELETED])
+        report['received'] = local.apply(records, pull)
+    local.save()
+    remote.save()
+    return report
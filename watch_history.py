@@ -0,0 +1,168 @@
+"""
+Watch history - when episodes were watched, with daily and weekly rollups
+"""
+
+import datetime
+import time
+from array import array
+
+DAY = 86400
+
+def day_of(timestamp):
+    """Get the day number (days since the Unix epoch, UTC) of a timestamp"""
+    return int(timestamp // DAY)
+
+def week_of(day):
+    """Get the week number of a day number; weeks start on Monday"""
+    # Day 0 (1 January 1970) was a Thursday
+    return (day + 3) // 7
+
+def date_of(day):
+    """Get the date of a day number"""
+    return datetime.date(1970, 1, 1) + datetime.timedelta(days=day)
+
+class Rollup:
+    """Episodes watched per day and per week, summed from watch events"""
+    
+    __slots__ = ('daily', 'weekly')
+    
+    def __init__(self):
+        """Initialize empty rollups"""
+        self.daily = {}   # Day number -> episodes
+        self.weekly = {}  # Week number -> episodes
+    
+    def add(self, timestamp, delta):
+        """
+        Count one watch event
+        
+        Args:
+            timestamp (int): When it happened, in seconds since the epoch
+            delta (int): Change in episodes watched; negative corrections
+                take episodes back off their day and week
+        """
+        day = day_of(timestamp)
+        self._bump(self.daily, day, delta)
+        self._bump(self.weekly, week_of(day), delta)
+    
+    def merge(self, other, sign=1):
+        """Add another rollup into this one, or take it out with sign=-1"""
+        for day, episodes in other.daily.items():
+            self._bump(self.daily, day, sign * episodes)
+        for week, episodes in other.weekly.items():
+            self._bump(self.weekly, week, sign * episodes)
+    
+    def episodes_since(self, first_day, last_day):
+        """Get the episodes watched from first_day to last_day inclusive"""
+        daily = self.daily
+        if last_day - first_day + 1 > len(daily):
+            return sum(n for day, n in daily.items() if first_day <= day <= last_day)
+        return sum(daily.get(day, 0) for day in range(first_day, last_day + 1))
+    
+    def weeks(self, first_week, last_week):
+        """
+        Get the episodes watched in each week of a range
+        
+        Returns:
+            list: (Monday's date, episodes) tuples, oldest first
+        """
+        return [(date_of(week * 7 - 3), self.weekly.get(week, 0))
+                for week in range(first_week, last_week + 1)]
+    
+    @staticmethod
+    def _bump(counts, key, delta):
+        """Add delta to one count, dropping it once it reaches zero"""
+        count = counts.get(key, 0) + delta
+        if count:
+            counts[key] = count
+        else:
+            counts.pop(key, None)
+
+class WatchHistory:
+    """
+    The watch events of one series, oldest first
+    
+    Events are (timestamp, episode delta) pairs kept in two parallel
+    array('q') columns, so each costs 16 bytes however long the history
+    gets. The rollups are updated as events are appended, so pace
+    queries never scan the events.
+    """
+    
+    __slots__ = ('_times', '_deltas', 'rollup', 'saved')
+    
+    def __init__(self, events=()):
+        """
+        Initialize a history
+        
+        Args:
+            events (iterable): (timestamp, delta) pairs, oldest first
+        """
+        self._times = array('q')
+        self._deltas = array('q')
+        self.rollup = Rollup()
+        # Number of events already written to storage; storages that
+        # append (journal, SQLite) write only the ones after it
+        self.saved = 0
+        for timestamp, delta in events:
+            self._append(int(timestamp), int(delta))
+    
+    def __len__(self):
+        return len(self._times)
+    
+    def record(self, delta, timestamp=None):
+        """
+        Append an event
+        
+        Args:
+            delta (int): Change in episodes watched
+            timestamp (int): When it happened; defaults to now
+        """
+        self._append(int(time.time() if timestamp is None else timestamp), delta)
+    
+    def events(self, start=0):
+        """
+        Get the events from a position on
+        
+        Returns:
+            list: [timestamp, delta] lists, ready for JSON
+        """
+        return [[t, d] for t, d in zip(self._times[start:], self._deltas[start:])]
+    
+    def latest(self):
+        """Get the time of the newest event, or None if there are none"""
+        return self._times[-1] if self._times else None
+    
+    def _append(self, timestamp, delta):
+        """Append an event and count it in the rollups"""
+        self._times.append(timestamp)
+        self._deltas.append(delta)
+        self.rollup.add(timestamp, delta)
+
+def pace(rollup, remaining, weeks=4, now=None):
+    """
+    Work out the watching pace and when the remaining episodes will be done
+    
+    Args:
+        rollup (Rollup): The rollups to read
+        remaining (int): Episodes left to watch
+        weeks (int): Length of the trailing window, in weeks
+        now (float): The current time; defaults to now
+        
+    Returns:
+        dict: 'episodes_per_week' over the window, 'remaining', 'eta' (an
+        ISO date, or None when nothing is left or nothing was watched),
+        and 'weekly' episode counts for the weeks in the window
+    """
+    today = day_of(time.time() if now is None else now)
+    episodes = rollup.episodes_since(today - 7 * weeks + 1, today)
+    per_week = max(episodes, 0) / weeks
+    eta = None
+    if remaining > 0 and per_week > 0:
+        eta = date_of(today + int(-(-remaining * 7 // per_week))).isoformat()
+    this_week = week_of(today)
+    return {
+        'episodes_per_week': per_week,
+        'remaining': remaining,
+        'eta': eta,
+        'weekly': [{'week': monday.isoformat(), 'episodes': count}
+                   for monday, count in rollup.weeks(this_week - weeks + 1, this_week)],
+    }